@@ -0,0 +1,141 @@
+import threading
+import time
+import arcade
+import constants as c
+import level_cache
+import texture_cache
+
+# Characters whose animation frames the game needs
+CHARACTERS = (
+    (c.PLAYER_SPRITE_FOLDER, c.PLAYER_SPRITE_FILE),
+    (c.ENEMY_SPRITE_FOLDER, c.ENEMY_SPRITE_FILE),
+)
+
+
+class AssetLoader:
+    """
+    Loads everything the game needs before its first frame on a background
+    thread: the compiled level, which may mean parsing the Tiled map, and
+    the decoded images of the level's tiles, the character animations and
+    the game over screen. Everything ends up in the caches the game already
+    reads from, so setting the game up afterwards doesn't touch the disk.
+
+    Nothing here uses the GPU. The loaded textures are listed in `textures`
+    for the main thread to upload, see upload().
+    """
+    def __init__(self, map_src: str = c.MAP_SRC):
+        """
+        :param map_src: Tiled map to load
+        """
+        self.map_src = map_src
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+        # Read by the main thread while loading
+        self.steps_done = 0
+        self.steps_total = 1 + len(CHARACTERS) + 1
+        self.done = False
+        self.error = None
+
+        # Results, once done
+        self.level = None
+        self.textures = []
+        self.atlas_size = None
+        self.uploaded = 0
+
+    @property
+    def progress(self) -> float:
+        """
+        Fraction of the loading done, counting the upload to the GPU.
+        :return:
+        """
+        return (self.steps_done + self.uploaded) / (
+            self.steps_total + len(self.textures)
+        )
+
+    def start(self):
+        """
+        Start loading in the background.
+        :return:
+        """
+        self.thread.start()
+
+    def run(self):
+        """
+        Load every asset. Runs on the loader thread.
+        :return:
+        """
+        try:
+            self.load()
+        except Exception as error:  # Handed to the main thread to raise
+            self.error = error
+
+        self.done = True
+
+    def load(self):
+        """
+        Load the level, then every texture it and the game use.
+        :return:
+        """
+        self.level = level_cache.load_level(self.map_src)
+        level_textures = self.level['textures']
+        self.steps_total += len(level_textures)
+        self.steps_done += 1
+
+        textures = []
+
+        for name_folder, name_file in CHARACTERS:
+            character_textures = texture_cache.get_character_textures(
+                name_folder,
+                name_file
+            )
+            textures.extend(character_textures.all_textures())
+            self.steps_done += 1
+
+        # Tile sprites built later find their images in arcade's texture
+        # cache
+        for texture_args, _ in level_textures:
+            textures.append(arcade.Sprite(**texture_args).texture)
+            self.steps_done += 1
+
+        textures.append(arcade.load_texture(c.GAME_OVER_SCREEN))
+        self.steps_done += 1
+
+        # Tiles can share an image, and the atlas only needs each one once.
+        # Working out how big the atlas has to be is slow enough to do here
+        # too.
+        textures = list({texture.name: texture for texture in textures}.values())
+        self.atlas_size = arcade.TextureAtlas.calculate_minimum_size(textures)
+
+        self.textures = textures
+
+    def upload(self, atlas: arcade.TextureAtlas, budget: float) -> bool:
+        """
+        Add loaded textures to a texture atlas, for a limited time, so the
+        loading screen keeps drawing while they go up. Call from the main
+        thread once loading is done.
+        :param atlas: Atlas the game's sprite lists draw from
+        :param budget: Seconds to spend uploading
+        :return: True once every texture has been uploaded
+        """
+        deadline = time.perf_counter() + budget
+
+        # Grow the atlas once up front, rather than every time it fills up
+        # part way through
+        if self.uploaded == 0:
+            width, height = self.atlas_size
+
+            if width > atlas.width or height > atlas.height:
+                atlas.resize((max(width, atlas.width), max(height, atlas.height)))
+
+        while self.uploaded < len(self.textures):
+            texture = self.textures[self.uploaded]
+
+            if not atlas.has_texture(texture):
+                atlas.add(texture)
+
+            self.uploaded += 1
+
+            if time.perf_counter() > deadline:
+                break
+
+        return self.uploaded == len(self.textures)
@@ -0,0 +1,294 @@
+import argparse
+import gc
+import json
+import math
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+import constants as c
+from game_world import GameWorld
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+# Inputs held for a number of ticks, replayed in a loop
+DEFAULT_SCRIPT = [
+    {'ticks': 90, 'keys': ['right']},
+    {'ticks': 20, 'keys': ['right', 'up']},
+    {'ticks': 60, 'keys': ['right']},
+    {'ticks': 30, 'keys': []},
+    {'ticks': 90, 'keys': ['left']},
+    {'ticks': 20, 'keys': ['left', 'up']},
+    {'ticks': 30, 'keys': []},
+]
+
+# Extra ticks stepped after the timed run to measure each tick's allocations
+ALLOCATION_TICKS = 600
+
+# Directory of the game's own modules, to tell their allocations apart from
+# the libraries'
+GAME_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+
+PHASES = (
+    'update_streaming',
+    'update_moving_platforms',
+    'update_player_sprite',
+    'update_enemies',
+    'physics_engine.step',
+    'pymunk_moved',
+)
+
+
+def script_inputs(script):
+    """
+    Endlessly yield the keys held on each tick of an input script.
+    :param script: List of {'ticks': int, 'keys': [str]} entries
+    :return: Generator of key sets, one per tick
+    """
+    # Each entry's keys are made once, not on every pass through the script
+    entries = [(entry['ticks'], frozenset(entry['keys'])) for entry in script]
+
+    while True:
+        for ticks, keys in entries:
+            for _ in range(ticks):
+                yield keys
+
+
+def set_inputs(world: GameWorld, keys):
+    """
+    Set the world's input flags to match a set of held keys.
+    :param world:
+    :param keys: Held keys out of 'left', 'right', 'up' and 'down'
+    :return:
+    """
+    world.left_pressed = 'left' in keys
+    world.right_pressed = 'right' in keys
+    world.up_pressed = 'up' in keys
+    world.down_pressed = 'down' in keys
+
+
+def tick_allocations(world: GameWorld, inputs, ticks: int) -> dict:
+    """
+    Step a world that has been running for a while, with tracemalloc
+    tracing, and measure the memory each tick allocates.
+    :param world:
+    :param inputs: Generator of key sets, one per tick
+    :param ticks: Number of ticks to measure
+    :return: Median and largest memory in use at once during a tick, above
+    what was in use before it, the memory held onto per tick, and how much
+    of what is held was allocated by the game's own modules
+    """
+    delta_time = 1 / c.PHYSICS_STEP_RATE
+    peaks = []
+
+    gc.collect()
+    start_snapshot = tracemalloc.take_snapshot()
+    start = tracemalloc.get_traced_memory()[0]
+
+    for _ in range(ticks):
+        set_inputs(world, next(inputs))
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        world.step(delta_time)
+        peaks.append(tracemalloc.get_traced_memory()[1] - before)
+
+    gc.collect()
+    held = tracemalloc.get_traced_memory()[0] - start
+    # Leave out the measurements themselves, e.g. the list of peaks
+    own_allocations = (tracemalloc.Filter(False, __file__),)
+    differences = tracemalloc.take_snapshot().filter_traces(
+        own_allocations
+    ).compare_to(start_snapshot.filter_traces(own_allocations), 'filename')
+
+    return {
+        'ticks': ticks,
+        'median_bytes': statistics.median(peaks),
+        'max_bytes': max(peaks),
+        'held_bytes_per_tick': held / ticks,
+        'game_held_bytes': sum(
+            difference.size_diff for difference in differences
+            if os.path.dirname(difference.traceback[0].filename)
+            == GAME_DIRECTORY
+        ),
+    }
+
+
+def peak_rss_kb():
+    """
+    Peak resident memory of this process, if the platform reports it.
+    :return: Peak memory in KiB, or None
+    """
+    if resource is None:
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # macOS reports bytes, Linux reports KiB
+    if sys.platform == 'darwin':
+        peak //= 1024
+
+    return peak
+
+
+def run(map_src, ticks, script, trace_memory=False, sleeping=True):
+    """
+    Load a map into a headless GameWorld and step it for a number of ticks,
+    timing each phase of the tick.
+    :param map_src: Tiled map to load
+    :param ticks: Number of fixed physics steps to run
+    :param script: Input script replayed while stepping
+    :param trace_memory: Also report the tracemalloc peak, and then step
+    ALLOCATION_TICKS more ticks to measure what each tick allocates. This
+    slows the simulation down, so timings are not comparable with untraced
+    runs.
+    :param sleeping: Let idle bodies fall asleep, as the game does
+    :return: Dict of results
+    """
+    if trace_memory:
+        tracemalloc.start()
+
+    delta_time = 1 / c.PHYSICS_STEP_RATE
+    totals = dict.fromkeys(PHASES, 0.0)
+    clock = time.perf_counter
+
+    setup_start = clock()
+    world = GameWorld()
+    world.setup(map_src)
+    setup_time = clock() - setup_start
+
+    if not sleeping:
+        world.configure_sleeping(math.inf)
+
+    physics_engine = world.physics_engine
+    inputs = script_inputs(script)
+    ticks_run = 0
+    run_start = clock()
+
+    for _ in range(ticks):
+        set_inputs(world, next(inputs))
+
+        t_stream = clock()
+        world.stream_around_player()
+        t0 = clock()
+        world.update_moving_platforms(delta_time)
+        t1 = clock()
+        world.update_player_sprite()
+        t2 = clock()
+        world.enemy_controller.update()
+        t3 = clock()
+        physics_engine.step(delta_time, resync_sprites=False)
+        t4 = clock()
+        physics_engine.resync_sprites()
+        t5 = clock()
+
+        totals['update_streaming'] += t0 - t_stream
+        totals['update_moving_platforms'] += t1 - t0
+        totals['update_player_sprite'] += t2 - t1
+        totals['update_enemies'] += t3 - t2
+        totals['physics_engine.step'] += t4 - t3
+        totals['pymunk_moved'] += t5 - t4
+        ticks_run += 1
+
+        if world.is_player_out_of_bounds():
+            break
+
+    run_time = clock() - run_start
+
+    results = {
+        'map': map_src,
+        'ticks': ticks_run,
+        'step_rate': c.PHYSICS_STEP_RATE,
+        'setup_s': setup_time,
+        'run_s': run_time,
+        'ticks_per_second': ticks_run / run_time if run_time else None,
+        'phases': {
+            name: {
+                'total_s': total,
+                'mean_us': total / ticks_run * 1e6 if ticks_run else None,
+                'share': total / run_time if run_time else None,
+            }
+            for name, total in totals.items()
+        },
+        'platform_shapes': world.level['platform_shape_counts'],
+        'loaded_chunks': len(world.streamer.loaded),
+        'total_chunks': len(world.level['chunks']),
+        'player_out_of_bounds': world.is_player_out_of_bounds(),
+        'score': world.player_sprite.score,
+        'enemies': len(world.enemy_controller.enemies),
+        'bodies': dict(zip(('active', 'sleeping'), world.count_bodies())),
+        'peak_rss_kb': peak_rss_kb(),
+    }
+
+    if trace_memory:
+        results['tracemalloc_peak_bytes'] = tracemalloc.get_traced_memory()[1]
+        results['tick_allocations'] = tick_allocations(
+            world,
+            inputs,
+            ALLOCATION_TICKS
+        )
+        tracemalloc.stop()
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Step the game world without a window and report '
+                    'per-phase timings as JSON.'
+    )
+    parser.add_argument('--map', default=c.MAP_SRC, help='Tiled map to load')
+    parser.add_argument(
+        '--ticks',
+        type=int,
+        default=3600,
+        help='Number of fixed physics steps to run'
+    )
+    parser.add_argument(
+        '--script',
+        help='JSON input script: a list of {"ticks": n, "keys": [...]}'
+    )
+    parser.add_argument(
+        '--output',
+        help='File to write the results to instead of stdout'
+    )
+    parser.add_argument(
+        '--trace-memory',
+        action='store_true',
+        help="Also report the tracemalloc peak and each tick's allocations "
+             '(slows the run down)'
+    )
+    parser.add_argument(
+        '--no-sleeping',
+        action='store_true',
+        help='Keep simulating bodies that have come to rest'
+    )
+    args = parser.parse_args()
+
+    script = DEFAULT_SCRIPT
+
+    if args.script:
+        with open(args.script) as script_file:
+            script = json.load(script_file)
+
+    results = run(
+        args.map,
+        args.ticks,
+        script,
+        args.trace_memory,
+        not args.no_sleeping
+    )
+
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            json.dump(results, output_file, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,173 @@
+import math
+import arcade
+import constants as c
+
+
+def apply_camera(camera: arcade.Camera):
+    """
+    Select a camera for drawing with the matrices it already has. Unlike
+    Camera.use(), this doesn't recalculate them.
+    :param camera: Camera that has been updated at least once
+    :return:
+    """
+    window = arcade.get_window()
+    window.current_camera = camera
+    window.ctx.viewport = (
+        0,
+        0,
+        int(camera.viewport_width),
+        int(camera.viewport_height)
+    )
+    window.ctx.projection_2d_matrix = camera.combined_matrix
+
+
+class CameraController:
+    """
+    Scrolls a camera to follow a target, e.g. the player.
+
+    The target can move around a dead zone in the middle of the view without
+    the camera following. Once it leaves the dead zone, the camera eases
+    after it, and the camera never shows anything outside the map. The
+    camera's matrices are only recalculated on frames it actually moves, and
+    `version` counts those moves, so anything worked out from the view only
+    needs redoing when it changes.
+    """
+    def __init__(
+            self,
+            camera: arcade.Camera,
+            map_width: float,
+            map_height: float,
+            dead_zone_width: float = c.CAMERA_DEAD_ZONE_WIDTH_PX,
+            dead_zone_height: float = c.CAMERA_DEAD_ZONE_HEIGHT_PX,
+            follow_rate: float = c.CAMERA_FOLLOW_RATE
+    ):
+        """
+        :param camera: Camera to scroll
+        :param map_width: Width of the map in pixels
+        :param map_height: Height of the map in pixels
+        :param dead_zone_width:
+        :param dead_zone_height:
+        :param follow_rate: How quickly the camera catches up, per second;
+        math.inf to follow instantly
+        """
+        self.camera = camera
+        self.map_width = map_width
+        self.map_height = map_height
+        self.dead_zone_width = dead_zone_width
+        self.dead_zone_height = dead_zone_height
+        self.follow_rate = follow_rate
+
+        # Bottom left corner of the view, and where it's heading
+        self.left = 0.0
+        self.bottom = 0.0
+        self.goal_left = 0.0
+        self.goal_bottom = 0.0
+
+        self.version = 0
+        self.dirty = True
+
+    @property
+    def width(self) -> float:
+        return self.camera.viewport_width
+
+    @property
+    def height(self) -> float:
+        return self.camera.viewport_height
+
+    def clamp(self, left: float, bottom: float):
+        """
+        Keep a view position inside the map. A map smaller than the view is
+        shown from its bottom left corner.
+        :param left:
+        :param bottom:
+        :return: (left, bottom)
+        """
+        return (
+            min(max(left, 0.0), max(self.map_width - self.width, 0.0)),
+            min(max(bottom, 0.0), max(self.map_height - self.height, 0.0))
+        )
+
+    def snap(self, x: float, y: float):
+        """
+        Jump straight to a view centered on a point, e.g. after a restart.
+        :param x:
+        :param y:
+        :return:
+        """
+        self.goal_left, self.goal_bottom = self.clamp(
+            x - self.width / 2,
+            y - self.height / 2
+        )
+        self.left = self.goal_left
+        self.bottom = self.goal_bottom
+        self.version += 1
+        self.dirty = True
+
+    def update(self, x: float, y: float, delta_time: float) -> bool:
+        """
+        Move the view towards the target.
+        :param x: Target position
+        :param y:
+        :param delta_time: Time since the last update
+        :return: Whether the view moved
+        """
+        # Move the goal just enough to bring the target back inside the
+        # dead zone
+        center_x = self.goal_left + self.width / 2
+        center_y = self.goal_bottom + self.height / 2
+        half_width = self.dead_zone_width / 2
+        half_height = self.dead_zone_height / 2
+
+        if x > center_x + half_width:
+            center_x = x - half_width
+        elif x < center_x - half_width:
+            center_x = x + half_width
+
+        if y > center_y + half_height:
+            center_y = y - half_height
+        elif y < center_y - half_height:
+            center_y = y + half_height
+
+        self.goal_left, self.goal_bottom = self.clamp(
+            center_x - self.width / 2,
+            center_y - self.height / 2
+        )
+
+        # Ease towards the goal the same amount in the same time at any frame
+        # rate, and land on it once close enough
+        distance_x = self.goal_left - self.left
+        distance_y = self.goal_bottom - self.bottom
+
+        if distance_x == 0 and distance_y == 0:
+            return False
+
+        if (
+            abs(distance_x) <= c.CAMERA_SNAP_PX
+            and abs(distance_y) <= c.CAMERA_SNAP_PX
+        ):
+            self.left = self.goal_left
+            self.bottom = self.goal_bottom
+        else:
+            step = 1 - math.exp(-self.follow_rate * delta_time)
+            self.left += distance_x * step
+            self.bottom += distance_y * step
+
+        self.version += 1
+        self.dirty = True
+
+        return True
+
+    def use(self):
+        """
+        Select the camera for drawing, recalculating its matrices only if
+        the view has moved since they were last worked out.
+        :return:
+        """
+        if not self.dirty:
+            apply_camera(self.camera)
+            return
+
+        position = (self.left, self.bottom)
+        self.camera.move_to(position)
+        self.camera.use()
+        self.dirty = False
@@ -1,37 +1,66 @@
 import arcade
 import constants as c
-import utils
+from texture_cache import get_character_textures
+
+
+# Animations whose frames advance with vertical rather than horizontal
+# movement
+VERTICAL_ANIMATIONS = frozenset((c.ANIMATION_CLIMB,))
 
 
 class CharacterSprite(arcade.Sprite):
     """
     Animated character sprite (can be a player or an enemy).
+
+    The animation is a small state machine: each move picks an animation
+    state, and the state's frame table, shared by every sprite of the
+    character, gives the texture. The texture is only assigned when the
+    state, frame or facing direction actually changes.
+
+    Character state is kept in slots rather than the instance dict, which
+    only holds what arcade.Sprite sets.
     """
+    __slots__ = (
+        'character_textures',
+        'sprite_path',
+        'frames',
+        'is_on_ladder',
+        'face_direction',
+        'odometer_x',
+        'odometer_y',
+        'animation_state',
+        'shown_state',
+        'shown_index',
+        'shown_direction',
+    )
+
     def __init__(self, name_folder, name_file):
         super(CharacterSprite, self).__init__()
 
-        self.sprite_path = f'{c.CHARACTER_SPRITE_PATH}/{name_folder}/{name_file}'
+        self.character_textures = get_character_textures(name_folder, name_file)
+        self.sprite_path = self.character_textures.sprite_path
+        self.frames = self.character_textures.frames
         self.scale = c.SPRITE_SCALING
-        self.face_direction = c.RIGHT_FACING
         self.is_on_ladder = False
-        self.odometer_x = 0
-        self.odometer_y = 0
-
-        self.idle_texture_pair = arcade.load_texture_pair(
-            f'{self.sprite_path}_idle.png'
-        )
 
-        self.walk_texture_pairs = []
+        # Frame the texture shows, as state, index and facing direction
+        self.shown_state = None
+        self.shown_index = None
+        self.shown_direction = None
 
-        for i in range(c.WALK_TEXTURES_TOTAL):
-            texture_pair = arcade.load_texture_pair(
-                f'{c.PLAYER_SPRITE_PATH}_walk{i}.png'
-            )
+        self.reset_animation()
 
-            self.walk_texture_pairs.append(texture_pair)
-
-        self.texture = self.idle_texture_pair[self.face_direction]
+    def reset_animation(self):
+        """
+        Go back to standing idle, facing right.
+        :return:
+        """
+        self.face_direction = c.RIGHT_FACING
+        self.odometer_x = 0
+        self.odometer_y = 0
+        self.animation_state = c.ANIMATION_IDLE
         self.cur_texture_index = 0
+        self.show_frame()
 
     def set_sprite_direction(self, dx):
         """
@@ -50,33 +79,61 @@ class CharacterSprite(arcade.Sprite):
         ):
             self.face_direction = c.RIGHT_FACING
 
-    def animate_walking(self):
+    def choose_animation(self, dx, dy) -> str:
+        """
+        Pick the animation state for a move along the ground.
+        :param dx: The sprite's horizontal displacement
+        :param dy: The sprite's vertical displacement
+        :return: One of the ANIMATION_* states
+        """
+        if abs(dx) <= c.STATIONARY_ZONE:
+            return c.ANIMATION_IDLE
+
+        return c.ANIMATION_WALK
+
+    def play_animation(self, state: str):
         """
-        Update the sprite's walking animation.
+        Switch to an animation state, or keep playing the current one,
+        moving on a frame every DISTANCE_PX_TO_CHANGE_TEXTURE travelled.
+        :param state: One of the ANIMATION_* states
         :return:
         """
-        if (
-            abs(self.odometer_x) > c.DISTANCE_PX_TO_CHANGE_TEXTURE
-            and not self.is_on_ladder
-        ):
+        if state != self.animation_state:
+            self.animation_state = state
+            self.cur_texture_index = 0
             self.odometer_x = 0
-            self.cur_texture_index += 1
+            self.odometer_y = 0
+        else:
+            if state in VERTICAL_ANIMATIONS:
+                distance = self.odometer_y
+            else:
+                distance = self.odometer_x
 
-            if self.cur_texture_index >= c.WALK_TEXTURES_TOTAL:
-                self.cur_texture_index = 0
+            if abs(distance) > c.DISTANCE_PX_TO_CHANGE_TEXTURE:
+                self.odometer_x = 0
+                self.odometer_y = 0
+                self.cur_texture_index = (
+                    (self.cur_texture_index + 1) % len(self.frames[state])
+                )
 
-            self.texture = self.walk_texture_pairs[
-                self.cur_texture_index
-            ][
-                self.face_direction
-            ]
+        self.show_frame()
 
-    def animate_idle(self, dx):
+    def show_frame(self):
         """
-        Update the sprite's texture to an idle texture if its horizontal
-        displacement reaches the value of STATIONARY_ZONE.
-        :param dx: The sprite's horizontal displacement
+        Set the texture for the current state, frame and facing direction,
+        unless it is already showing.
         :return:
         """
-        if abs(dx) <= c.STATIONARY_ZONE and not self.is_on_ladder:
-            self.texture = self.idle_texture_pair[self.face_direction]
+        state = self.animation_state
+        index = self.cur_texture_index
+        direction = self.face_direction
+
+        if (
+            state != self.shown_state
+            or index != self.shown_index
+            or direction != self.shown_direction
+        ):
+            self.shown_state = state
+            self.shown_index = index
+            self.shown_direction = direction
+            self.texture = self.frames[state][index][direction]
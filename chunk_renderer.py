@@ -0,0 +1,219 @@
+import math
+import arcade
+import constants as c
+from collections import OrderedDict
+from arcade.gl import geometry
+from pyglet import gl
+
+VERTEX_SHADER = '''
+#version 330
+
+uniform Projection {
+    uniform mat4 matrix;
+} proj;
+
+in vec2 in_vert;
+in vec2 in_uv;
+out vec2 v_uv;
+
+void main() {
+    gl_Position = proj.matrix * vec4(in_vert, 0.0, 1.0);
+    v_uv = in_uv;
+}
+'''
+
+FRAGMENT_SHADER = '''
+#version 330
+
+uniform sampler2D chunk_texture;
+
+in vec2 v_uv;
+out vec4 f_color;
+
+void main() {
+    f_color = texture(chunk_texture, v_uv);
+}
+'''
+
+
+class ChunkRenderer:
+    """
+    Draws the static layers of the loaded level chunks from textures
+    pre-rendered once per chunk, so each chunk costs one quad however many
+    tiles it has. Only chunks overlapping the camera are drawn.
+
+    Static layers never change while a level is loaded, so a chunk's
+    texture is kept after the chunk unloads, up to CHUNK_TEXTURE_CACHE_SIZE
+    textures, and reused if the chunk loads again.
+    """
+    def __init__(self, ctx: arcade.ArcadeContext, streamer):
+        """
+        :param ctx: Window's rendering context
+        :param streamer: ChunkStreamer holding the loaded chunks
+        """
+        self.ctx = ctx
+        self.streamer = streamer
+        self.program = ctx.program(
+            vertex_shader=VERTEX_SHADER,
+            fragment_shader=FRAGMENT_SHADER
+        )
+        self.program['chunk_texture'] = 0
+
+        # Layers baked into the textures, in the map's draw order
+        self.layer_names = [
+            name for name in streamer.level['layers']
+            if name in c.BAKED_LAYERS
+        ]
+
+        # Chunk key -> (texture, quad, bounds), or None if the chunk has no
+        # static sprites, least recently loaded first
+        self.chunks = OrderedDict()
+
+        # Streamer version the textures are up to date with
+        self.streamer_version = None
+
+        # Chunks overlapping the view, and the view and streamer version
+        # they were picked for
+        self.visible = []
+        self.visible_key = None
+
+    def update(self):
+        """
+        Render textures for newly loaded chunks, and let go of the least
+        recently used textures of unloaded chunks. Does nothing unless
+        chunks have loaded or unloaded since the last update.
+        :return:
+        """
+        if self.streamer.version == self.streamer_version:
+            return
+
+        self.streamer_version = self.streamer.version
+        loaded = self.streamer.loaded
+
+        for key, chunk in loaded.items():
+            if key in self.chunks:
+                self.chunks.move_to_end(key)
+            else:
+                self.chunks[key] = self.bake(chunk['baked'])
+
+        while len(self.chunks) > c.CHUNK_TEXTURE_CACHE_SIZE:
+            key = next(iter(self.chunks))
+
+            # Loaded chunks are all at the end; never evict one of them
+            if key in loaded:
+                break
+
+            del self.chunks[key]
+
+    def bake(self, layers: dict):
+        """
+        Render a chunk's static sprites into a texture the size of their
+        bounding box.
+        :param layers: Layer name -> sprites of the chunk
+        :return: (texture, quad, (left, bottom, right, top)), or None if
+        there is nothing to draw
+        """
+        sprite_list = arcade.SpriteList()
+
+        for name in self.layer_names:
+            sprite_list.extend(layers.get(name, []))
+
+        if not sprite_list:
+            return None
+
+        left = math.floor(min(sprite.left for sprite in sprite_list))
+        bottom = math.floor(min(sprite.bottom for sprite in sprite_list))
+        right = math.ceil(max(sprite.right for sprite in sprite_list))
+        top = math.ceil(max(sprite.top for sprite in sprite_list))
+        width = right - left
+        height = top - bottom
+
+        ctx = self.ctx
+        texture = ctx.texture(
+            (width, height),
+            components=4,
+            filter=(ctx.NEAREST, ctx.NEAREST)
+        )
+        framebuffer = ctx.framebuffer(color_attachments=[texture])
+        projection = ctx.projection_2d
+
+        with framebuffer.activate():
+            framebuffer.clear()
+            ctx.projection_2d = (left, right, bottom, top)
+
+            # Colors and alpha need different blending to come out as a
+            # premultiplied alpha texture, and SpriteList.draw only takes
+            # one blend function, so they are drawn in separate passes
+            gl.glColorMask(True, True, True, False)
+            sprite_list.draw()
+            gl.glColorMask(False, False, False, True)
+            sprite_list.draw(blend_function=(ctx.ONE, ctx.ONE_MINUS_SRC_ALPHA))
+            gl.glColorMask(True, True, True, True)
+
+        ctx.projection_2d = projection
+
+        # Don't leave the sprites holding a reference to the temporary list
+        sprite_list.clear()
+
+        quad = geometry.quad_2d(
+            size=(width, height),
+            pos=(left + width / 2, bottom + height / 2)
+        )
+
+        return texture, quad, (left, bottom, right, top)
+
+    def draw(self, left: float, bottom: float, width: float, height: float):
+        """
+        Draw the loaded chunks that overlap the camera. Which chunks those
+        are is only worked out again when the view or the loaded chunks
+        change.
+        :param left: Left edge of the camera's view
+        :param bottom: Bottom edge of the camera's view
+        :param width:
+        :param height:
+        :return:
+        """
+        visible_key = (left, bottom, width, height, self.streamer_version)
+
+        if visible_key != self.visible_key:
+            self.visible_key = visible_key
+            self.visible = self.find_visible(left, bottom, width, height)
+
+        ctx = self.ctx
+        ctx.blend_func = ctx.ONE, ctx.ONE_MINUS_SRC_ALPHA
+        program = self.program
+
+        for texture, quad in self.visible:
+            texture.use(0)
+            quad.render(program)
+
+        ctx.blend_func = ctx.BLEND_DEFAULT
+
+    def find_visible(self, left, bottom, width, height):
+        """
+        Find the loaded chunks with textures that overlap a view.
+        :param left:
+        :param bottom:
+        :param width:
+        :param height:
+        :return: List of (texture, quad)
+        """
+        right = left + width
+        top = bottom + height
+        visible = []
+
+        for key in self.streamer.loaded:
+            chunk = self.chunks.get(key)
+
+            if chunk is None:
+                continue
+
+            texture, quad, bounds = chunk
+
+            if (
+                bounds[0] < right and bounds[2] > left
+                and bounds[1] < top and bounds[3] > bottom
+            ):
+                visible.append((texture, quad))
+
+        return visible
@@ -0,0 +1,452 @@
+import math
+import arcade
+import constants as c
+import level_cache
+from collections import defaultdict
+from enemy_sprite import EnemySprite
+
+
+class ChunkStreamer:
+    """
+    Keeps the level chunks around the viewport loaded into a GameWorld's
+    scene and physics space, and unloads chunks once they are far away.
+
+    Static sprites and platform shapes are rebuilt from the compiled level
+    whenever their chunk loads. Sprites in BAKED_LAYERS are kept out of the
+    scene; they are drawn from a ChunkRenderer's pre-rendered textures
+    instead. Dynamic items and enemies are spawned the
+    first time their chunk loads; when they end up outside the loaded area
+    they are parked, with their physics state, until the chunk they are in
+    loads again.
+
+    Sprites taken out of the world go to the world's SpritePool with their
+    bodies and shapes, pooled by layer and texture, and are reused for the
+    next sprite of the same kind. Platform shapes are kept too, so after the
+    first load of a chunk, and after a level reset, nothing is built again.
+    A platform shape can span several chunks, and is in the space while any
+    of them is loaded.
+    """
+    def __init__(self, world):
+        self.world = world
+        self.level = world.level
+        self.pool = world.sprite_pool
+        self.chunk_size = self.level['chunk_size']
+
+        # Chunk key -> sprites and platform shapes the chunk added
+        self.loaded = {}
+        self.visited = set()
+        self.view_range = None
+
+        # Counts changes to the loaded chunks
+        self.version = 0
+
+        # Platform shape index -> pymunk shape, built the first time a chunk
+        # it overlaps loads, and how many loaded chunks it overlaps
+        self.platform_shapes = {}
+        self.platform_shape_users = {}
+
+        # Dynamic sprites in the world, by pool kind, and parked ones by
+        # chunk key
+        self.active = {}
+        self.parked = defaultdict(list)
+
+        # Dynamic sprite -> (layer name, index of the record or enemy spawn
+        # point it started from)
+        self.origins = {}
+
+        # Collectibles picked up, as (layer name, record index)
+        self.collected = set()
+        self.sprite_keys = {}
+        self.remaining = self.count_collectibles()
+
+        # Collectibles the level starts with; a level with none has nothing
+        # to complete
+        self.total_collectibles = sum(self.remaining.values())
+
+        self.spawners = {
+            c.LAYER_DYNAMIC_ITEMS: world.add_dynamic_item,
+            c.LAYER_ENEMIES: world.add_enemy_sprite,
+        }
+
+    def count_collectibles(self) -> dict:
+        """
+        Count the collectibles of each kind in the whole level.
+        :return: Layer name -> number of collectibles
+        """
+        return {
+            name: len(self.level['layers'][name]['sprites'])
+            if name in self.level['layers'] else 0
+            for name in c.COLLECTIBLE_LAYERS
+        }
+
+    def chunk_range(self, left, bottom, right, top):
+        """
+        Get the chunks overlapping a rectangle.
+        :param left:
+        :param bottom:
+        :param right:
+        :param top:
+        :return: (first column, first row, last column, last row)
+        """
+        first = level_cache.chunk_key(left, bottom, self.chunk_size)
+        last = level_cache.chunk_key(right, top, self.chunk_size)
+
+        return first[0], first[1], last[0], last[1]
+
+    @staticmethod
+    def in_range(key, chunk_range) -> bool:
+        """
+        Check whether a chunk is inside a chunk range.
+        :param key: (column, row) of the chunk
+        :param chunk_range: (first column, first row, last column, last row)
+        :return:
+        """
+        return (
+            chunk_range[0] <= key[0] <= chunk_range[2]
+            and chunk_range[1] <= key[1] <= chunk_range[3]
+        )
+
+    def update(self, left, bottom, width, height):
+        """
+        Load the chunks within CHUNK_MARGIN_PX of the viewport and unload
+        chunks more than one chunk further away. Does nothing while the
+        viewport stays over the same chunks.
+        :param left: Left edge of the viewport
+        :param bottom: Bottom edge of the viewport
+        :param width:
+        :param height:
+        :return:
+        """
+        margin = c.CHUNK_MARGIN_PX
+        view_range = self.chunk_range(
+            left - margin,
+            bottom - margin,
+            left + width + margin,
+            bottom + height + margin
+        )
+
+        if view_range == self.view_range:
+            return
+
+        self.view_range = view_range
+
+        # Keep an extra ring of chunks so walking back and forth over a
+        # chunk edge doesn't reload the same chunks
+        keep_range = (
+            view_range[0] - 1,
+            view_range[1] - 1,
+            view_range[2] + 1,
+            view_range[3] + 1
+        )
+
+        for key in list(self.loaded):
+            if not self.in_range(key, keep_range):
+                self.unload_chunk(key)
+
+        for sprite in list(self.active):
+            key = level_cache.chunk_key(*sprite.position, self.chunk_size)
+
+            if not self.in_range(key, keep_range):
+                self.park(sprite, key)
+
+        for column in range(view_range[0], view_range[2] + 1):
+            for row in range(view_range[1], view_range[3] + 1):
+                if (column, row) not in self.loaded:
+                    self.load_chunk((column, row))
+
+    def load_chunk(self, key):
+        """
+        Add a chunk's sprites and platform shapes to the world. Parts of the
+        map with nothing in them have no chunk, and are never counted as
+        loaded; only the dynamic sprites parked there come back.
+        :param key: (column, row) of the chunk
+        :return:
+        """
+        chunk = self.level['chunks'].get(key)
+
+        if chunk is not None:
+            loaded = {'sprites': [], 'baked': {}, 'shapes': []}
+            self.loaded[key] = loaded
+            self.version += 1
+            first_visit = key not in self.visited
+
+            for name, indexes in chunk['sprites'].items():
+                if name in self.spawners:
+                    if first_visit:
+                        self.spawn_records(name, indexes)
+                else:
+                    self.load_records(name, indexes, loaded)
+
+            if first_visit:
+                for index in chunk['enemy_spawns']:
+                    self.spawn_origin((c.LAYER_ENEMIES, index))
+
+            self.add_platform_shapes(chunk['platform_shapes'])
+            loaded['shapes'] = chunk['platform_shapes']
+            self.visited.add(key)
+
+        # Parked bodies kept their velocity and angle while out of the space
+        for kind, sprite, physics_object in self.parked.pop(key, []):
+            self.spawn(kind, sprite, physics_object)
+
+    def add_platform_shapes(self, indexes):
+        """
+        Add the platform shapes a chunk overlaps to the physics space, unless
+        another loaded chunk has already added them.
+        :param indexes: Indexes of the shapes in the compiled level
+        :return:
+        """
+        missing = [
+            index for index in indexes if index not in self.platform_shapes
+        ]
+
+        if missing:
+            polygons = self.level['platform_shapes']
+            self.platform_shapes.update(zip(
+                missing,
+                self.world.create_platform_shapes(
+                    [polygons[index] for index in missing]
+                )
+            ))
+
+        added = []
+
+        for index in indexes:
+            users = self.platform_shape_users.get(index, 0)
+            self.platform_shape_users[index] = users + 1
+
+            if not users:
+                added.append(self.platform_shapes[index])
+
+        if added:
+            self.world.physics_engine.space.add(*added)
+
+    def remove_platform_shapes(self, indexes):
+        """
+        Remove the platform shapes an unloaded chunk overlaps from the physics
+        space, once no other loaded chunk overlaps them.
+        :param indexes: Indexes of the shapes in the compiled level
+        :return:
+        """
+        removed = []
+
+        for index in indexes:
+            users = self.platform_shape_users.pop(index) - 1
+
+            if users:
+                self.platform_shape_users[index] = users
+            else:
+                removed.append(self.platform_shapes[index])
+
+        if removed:
+            self.world.physics_engine.space.remove(*removed)
+
+    def load_records(self, name, indexes, loaded):
+        """
+        Build the static sprites of one layer of a chunk, skipping any
+        collectibles already picked up.
+        :param name: Layer name
+        :param indexes: Indexes of the layer's sprite records
+        :param loaded: Record of what the chunk added
+        :return:
+        """
+        records = self.level['layers'][name]['sprites']
+        loaded_sprites = loaded['sprites']
+        physics_objects = self.world.physics_engine.sprites
+
+        if name in c.BAKED_LAYERS:
+            sprite_list = loaded['baked'].setdefault(name, [])
+        else:
+            sprite_list = self.world.scene[name]
+
+        for index in indexes:
+            if (name, index) in self.collected:
+                continue
+
+            kind = (name, records[index]['texture'], records[index]['frames'])
+            sprite, physics_object = self.build_sprite(kind, records[index])
+            sprite_list.append(sprite)
+
+            if name in c.COLLECTIBLE_LAYERS:
+                self.world.add_sensor_sprite(
+                    sprite,
+                    c.COLLISION_COLLECTIBLE,
+                    physics_object
+                )
+                self.sprite_keys[sprite] = (name, index)
+            elif name == c.LAYER_LADDERS:
+                self.world.add_sensor_sprite(
+                    sprite,
+                    c.COLLISION_LADDER,
+                    physics_object
+                )
+
+            # Keep the physics object, as a collected sprite removes itself
+            # from the physics engine before the chunk unloads
+            loaded_sprites.append((sprite, kind, physics_objects.get(sprite)))
+
+    def build_sprite(self, kind, record):
+        """
+        Get a sprite for a compiled record, reusing a pooled sprite of the
+        same kind if there is one.
+        :param kind: Pool kind, (layer name, texture index, animation frames)
+        :param record: Compiled sprite
+        :return: (sprite, physics object to reuse or None)
+        """
+        pooled = self.pool.acquire(kind)
+
+        if pooled is None:
+            return level_cache.build_sprite(self.level, record), None
+
+        sprite, physics_object = pooled
+        level_cache.apply_record(sprite, record)
+
+        if physics_object is not None:
+            _place_body(physics_object, sprite)
+
+        return pooled
+
+    def spawn_records(self, name, indexes):
+        """
+        Build the dynamic sprites of one layer of a chunk and add them to the
+        world.
+        :param name: Layer name
+        :param indexes: Indexes of the layer's sprite records
+        :return:
+        """
+        for index in indexes:
+            self.spawn_origin((name, index))
+
+    def spawn_origin(self, origin) -> arcade.Sprite:
+        """
+        Add the dynamic sprite that starts from a layer record, or for
+        enemies a spawn point, to the world, reusing a pooled sprite of the
+        same kind if there is one.
+        :param origin: (layer name, record or spawn point index)
+        :return: The sprite
+        """
+        name, index = origin
+
+        if name == c.LAYER_ENEMIES:
+            kind = (name, None)
+            pooled = self.pool.acquire(kind)
+
+            health = self.world.tuning.enemy_health
+
+            if pooled is None:
+                sprite, physics_object = EnemySprite(health), None
+            else:
+                sprite, physics_object = pooled
+                sprite.reset(health)
+
+            sprite.position = self.level['enemy_spawns'][index]
+
+            if physics_object is not None:
+                _place_body(physics_object, sprite)
+        else:
+            record = self.level['layers'][name]['sprites'][index]
+            kind = (name, record['texture'], record['frames'])
+            sprite, physics_object = self.build_sprite(kind, record)
+
+        self.spawn(kind, sprite, physics_object)
+        self.origins[sprite] = origin
+
+        return sprite
+
+    def spawn(self, kind, sprite, physics_object=None):
+        """
+        Add a dynamic sprite to the world and track it.
+        :param kind: Pool kind, starting with the layer name
+        :param sprite:
+        :param physics_object: Body and shape to reuse, if the sprite has
+        been in the physics engine before
+        :return:
+        """
+        self.spawners[kind[0]](sprite, physics_object)
+        self.active[sprite] = kind
+
+    def park(self, sprite, key):
+        """
+        Take a dynamic sprite out of the world, keeping its physics state
+        until its chunk loads again.
+        :param sprite:
+        :param key: (column, row) of the chunk the sprite is in
+        :return:
+        """
+        physics_object = self.world.physics_engine.get_physics_object(sprite)
+        self.parked[key].append((self.active.pop(sprite), sprite, physics_object))
+        sprite.remove_from_sprite_lists()
+
+    def unload_chunk(self, key):
+        """
+        Remove a chunk's static sprites and platform shapes from the world.
+        :param key: (column, row) of the chunk
+        :return:
+        """
+        loaded = self.loaded.pop(key)
+        self.version += 1
+
+        for sprite, kind, physics_object in loaded['sprites']:
+            self.sprite_keys.pop(sprite, None)
+
+            # Collected sprites have already removed themselves, and baked
+            # platforms were never added anywhere
+            if sprite.sprite_lists or sprite.physics_engines:
+                self.world.remove_sensor_sprite(sprite)
+                sprite.remove_from_sprite_lists()
+
+            self.pool.release(kind, sprite, physics_object)
+
+        self.remove_platform_shapes(loaded['shapes'])
+
+    def collect(self, sprite: arcade.Sprite) -> int:
+        """
+        Record that a collectible was picked up, so it is never rebuilt.
+        :param sprite:
+        :return: Points the collectible is worth
+        """
+        key = self.sprite_keys.pop(sprite)
+        self.collected.add(key)
+        self.remaining[key[0]] -= 1
+
+        return self.level['layers'][key[0]]['points'][key[1]]
+
+    def reset(self):
+        """
+        Take everything streamed in back out of the world, returning the
+        sprites to the pool, and forget which chunks were visited and which
+        collectibles were picked up.
+        :return:
+        """
+        for key in list(self.loaded):
+            self.unload_chunk(key)
+
+        physics_engine = self.world.physics_engine
+
+        for sprite, kind in self.active.items():
+            physics_object = physics_engine.get_physics_object(sprite)
+            sprite.remove_from_sprite_lists()
+            self.pool.release(kind, sprite, physics_object)
+
+        for parked in self.parked.values():
+            for kind, sprite, physics_object in parked:
+                self.pool.release(kind, sprite, physics_object)
+
+        self.active.clear()
+        self.parked.clear()
+        self.origins.clear()
+        self.visited.clear()
+        self.collected.clear()
+        self.view_range = None
+        self.remaining = self.count_collectibles()
+
+
+def _place_body(physics_object, sprite):
+    """
+    Move a pooled sprite's body to the sprite's new position and angle.
+    :param physics_object:
+    :param sprite:
+    :return:
+    """
+    physics_object.body.position = sprite.position
+    physics_object.body.angle = math.radians(sprite.angle)
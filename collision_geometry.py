@@ -0,0 +1,82 @@
+from collections import defaultdict
+
+# Decimal places coordinates are rounded to before they are compared
+PRECISION = 3
+
+
+def rectangle_bounds(points):
+    """
+    Get the bounds of a polygon if it is an axis-aligned rectangle.
+    :param points: Polygon points
+    :return: (left, bottom, right, top), or None for any other shape
+    """
+    if len(points) != 4:
+        return None
+
+    xs = {round(x, PRECISION) for x, _ in points}
+    ys = {round(y, PRECISION) for _, y in points}
+
+    if len(xs) != 2 or len(ys) != 2:
+        return None
+
+    return min(xs), min(ys), max(xs), max(ys)
+
+
+def _merge_runs(rects, axis):
+    """
+    Join rectangles that share both edges across an axis and touch or
+    overlap along it.
+    :param rects: (left, bottom, right, top) tuples
+    :param axis: 0 to join rows left to right, 1 to join columns bottom to
+    top
+    :return: Merged rectangles
+    """
+    groups = defaultdict(list)
+
+    for rect in rects:
+        if axis == 0:
+            groups[(rect[1], rect[3])].append(rect)
+        else:
+            groups[(rect[0], rect[2])].append(rect)
+
+    merged = []
+
+    for group in groups.values():
+        group.sort(key=lambda rect: rect[axis])
+        current = list(group[0])
+
+        for rect in group[1:]:
+            if rect[axis] <= current[axis + 2]:
+                current[axis + 2] = max(current[axis + 2], rect[axis + 2])
+            else:
+                merged.append(tuple(current))
+                current = list(rect)
+
+        merged.append(tuple(current))
+
+    return merged
+
+
+def merge_platform_shapes(polygons):
+    """
+    Reduce platform collision polygons to fewer shapes by greedily joining
+    adjacent axis-aligned rectangles, first into horizontal runs and then
+    into vertical stacks of identical runs. Any other shape is kept as is.
+    :param polygons: World space polygons, e.g. one per platform tile
+    :return: List of polygons
+    """
+    rects = []
+    shapes = []
+
+    for points in polygons:
+        bounds = rectangle_bounds(points)
+
+        if bounds is None:
+            shapes.append(points)
+        else:
+            rects.append(bounds)
+
+    for left, bottom, right, top in _merge_runs(_merge_runs(rects, 0), 1):
+        shapes.append(((left, bottom), (right, bottom), (right, top), (left, top)))
+
+    return shapes
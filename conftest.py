@@ -0,0 +1,14 @@
+import pyglet
+import pytest
+import constants as c
+
+# Tests build sprites and worlds without opening a window
+pyglet.options['headless'] = True
+
+
+@pytest.fixture(autouse=True)
+def level_cache_dir(tmp_path, monkeypatch):
+    """
+    Keep compiled levels written by tests out of the working directory.
+    """
+    monkeypatch.setattr(c, 'LEVEL_CACHE_DIR', str(tmp_path / 'level_cache'))
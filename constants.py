@@ -6,6 +6,12 @@ INSTRUCTIONS = 'Click to start playing'
 GAME_OVER_SCREEN = 'src/game_over_screen.png'
 OUT_OF_BOUNDS = -100
 
+# Loading screen
+LOADING_LABEL = 'Loading...'
+LOADING_BAR_WIDTH = 400
+LOADING_BAR_HEIGHT = 20
+LOADING_UPLOAD_BUDGET_S = 0.008
+
 # Tile Map
 MAP_SRC = ':resources:tiled_maps/pymunk_test_map.json'
 LAYER_PLATFORMS = 'Platforms'
@@ -19,29 +25,59 @@ LAYER_STARS = 'Stars'
 LAYER_GEMS = 'Gems'
 LAYER_ENEMIES = 'Enemies'
 PROP_POINTS = 'Points'
+COLLECTIBLE_LAYERS = (LAYER_COINS, LAYER_GEMS, LAYER_FLAGS, LAYER_STARS)
+
+# Compiled level cache
+LEVEL_CACHE_DIR = '.level_cache'
 
 # Sprite sizing and scaling
 SPRITE_SCALING = 0.5
 SPRITE_IMAGE_SIZE = 128
 SPRITE_SCALED_SIZE = int(SPRITE_IMAGE_SIZE * SPRITE_SCALING)
 
+# Player start position
+PLAYER_START_X = SPRITE_SCALED_SIZE + SPRITE_SCALED_SIZE / 2
+PLAYER_START_Y = SPRITE_SCALED_SIZE + SPRITE_SCALED_SIZE / 2
+
 # Screen sizing and scaling
 SCREEN_GRID_TILES_X = 20
 SCREEN_GRID_TILES_Y = 10
 SCREEN_WIDTH_PX = SCREEN_GRID_TILES_X * SPRITE_SCALED_SIZE
 SCREEN_HEIGHT_PX = SCREEN_GRID_TILES_Y * SPRITE_SCALED_SIZE
 
+# Camera: the player can move around a dead zone in the middle of the screen
+# without the camera following, which eases towards its goal at the follow
+# rate (per second) and snaps once it's within the snap distance
+CAMERA_DEAD_ZONE_WIDTH_PX = 2.5 * SPRITE_SCALED_SIZE
+CAMERA_DEAD_ZONE_HEIGHT_PX = 1.5 * SPRITE_SCALED_SIZE
+CAMERA_FOLLOW_RATE = 10.0
+CAMERA_SNAP_PX = 0.25
+
+# Level streaming: chunks within the margin around the viewport are loaded
+CHUNK_SIZE_TILES = 16
+CHUNK_MARGIN_PX = 4 * SPRITE_SCALED_SIZE
+RESIDENT_LAYERS = (LAYER_MOVING_PLATFORMS,)
+
+# Static layers drawn from textures pre-rendered per chunk, and how many of
+# those textures to keep
+BAKED_LAYERS = (LAYER_PLATFORMS, LAYER_LADDERS)
+CHUNK_TEXTURE_CACHE_SIZE = 24
+
 # Sprite textures
 CHARACTER_SPRITE_PATH = ':resources:images/animated_characters/'
 PLAYER_SPRITE_FOLDER = 'female_adventurer'
 PLAYER_SPRITE_FILE = 'femaleAdventurer'
 ENEMY_SPRITE_FOLDER = 'zombie'
 ENEMY_SPRITE_FILE = 'zombie'
-PLAYER_SPRITE_PATH = f'{CHARACTER_SPRITE_PATH}female_adventurer/femaleAdventurer'
 
 # Sprite animations
 RIGHT_FACING = 0
 LEFT_FACING = 1
+ANIMATION_IDLE = 'idle'
+ANIMATION_WALK = 'walk'
+ANIMATION_JUMP = 'jump'
+ANIMATION_FALL = 'fall'
+ANIMATION_CLIMB = 'climb'
 WALK_TEXTURES_TOTAL = 8
 CLIMB_TEXTURES_TOTAL = 2
 STATIONARY_ZONE = 0.1
@@ -54,29 +90,81 @@ DAMPING_LADDERS = 0.0001
 FRICTION_PLAYER = 1.0
 FRICTION_WALL = 0.7
 FRICTION_DYNAMIC_ITEM = 0.6
+FRICTION_ENEMY = 0.0
 MASS_PLAYER = 2.0
+MASS_ENEMY = 2.0
 MAX_SPEED_X_PLAYER = 450
 MAX_SPEED_Y_PLAYER = 1600
 MOVE_FORCE_GROUND_PLAYER = 8000
 MOVE_FORCE_AIR_PLAYER = 900
 JUMP_IMPULSE_PLAYER = GRAVITY - 300
 
+# Fixed physics timestep
+PHYSICS_STEP_RATE = 60
+PHYSICS_MAX_STEPS_PER_FRAME = 5
+
+# Body sleeping. Bodies moving slower than the idle speed, in px/s, for the
+# sleep time, in seconds, stop being simulated until something touches or
+# pushes them. A sleep time of math.inf turns sleeping off.
+PHYSICS_SLEEP_TIME_S = 0.5
+PHYSICS_IDLE_SPEED = 10.0
+
 # Collision tracking
 COLLISION_PLAYER = 'player'
 COLLISION_WALL = 'wall'
 COLLISION_DYNAMIC_ITEM = 'item'
 COLLISION_ENEMY = 'enemy'
+COLLISION_COLLECTIBLE = 'collectible'
+COLLISION_LADDER = 'ladder'
+
+# Shape filter categories, so physics queries can skip these shapes
+SHAPE_CATEGORY_PLAYER = 0b001
+SHAPE_CATEGORY_ENEMY = 0b010
+SHAPE_CATEGORY_SENSOR = 0b100
 
 # GUI
 GUI_FONT_SIZE = 20
+GUI_FONT_NAME = ('calibri', 'arial')
 GUI_START_Y = 5
 SCORE_START_X = 5
 SCORE_LABEL = 'Score'
-COINS_START_X = SCORE_START_X + 150
-GEMS_START_X = COINS_START_X + 150
-FLAGS_START_X = GEMS_START_X + 150
-STARS_START_X = FLAGS_START_X + 150
+GUI_COUNTER_SPACING = 150
+
+# Profiler
+PROFILER_WINDOW_FRAMES = 600
+PROFILER_TRACE_FRAMES = 36000
+PROFILER_OVERLAY_REFRESH_FRAMES = 30
+PROFILER_FONT_SIZE = 11
+PROFILER_LINE_HEIGHT = 16
+PROFILER_START_X = 5
+PROFILER_NAME_WIDTH = 200
+PROFILER_COLUMN_WIDTH = 60
+PROFILER_TRACE_PATH = 'profiler_trace.csv'
+
+# Tuning file, loaded on top of the defaults above and watched for changes
+TUNING_PATH = 'tuning.toml'
+TUNING_POLL_INTERVAL_S = 0.5
+TUNING_ERROR_LABEL = 'Tuning not reloaded'
+TUNING_ERROR_FONT_SIZE = 12
+
+# Input recording and replay
+INPUT_RECORDING_PATH = 'input_recording.ppir'
+REPLAY_SEED = 1
 
 # Enemy Data
 ENEMY_HEALTH = 50
 ENEMY_POINTS = 10
+
+# Enemy AI
+ENEMY_STATE_PATROL = 'patrol'
+ENEMY_STATE_CHASE = 'chase'
+ENEMY_PATROL_SPEED = 120
+ENEMY_CHASE_SPEED = 220
+ENEMY_CHASE_RANGE_X = 6 * SPRITE_SCALED_SIZE
+ENEMY_CHASE_RANGE_Y = SPRITE_SCALED_SIZE
+ENEMY_PROBE_AHEAD_PX = 4
+ENEMY_LEDGE_PROBE_DEPTH_PX = SPRITE_SCALED_SIZE // 2
+ENEMY_ACTIVE_MARGIN_PX = 2 * SPRITE_SCALED_SIZE
+ENEMY_OFFSCREEN_THINK_INTERVAL = 10
+ENEMY_STATE_CAPACITY = 64
+ENEMY_THINK_BUDGET_S = 0.002
@@ -0,0 +1,257 @@
+import time
+import arcade
+import numpy as np
+import pymunk
+import constants as c
+from typing import Optional
+from enemy_sprite import EnemySprite
+
+
+class EnemyController:
+    """
+    Decides where every enemy in a GameWorld walks: patrolling back and forth
+    between ledges and walls, or chasing the player when it comes close.
+
+    Each tick the enemies due a decision are found in one pass over the
+    Enemies layer. Enemies near the player decide every tick; the rest only
+    every ENEMY_OFFSCREEN_THINK_INTERVAL ticks. Decisions stop once the tick's
+    time budget is used up, and whoever missed out goes first next tick.
+    Enemies have no friction, so they keep walking between decisions.
+    """
+    def __init__(self, world, budget: Optional[float] = c.ENEMY_THINK_BUDGET_S):
+        """
+        :param world: GameWorld the enemies live in
+        :param budget: Seconds of decisions allowed per tick, or None for no
+        limit, e.g. when the simulation has to be repeatable
+        """
+        self.world = world
+        self.enemies: arcade.SpriteList = world.scene[c.LAYER_ENEMIES]
+        self.budget = budget
+        self.tick = 0
+        self.space = world.physics_engine.space
+
+        # Probes only look for solid ground and walls
+        self.query_filter = pymunk.ShapeFilter(
+            mask=pymunk.ShapeFilter.ALL_MASKS() ^ (
+                c.SHAPE_CATEGORY_PLAYER
+                | c.SHAPE_CATEGORY_ENEMY
+                | c.SHAPE_CATEGORY_SENSOR
+            )
+        )
+
+        # Decisions made on the last tick, for profiling
+        self.last_thought = 0
+
+        # How far from the player an enemy can be and still be near
+        self.near_extent = np.array((
+            c.SCREEN_WIDTH_PX / 2 + c.ENEMY_ACTIVE_MARGIN_PX,
+            c.SCREEN_HEIGHT_PX / 2 + c.ENEMY_ACTIVE_MARGIN_PX
+        ))
+
+        # Scratch arrays for update(), with room for this many enemies. They
+        # grow when more enemies are streamed in, rather than being made
+        # again every tick.
+        self.capacity = 0
+        self.allocate(c.ENEMY_STATE_CAPACITY)
+
+    def allocate(self, capacity: int):
+        """
+        Make the scratch arrays with room for a number of enemies.
+        :param capacity:
+        :return:
+        """
+        self.capacity = capacity
+        self.state = np.empty((capacity, 3))
+        self.distance = np.empty((capacity, 2))
+        self.close = np.empty((capacity, 2), dtype=bool)
+        self.near = np.empty(capacity, dtype=bool)
+        self.due = np.empty(capacity, dtype=bool)
+        self.far = np.empty(capacity, dtype=bool)
+        self.order_key = np.empty(capacity)
+        self.player_position = np.empty(2)
+        self.tick_array = np.empty(())
+        self.views_count = None
+
+    def slice_views(self, count: int):
+        """
+        Make the views of the scratch arrays that update() works on, for a
+        number of enemies. Slicing makes a new view object every time, so
+        the views are kept until the number of enemies changes.
+        :param count:
+        :return:
+        """
+        state = self.state[:count]
+        close = self.close[:count]
+        self.views_count = count
+        self.views = (
+            state,
+            state[:, :2],
+            state[:, 2],
+            self.distance[:count],
+            close,
+            close[:, 0],
+            close[:, 1],
+            self.near[:count],
+            self.due[:count],
+            self.order_key[:count],
+            self.far[:count],
+        )
+
+    def update(self):
+        """
+        Let the enemies that are due a decision pick their state and walking
+        direction.
+        :return:
+        """
+        self.tick += 1
+        self.last_thought = 0
+        enemies = self.enemies
+
+        if not enemies:
+            return
+
+        count = len(enemies)
+
+        if count > self.capacity:
+            self.allocate(max(count, 2 * self.capacity))
+
+        if count != self.views_count:
+            self.slice_views(count)
+
+        (
+            state,
+            positions,
+            think_ticks,
+            distance,
+            close,
+            close_x,
+            close_y,
+            near,
+            due,
+            order_key,
+            far,
+        ) = self.views
+
+        # Position and next decision tick of each enemy
+        for index, enemy in enumerate(enemies):
+            state[index] = (
+                enemy.center_x,
+                enemy.center_y,
+                enemy.next_think_tick
+            )
+
+        player = self.world.player_sprite
+        player_position = self.player_position
+        player_position[0] = player.center_x
+        player_position[1] = player.center_y
+
+        np.subtract(positions, player_position, out=distance)
+        np.abs(distance, out=distance)
+        np.less_equal(distance, self.near_extent, out=close)
+        np.logical_and(close_x, close_y, out=near)
+
+        self.tick_array.fill(self.tick)
+        np.less_equal(think_ticks, self.tick_array, out=due)
+        np.logical_or(near, due, out=due)
+        indexes = np.flatnonzero(due)
+
+        if not len(indexes):
+            return
+
+        # Whoever has waited longest goes first, so enemies far away still get
+        # their turn when the budget runs short; near enemies break ties.
+        # Decision ticks are whole numbers, so one key covers both.
+        np.add(think_ticks, think_ticks, out=order_key)
+        np.logical_not(near, out=far)
+        np.add(order_key, far, out=order_key)
+        order = np.argsort(np.take(order_key, indexes), kind='stable')
+        indexes = np.take(indexes, order).tolist()
+
+        clock = time.perf_counter
+        deadline = None if self.budget is None else clock() + self.budget
+
+        for index in indexes:
+            enemy = enemies[index]
+            self.think(enemy, player)
+
+            if near[index]:
+                enemy.next_think_tick = self.tick + 1
+            else:
+                enemy.next_think_tick = (
+                    self.tick + c.ENEMY_OFFSCREEN_THINK_INTERVAL
+                )
+
+            self.last_thought += 1
+
+            if deadline is not None and clock() > deadline:
+                break
+
+    def think(self, enemy: EnemySprite, player: arcade.Sprite):
+        """
+        Pick an enemy's state and walking direction, and set its velocity to
+        match.
+        :param enemy:
+        :param player:
+        :return:
+        """
+        tuning = self.world.tuning
+        dx = player.center_x - enemy.center_x
+
+        if (
+            abs(dx) <= c.ENEMY_CHASE_RANGE_X
+            and abs(player.center_y - enemy.center_y) <= c.ENEMY_CHASE_RANGE_Y
+        ):
+            enemy.state = c.ENEMY_STATE_CHASE
+            direction = 1 if dx > 0 else -1
+            speed = tuning.enemy_chase_speed
+
+            # Wait at the edge rather than follow the player off it
+            if self.is_path_blocked(enemy, direction):
+                direction = 0
+        else:
+            enemy.state = c.ENEMY_STATE_PATROL
+            direction = enemy.patrol_direction
+            speed = tuning.enemy_patrol_speed
+
+            if self.is_path_blocked(enemy, direction):
+                direction = -direction
+                enemy.patrol_direction = direction
+
+        enemy.walk_direction = direction
+        body = self.world.physics_engine.sprites[enemy].body
+        velocity_x = direction * speed
+
+        # Setting the velocity wakes the body, so an enemy standing still
+        # is left alone and can fall asleep
+        if body.velocity.x != velocity_x:
+            body.velocity = (velocity_x, body.velocity.y)
+
+    def is_path_blocked(self, enemy: EnemySprite, direction: int) -> bool:
+        """
+        Check whether an enemy walking in a direction is about to reach a
+        ledge or walk into something solid.
+        :param enemy:
+        :param direction: 1 for right, -1 for left
+        :return:
+        """
+        ahead_x = enemy.center_x + direction * (
+            enemy.width / 2 + c.ENEMY_PROBE_AHEAD_PX
+        )
+        ground = self.space.segment_query_first(
+            (ahead_x, enemy.bottom + 1),
+            (ahead_x, enemy.bottom - c.ENEMY_LEDGE_PROBE_DEPTH_PX),
+            0,
+            self.query_filter
+        )
+
+        if ground is None:
+            return True
+
+        wall = self.space.segment_query_first(
+            enemy.position,
+            (ahead_x, enemy.center_y),
+            0,
+            self.query_filter
+        )
+
+        return wall is not None
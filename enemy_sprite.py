@@ -1,11 +1,56 @@
-import arcade
 import constants as c
 from character_sprite import CharacterSprite
 
 
 class EnemySprite(CharacterSprite):
-    def __init__(self):
+    """
+    Computer controlled character. Its movement is decided by an
+    EnemyController.
+    """
+    __slots__ = (
+        'points',
+        'health',
+        'state',
+        'patrol_direction',
+        'walk_direction',
+        'next_think_tick',
+    )
+
+    def __init__(self, health: int = c.ENEMY_HEALTH):
+        """
+        :param health: Health the enemy spawns with
+        """
         super(EnemySprite, self).__init__(c.ENEMY_SPRITE_FOLDER, c.ENEMY_SPRITE_FILE)
 
-        self.health = c.ENEMY_HEALTH
         self.points = c.ENEMY_POINTS
+        self.reset(health)
+
+    def reset(self, health: int = c.ENEMY_HEALTH):
+        """
+        Put the enemy in the state it spawns in, so a pooled sprite can be
+        reused.
+        :param health: Health the enemy spawns with
+        :return:
+        """
+        self.health = health
+
+        # AI state
+        self.state = c.ENEMY_STATE_PATROL
+        self.patrol_direction = 1
+        self.walk_direction = 0
+        self.next_think_tick = 0
+
+        self.reset_animation()
+
+    def pymunk_moved(self, physics_engine, dx, dy, d_angle):
+        """
+        Handle movement from pymunk engine and set animation textures.
+        :param physics_engine:
+        :param dx:
+        :param dy:
+        :param d_angle:
+        :return:
+        """
+        self.set_sprite_direction(dx)
+        self.odometer_x += dx
+        self.play_animation(self.choose_animation(dx, dy))
@@ -0,0 +1,36 @@
+class FixedTimestep:
+    """
+    Accumulates frame time and hands it out as a whole number of fixed-size
+    physics steps.
+    """
+    def __init__(self, step_rate: int, max_steps: int):
+        self.delta_time = 1 / step_rate
+        self.max_steps = max_steps
+        self.accumulator = 0.0
+
+    def advance(self, frame_time: float) -> int:
+        """
+        Add a frame's elapsed time to the accumulator.
+        :param frame_time: Time since the last frame
+        :return: Number of fixed steps to run this frame
+        """
+        self.accumulator += frame_time
+        steps = int(self.accumulator / self.delta_time)
+
+        if steps > self.max_steps:
+            # Too far behind to catch up; drop the backlog instead of letting
+            # each frame take longer than the last
+            steps = self.max_steps
+            self.accumulator %= self.delta_time
+        else:
+            self.accumulator -= steps * self.delta_time
+
+        return steps
+
+    @property
+    def alpha(self) -> float:
+        """
+        How far the render time is between the last two physics steps.
+        :return: Interpolation factor between 0 and 1
+        """
+        return self.accumulator / self.delta_time
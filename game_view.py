@@ -1,11 +1,29 @@
 import arcade
-import math
 import constants as c
-import utils
+import input_replay
+import texture_cache
+import world_snapshot
 from typing import Optional
-from player_sprite import PlayerSprite
+from camera_controller import CameraController, apply_camera
+from chunk_renderer import ChunkRenderer
+from fixed_timestep import FixedTimestep
+from game_world import GameWorld
+from hud import Hud
+from profiler import FrameProfiler, ProfilerOverlay
+from tuning import TuningWatcher
 from enemy_sprite import EnemySprite
-from pyglet.math import Vec2
+from player_sprite import PlayerSprite
+
+# Collectible layers counted in the HUD, in order after the score
+COLLECTIBLE_COUNTERS = (
+    c.LAYER_COINS,
+    c.LAYER_GEMS,
+    c.LAYER_FLAGS,
+    c.LAYER_STARS,
+)
+
+# Tuning values the HUD is laid out with
+HUD_TUNING = {'score_start_x', 'gui_start_y', 'gui_counter_spacing'}
 
 
 class GameView(arcade.View):
@@ -15,135 +33,74 @@ class GameView(arcade.View):
     def __init__(self):
         super(GameView, self).__init__()
 
-        self.scene: Optional[arcade.Scene] = None
-        self.player_sprite: Optional[arcade.Sprite] = None
-        self.physics_engine: Optional[arcade.PymunkPhysicsEngine] = None
-        self.moving_platforms: Optional[arcade.SpriteList] = None
-        self.ladders: Optional[arcade.SpriteList] = None
-        self.coins: Optional[arcade.SpriteList] = None
-        self.gems: Optional[arcade.SpriteList] = None
-        self.flags: Optional[arcade.SpriteList] = None
-        self.stars: Optional[arcade.SpriteList] = None
+        self.world = GameWorld()
         self.main_camera: Optional[arcade.Camera] = None
         self.gui_camera: Optional[arcade.Camera] = None
+        self.camera_controller: Optional[CameraController] = None
+        self.hud: Optional[Hud] = None
+        self.chunk_renderer: Optional[ChunkRenderer] = None
+
+        # Physics runs in fixed steps; sprites are drawn interpolated between
+        # the last two steps
+        self.timestep = FixedTimestep(
+            c.PHYSICS_STEP_RATE,
+            c.PHYSICS_MAX_STEPS_PER_FRAME
+        )
+        self.previous_positions = {}
+        self.frame_time = 0.0
+
+        # Frame time profiling, toggled in game
+        self.profiler = FrameProfiler()
+        self.profiler_overlay: Optional[ProfilerOverlay] = None
+
+        # Input recording, toggled in game
+        self.recorder: Optional[input_replay.InputRecorder] = None
 
-        # Track key inputs
-        self.left_pressed: bool = False
-        self.right_pressed: bool = False
-        self.up_pressed: bool = False
-        self.down_pressed: bool = False
+        # Tuning file, reloaded whenever it changes
+        self.tuning_watcher = TuningWatcher(c.TUNING_PATH)
+        self.tuning_error = ''
+
+        # World snapshot saved in game, to go back to
+        self.checkpoint: Optional[bytes] = None
+
+        # Shown when the player falls off the map, and kept for next time
+        self.game_over_view: Optional[arcade.View] = None
 
     def on_show_view(self):
         """
         Create the game environment and sprites and display them in their
-        initial state
+        initial state. The view is shown again after every game over, and
+        only sets the level up the first time.
         :return:
         """
-        # Load the tile map and create the starting Scene
-        layer_options = {
-            c.LAYER_PLATFORMS: {
-                'use_spatial_hash': True,
-            },
-            c.LAYER_MOVING_PLATFORMS: {
-                'use_spatial_hash': False,
-            },
-            c.LAYER_LADDERS: {
-                'use_spatial_hash': True,
-            },
-            c.LAYER_COINS: {
-                'use_spatial_hash': True,
-            },
-            c.LAYER_FLAGS: {
-                'use_spatial_hash': True,
-            },
-            c.LAYER_GEMS: {
-                'use_spatial_hash': True,
-            },
-            c.LAYER_STARS: {
-                'use_spatial_hash': True,
-            },
-        }
-        tile_map = arcade.load_tilemap(
-            c.MAP_SRC,
-            c.SPRITE_SCALING,
-            layer_options
-        )
+        if self.world.level is not None:
+            return
 
-        self.scene = arcade.Scene.from_tilemap(tile_map)
+        self.world.setup(tuning=self.tuning_watcher.load())
 
         # Set up the cameras
         self.main_camera = arcade.Camera(self.window.width, self.window.height)
         self.gui_camera = arcade.Camera(self.window.width, self.window.height)
+        self.camera_controller = CameraController(
+            self.main_camera,
+            *self.world.map_size()
+        )
+        self.snap_camera_to_player()
 
-        # Get sprite lists from the tile map
-        self.moving_platforms = tile_map.sprite_lists[c.LAYER_MOVING_PLATFORMS]
-        self.ladders = tile_map.sprite_lists[c.LAYER_LADDERS]
-        self.coins = tile_map.sprite_lists[c.LAYER_COINS]
-        self.gems = tile_map.sprite_lists[c.LAYER_GEMS]
-        self.flags = tile_map.sprite_lists[c.LAYER_FLAGS]
-        self.stars = tile_map.sprite_lists[c.LAYER_STARS]
+        # The GUI camera never moves, so its matrices are worked out once
+        self.gui_camera.update()
 
         # Set the background color
-        if tile_map.background_color:
-            arcade.set_background_color(tile_map.background_color)
+        if self.world.level['background_color']:
+            arcade.set_background_color(self.world.level['background_color'])
         else:
             arcade.set_background_color(arcade.color.COLUMBIA_BLUE)
 
-        # Create the physics engine
-        self.physics_engine = arcade.PymunkPhysicsEngine(
-            damping=c.DAMPING_DEFAULT,
-            gravity=(0, -c.GRAVITY)
-        )
-
-        # Add sprites to the physics engine
-        self.create_player_sprite()
-
-        # Reset score
-        self.player_sprite.score = 0
-
-        self.physics_engine.add_sprite_list(
-            tile_map.sprite_lists[c.LAYER_PLATFORMS],
-            friction=c.FRICTION_WALL,
-            collision_type=c.COLLISION_WALL,
-            body_type=arcade.PymunkPhysicsEngine.STATIC
-        )
-
-        self.physics_engine.add_sprite_list(
-            tile_map.sprite_lists[c.LAYER_DYNAMIC_ITEMS],
-            friction=c.FRICTION_DYNAMIC_ITEM,
-            collision_type=c.COLLISION_DYNAMIC_ITEM
-        )
-
-        self.physics_engine.add_sprite_list(
-            self.moving_platforms,
-            body_type=arcade.PymunkPhysicsEngine.KINEMATIC
-        )
-
-        # Get enemies layer from the tile map
-        enemies_layer = tile_map.object_lists[c.LAYER_ENEMIES]
-
-        for enemy in enemies_layer:
-            # Get the enemy's coordinates from the map
-            cartesian = tile_map.get_cartesian(
-                enemy.shape[0],
-                enemy.shape[1]
-            )
-
-            # Create an enemy sprite
-            enemy_sprite = EnemySprite()
+        self.create_hud()
+        self.chunk_renderer = ChunkRenderer(self.window.ctx, self.world.streamer)
 
-            # Set the enemy sprite's position
-            enemy_sprite.center_x = math.floor(c.SPRITE_SCALING * tile_map.tile_width * cartesian[0])
-            enemy_sprite.center_y = math.floor(c.SPRITE_SCALING * tile_map.tile_height * (cartesian[1] + 0.5))
-
-            self.scene.add_sprite(c.LAYER_ENEMIES, enemy_sprite)
-
-        # Add enemy sprites to the physics engine
-        self.physics_engine.add_sprite_list(
-            self.scene.get_sprite_list(c.LAYER_ENEMIES),
-            friction=c.FRICTION_PLAYER,
-            collision_type=c.COLLISION_ENEMY
-        )
+        # Upload the shared character frames once, up front
+        texture_cache.pack_character_textures(self.window.ctx.default_atlas)
 
     def on_update(self, delta_time: float):
         """
@@ -151,17 +108,32 @@ class GameView(arcade.View):
         :param delta_time:
         :return:
         """
-        self.update_moving_platforms(delta_time)
-        self.update_player_sprite()
+        self.frame_time = delta_time
+        self.update_tuning(delta_time)
+        steps = self.timestep.advance(delta_time)
 
-        # Game over if the player sprite is out of bounds
-        if self.player_sprite.center_y < c.OUT_OF_BOUNDS:
-            game_over = self.GameOverView()
-            self.window.show_view(game_over)
+        previous_positions = self.previous_positions
 
-        self.center_camera_to_player()
+        for _ in range(steps):
+            # Sleeping bodies stay put, so there is nothing to interpolate
+            previous_positions.clear()
+
+            for sprite in self.world.awake_sprites():
+                previous_positions[sprite] = sprite.position
 
-        self.physics_engine.step()
+            if self.recorder is not None:
+                self.recorder.record(input_replay.input_mask(self.world))
+
+            self.world.step(self.timestep.delta_time)
+
+        self.world.update_animations(delta_time)
+
+        # Game over if the player sprite is out of bounds
+        if self.world.is_player_out_of_bounds():
+            if self.game_over_view is None:
+                self.game_over_view = self.GameOverView(self)
+
+            self.window.show_view(self.game_over_view)
 
     def on_key_press(self, symbol: int, modifiers: int):
         """
@@ -171,13 +143,23 @@ class GameView(arcade.View):
         :return:
         """
         if symbol == arcade.key.LEFT or symbol == arcade.key.A:
-            self.left_pressed = True
+            self.world.left_pressed = True
         elif symbol == arcade.key.RIGHT or symbol == arcade.key.D:
-            self.right_pressed = True
+            self.world.right_pressed = True
         elif symbol == arcade.key.UP or symbol == arcade.key.W:
-            self.up_pressed = True
+            self.world.up_pressed = True
         elif symbol == arcade.key.DOWN or symbol == arcade.key.S:
-            self.down_pressed = True
+            self.world.down_pressed = True
+        elif symbol == arcade.key.F3:
+            self.toggle_profiler()
+        elif symbol == arcade.key.F4 and self.profiler.enabled:
+            self.profiler.export(c.PROFILER_TRACE_PATH)
+        elif symbol == arcade.key.F5:
+            self.toggle_recording()
+        elif symbol == arcade.key.F6:
+            self.checkpoint = world_snapshot.take_snapshot(self.world)
+        elif symbol == arcade.key.F7 and self.checkpoint is not None:
+            self.load_checkpoint()
 
     def on_key_release(self, _symbol: int, _modifiers: int):
         """
@@ -187,13 +169,13 @@ class GameView(arcade.View):
         :return:
         """
         if _symbol == arcade.key.LEFT or _symbol == arcade.key.A:
-            self.left_pressed = False
+            self.world.left_pressed = False
         elif _symbol == arcade.key.RIGHT or _symbol == arcade.key.D:
-            self.right_pressed = False
+            self.world.right_pressed = False
         elif _symbol == arcade.key.UP or _symbol == arcade.key.W:
-            self.up_pressed = False
+            self.world.up_pressed = False
         elif _symbol == arcade.key.DOWN or _symbol == arcade.key.S:
-            self.down_pressed = False
+            self.world.down_pressed = False
 
     def on_draw(self):
         """
@@ -201,164 +183,272 @@ class GameView(arcade.View):
         :return:
         """
         self.clear()
-        self.main_camera.use()
-        self.scene.draw()
-        self.gui_camera.use()
-
-        utils.write_gui_text(
-            c.SCORE_LABEL,
-            self.player_sprite.score,
-            c.SCORE_START_X
-        )
-
-        utils.write_gui_text(
-            c.LAYER_COINS,
-            len(self.scene[c.LAYER_COINS]),
-            c.COINS_START_X
+        self.interpolate_sprite_positions(self.timestep.alpha)
+        self.center_camera_to_player()
+        self.chunk_renderer.update()
+        self.camera_controller.use()
+
+        # Static layers come from the chunk textures, drawn under the rest
+        camera = self.camera_controller
+        self.chunk_renderer.draw(
+            camera.left,
+            camera.bottom,
+            camera.width,
+            camera.height
         )
+        self.world.scene.draw()
+        self.restore_sprite_positions()
+        apply_camera(self.gui_camera)
 
-        utils.write_gui_text(
-            c.LAYER_GEMS,
-            len(self.scene[c.LAYER_GEMS]),
-            c.GEMS_START_X
-        )
+        self.update_hud()
+        self.hud.draw()
 
-        utils.write_gui_text(
-            c.LAYER_FLAGS,
-            len(self.scene[c.LAYER_FLAGS]),
-            c.FLAGS_START_X
-        )
+        if self.profiler.enabled:
+            self.profiler.end_frame()
+            self.profiler_overlay.draw()
 
-        utils.write_gui_text(
-            c.LAYER_STARS,
-            len(self.scene[c.LAYER_STARS]),
-            c.STARS_START_X
-        )
+    def restart(self):
+        """
+        Reset the level in place for another go, reusing its sprites, physics
+        bodies and chunk textures rather than building a new game.
+        :return:
+        """
+        self.world.reset()
+        self.previous_positions = {}
+        self.timestep.accumulator = 0.0
+        self.snap_camera_to_player()
 
-    def create_player_sprite(self):
+    def update_tuning(self, delta_time: float):
         """
-        Create the player sprite and add it to the map and physics engine.
+        Switch to the tuning file's new values whenever it changes. A file
+        that fails to load is reported in the HUD and the current values
+        kept until the file is fixed.
+
+        Recordings are replayed with the default values, so changes wait
+        until recording stops.
+        :param delta_time:
         :return:
         """
-        self.player_sprite = PlayerSprite(
-            self.ladders,
-            self.coins,
-            self.gems,
-            self.flags,
-            self.stars
-        )
+        if self.recorder is not None:
+            return
+
+        try:
+            tuning = self.tuning_watcher.poll(delta_time)
+        except (OSError, ValueError) as error:
+            self.set_tuning_error(f'{c.TUNING_ERROR_LABEL}: {error}')
+            return
+
+        if tuning is None:
+            return
+
+        self.set_tuning_error('')
+        changed = tuning.changed(self.world.tuning)
+        self.world.apply_tuning(tuning)
 
-        self.player_sprite.center_x = c.SPRITE_SCALED_SIZE + c.SPRITE_SCALED_SIZE / 2
-        self.player_sprite.center_y = c.SPRITE_SCALED_SIZE + c.SPRITE_SCALED_SIZE / 2
+        if changed & HUD_TUNING:
+            self.create_hud()
 
-        self.scene.add_sprite(c.LAYER_PLAYER, self.player_sprite)
+    def set_tuning_error(self, text: str):
+        """
+        Show why the tuning file failed to load along the top of the screen,
+        or clear the message once it loads again.
+        :param text:
+        :return:
+        """
+        self.tuning_error = text
+        self.hud.set_text(c.TUNING_ERROR_LABEL, text)
 
-        self.physics_engine.add_sprite(
-            self.player_sprite,
-            friction=c.FRICTION_PLAYER,
-            mass=c.MASS_PLAYER,
-            moment=arcade.PymunkPhysicsEngine.MOMENT_INF,
-            collision_type=c.COLLISION_PLAYER,
-            max_horizontal_velocity=c.MAX_SPEED_X_PLAYER,
-            max_vertical_velocity=c.MAX_SPEED_Y_PLAYER
+    def load_checkpoint(self):
+        """
+        Put the world back in the state saved in the checkpoint.
+        :return:
+        """
+        world_snapshot.restore_snapshot(self.world, self.checkpoint)
+        self.previous_positions = {}
+        self.timestep.accumulator = 0.0
+        self.snap_camera_to_player()
+
+    def toggle_profiler(self):
+        """
+        Turn frame time profiling and its overlay on or off.
+        :return:
+        """
+        if self.profiler.enabled:
+            self.profiler.disable()
+            self.profiler_overlay = None
+            return
+
+        world = self.world
+        self.profiler.enable((
+            (world, 'stream_around_player', 'stream_around_player'),
+            (world, 'step', 'world.step'),
+            (world, 'update_moving_platforms', 'update_moving_platforms'),
+            (world, 'update_player_sprite', 'update_player_sprite'),
+            (world.enemy_controller, 'update', 'update_enemies'),
+            (world.physics_engine, 'step', 'physics_engine.step'),
+            (world.physics_engine, 'resync_sprites', 'resync_sprites'),
+            (PlayerSprite, 'pymunk_moved', 'pymunk_moved.player'),
+            (EnemySprite, 'pymunk_moved', 'pymunk_moved.enemy'),
+            (self.chunk_renderer, 'update', 'chunks.bake'),
+            (self.chunk_renderer, 'draw', 'chunks.draw'),
+            (world.scene, 'draw', 'scene.draw'),
+            (self, 'update_hud', 'hud.update'),
+            (self.hud, 'draw', 'hud.draw'),
+        ))
+        self.profiler_overlay = ProfilerOverlay(
+            self.profiler,
+            self.window.height
         )
 
-    def update_player_sprite(self):
+    def on_hide_view(self):
         """
-        Update player sprite movement on the ground and in the air based on
-        user inputs.
+        Finish any input recording when the game ends.
         :return:
         """
-        is_on_ground = self.physics_engine.is_on_ground(self.player_sprite)
-        force = (0, 0)
-        friction = 0
-
-        if self.left_pressed and not self.right_pressed:
-            if is_on_ground or self.player_sprite.is_on_ladder:
-                force = (-c.MOVE_FORCE_GROUND_PLAYER, 0)
-            else:
-                force = (-c.MOVE_FORCE_AIR_PLAYER, 0)
-        elif self.right_pressed and not self.left_pressed:
-            if is_on_ground or self.player_sprite.is_on_ladder:
-                force = (c.MOVE_FORCE_GROUND_PLAYER, 0)
-            else:
-                force = (c.MOVE_FORCE_AIR_PLAYER, 0)
-
-        if self.up_pressed and not self.down_pressed:
-            if is_on_ground and not self.player_sprite.is_on_ladder:
-                impulse = (0, c.JUMP_IMPULSE_PLAYER)
-                self.physics_engine.apply_impulse(self.player_sprite, impulse)
-            elif self.player_sprite.is_on_ladder:
-                friction = c.FRICTION_PLAYER
-                force = (0, c.MOVE_FORCE_GROUND_PLAYER)
-        elif self.down_pressed and not self.up_pressed:
-            if self.player_sprite.is_on_ladder:
-                friction = c.FRICTION_PLAYER
-                force = (0, -c.MOVE_FORCE_GROUND_PLAYER)
-
-        if (
-            not self.up_pressed
-            and not self.down_pressed
-            and not self.right_pressed
-            and not self.left_pressed
-        ):
-            friction = c.FRICTION_PLAYER
-
-        self.physics_engine.set_friction(self.player_sprite, friction)
-        self.physics_engine.apply_force(self.player_sprite, force)
+        if self.recorder is not None:
+            self.toggle_recording()
 
-    def center_camera_to_player(self):
+    def toggle_recording(self):
         """
-        Scroll the viewport to keep up with the player sprite
+        Start recording inputs from a freshly restarted level, or finish the
+        current recording.
         :return:
         """
-        screen_center_x = self.player_sprite.center_x - (
-                self.main_camera.viewport_width / 2
+        if self.recorder is not None:
+            self.recorder.close(self.world)
+            self.recorder = None
+
+            # Go back to the tuning file's values on the next poll
+            self.tuning_watcher.stamp = None
+            return
+
+        # The profiler's hooks belong to the world being replaced
+        if self.profiler.enabled:
+            self.toggle_profiler()
+
+        self.world = input_replay.create_world(c.MAP_SRC, c.REPLAY_SEED)
+        self.previous_positions = {}
+        self.timestep.accumulator = 0.0
+        self.create_hud()
+        self.chunk_renderer = ChunkRenderer(self.window.ctx, self.world.streamer)
+        self.snap_camera_to_player()
+
+        self.recorder = input_replay.InputRecorder(
+            c.INPUT_RECORDING_PATH,
+            c.MAP_SRC,
+            c.REPLAY_SEED
         )
 
-        screen_center_y = self.player_sprite.center_y - (
-                self.main_camera.viewport_height / 2
+    def create_hud(self):
+        """
+        Create the score and collectible counters shown along the bottom of
+        the screen, and the tuning error message along the top.
+        :return:
+        """
+        tuning = self.world.tuning
+        self.hud = Hud()
+        self.hud.add_counter(
+            c.SCORE_LABEL,
+            self.world.player_sprite.score,
+            tuning.score_start_x,
+            tuning.gui_start_y
         )
 
-        if screen_center_x < 0:
-            screen_center_x = 0
+        for index, layer_name in enumerate(COLLECTIBLE_COUNTERS, 1):
+            self.hud.add_counter(
+                layer_name,
+                self.world.remaining_collectibles(layer_name),
+                tuning.score_start_x + index * tuning.gui_counter_spacing,
+                tuning.gui_start_y
+            )
 
-        if screen_center_y < 0:
-            screen_center_y = 0
+        self.hud.add_label(
+            c.TUNING_ERROR_LABEL,
+            self.tuning_error,
+            tuning.score_start_x,
+            c.SCREEN_HEIGHT_PX - c.TUNING_ERROR_FONT_SIZE * 2,
+            arcade.csscolor.ORANGE_RED,
+            c.TUNING_ERROR_FONT_SIZE
+        )
 
-        player_center = Vec2(screen_center_x, screen_center_y)
+    def update_hud(self):
+        """
+        Update the GUI counters with the current score and the number of each
+        collectible left.
+        :return:
+        """
+        self.hud.set_counter(c.SCORE_LABEL, self.world.player_sprite.score)
 
-        self.main_camera.move_to(player_center)
+        for layer_name in COLLECTIBLE_COUNTERS:
+            self.hud.set_counter(
+                layer_name,
+                self.world.remaining_collectibles(layer_name)
+            )
 
-    def update_moving_platforms(self, delta_time: float):
+    def center_camera_to_player(self):
         """
-        Update the velocity for any moving platforms in the map.
-        :param delta_time:
+        Scroll the viewport to keep up with the player sprite
         :return:
         """
-        for platform in self.moving_platforms:
-            velocity_x = 0
-            velocity_y = 0
-
-            if platform.change_x:
-                utils.check_boundary_x(platform)
-                velocity_x = platform.change_x / delta_time
+        self.camera_controller.update(
+            self.world.player_sprite.center_x,
+            self.world.player_sprite.center_y,
+            self.frame_time
+        )
 
-            if platform.change_y:
-                utils.check_boundary_y(platform)
-                velocity_y = platform.change_y / delta_time
+    def snap_camera_to_player(self):
+        """
+        Move the viewport straight to the player sprite, e.g. when the level
+        starts.
+        :return:
+        """
+        self.camera_controller.snap(
+            self.world.player_sprite.center_x,
+            self.world.player_sprite.center_y
+        )
 
-            platform_velocity = (velocity_x, velocity_y)
+    def interpolate_sprite_positions(self, alpha: float):
+        """
+        Move physics sprites between their positions after the previous and
+        latest physics steps, so motion looks smooth at any frame rate.
+        :param alpha: Fraction of a step the render time is past the latest
+        step
+        :return:
+        """
+        for sprite, previous in self.previous_positions.items():
+            current = sprite.position
+            sprite.position = (
+                previous[0] + (current[0] - previous[0]) * alpha,
+                previous[1] + (current[1] - previous[1]) * alpha
+            )
 
-            self.physics_engine.set_velocity(platform, platform_velocity)
+    def restore_sprite_positions(self):
+        """
+        Put interpolated sprites back at their physics body positions.
+        :return:
+        """
+        for sprite in self.previous_positions:
+            if sprite in self.world.physics_engine.sprites:
+                body = self.world.physics_engine.get_physics_object(sprite).body
+                sprite.position = body.position
 
     class GameOverView(arcade.View):
         """
         Game over screen. User may click anywhere on the screen to restart.
         """
-        def __init__(self):
+        def __init__(self, game_view):
+            """
+            :param game_view: Game to restart
+            """
             super(GameView.GameOverView, self).__init__()
+            self.game_view = game_view
             self.texture = arcade.load_texture(c.GAME_OVER_SCREEN)
+
+        def on_show_view(self):
+            """
+            Draw the screen without the game camera's scrolling.
+            :return:
+            """
             arcade.set_viewport(
                 left=0,
                 right=c.SCREEN_WIDTH_PX - 1,
@@ -388,5 +478,5 @@ class GameView(arcade.View):
             :param modifiers:
             :return:
             """
-            game_view = GameView()
-            self.window.show_view(game_view)
+            self.game_view.restart()
+            self.window.show_view(self.game_view)
@@ -0,0 +1,699 @@
+import arcade
+import pymunk
+import constants as c
+import level_cache
+import utils
+from typing import Optional
+from player_sprite import PlayerSprite
+from chunk_streamer import ChunkStreamer
+from enemy_controller import EnemyController
+from moving_platforms import MovingPlatforms
+from sprite_pool import SpritePool
+from tuning import Tuning
+
+
+LAYER_OPTIONS = {
+    c.LAYER_PLATFORMS: {
+        'use_spatial_hash': True,
+    },
+    c.LAYER_MOVING_PLATFORMS: {
+        'use_spatial_hash': False,
+    },
+    c.LAYER_LADDERS: {
+        'use_spatial_hash': True,
+    },
+    c.LAYER_COINS: {
+        'use_spatial_hash': True,
+    },
+    c.LAYER_FLAGS: {
+        'use_spatial_hash': True,
+    },
+    c.LAYER_GEMS: {
+        'use_spatial_hash': True,
+    },
+    c.LAYER_STARS: {
+        'use_spatial_hash': True,
+    },
+}
+
+
+class PlayerForces:
+    """
+    The forces and impulse the player's inputs apply, made once for a
+    tuning rather than every step.
+    """
+    __slots__ = (
+        'none',
+        'ground_left',
+        'ground_right',
+        'air_left',
+        'air_right',
+        'climb_up',
+        'climb_down',
+        'jump',
+    )
+
+    def __init__(self, tuning: Tuning):
+        ground = tuning.move_force_ground_player
+        air = tuning.move_force_air_player
+
+        self.none = (0, 0)
+        self.ground_left = (-ground, 0)
+        self.ground_right = (ground, 0)
+        self.air_left = (-air, 0)
+        self.air_right = (air, 0)
+        self.climb_up = (0, ground)
+        self.climb_down = (0, -ground)
+        self.jump = (0, tuning.jump_impulse_player)
+
+
+class GameWorld:
+    """
+    The game map, its sprites and the physics world they live in. Holds no
+    window state, so it can be stepped by GameView or run headless.
+    """
+    def __init__(self):
+        self.map_src: Optional[str] = None
+        self.level: Optional[dict] = None
+        self.scene: Optional[arcade.Scene] = None
+        self.player_sprite: Optional[PlayerSprite] = None
+        self.physics_engine: Optional[arcade.PymunkPhysicsEngine] = None
+        self.moving_platforms: Optional[arcade.SpriteList] = None
+        self.moving_platform_state: Optional[MovingPlatforms] = None
+        self.streamer: Optional[ChunkStreamer] = None
+        self.enemy_controller: Optional[EnemyController] = None
+        self.sprite_pool: Optional[SpritePool] = None
+        self.animated_layers = []
+        self.tuning = Tuning()
+        self.player_forces = PlayerForces(self.tuning)
+
+        # Sprites behind sensor shapes, looked up when a sensor is touched
+        self.sensor_sprites = {}
+
+        # Track key inputs
+        self.left_pressed: bool = False
+        self.right_pressed: bool = False
+        self.up_pressed: bool = False
+        self.down_pressed: bool = False
+
+    def setup(self, map_src: str = c.MAP_SRC, tuning: Optional[Tuning] = None):
+        """
+        Load the compiled level, create the sprites and add them to a new physics
+        engine.
+        :param map_src: Tiled map to load
+        :param tuning: Tuning values to use instead of the defaults
+        :return:
+        """
+        if tuning is not None:
+            self.tuning = tuning
+            self.player_forces = PlayerForces(tuning)
+
+        # Load the compiled level and create the starting Scene. Only the
+        # resident layers are filled now; the rest is streamed in by chunk.
+        self.map_src = map_src
+        self.level = level_cache.load_level(map_src)
+        self.scene = level_cache.build_scene(
+            self.level,
+            LAYER_OPTIONS,
+            c.RESIDENT_LAYERS
+        )
+        self.moving_platforms = self.scene[c.LAYER_MOVING_PLATFORMS]
+
+        # Baked layers are drawn from their chunk textures, so their tiles
+        # stay on the first frame of any animation
+        self.animated_layers = [
+            name for name, layer in self.level['layers'].items()
+            if layer['animated'] and name not in c.BAKED_LAYERS
+        ]
+
+        # Enemies come from an object layer, so their sprite list is created
+        # here rather than by the level
+        if c.LAYER_ENEMIES not in self.scene.name_mapping:
+            self.scene.add_sprite_list(c.LAYER_ENEMIES)
+
+        # Create the physics engine
+        self.physics_engine = arcade.PymunkPhysicsEngine(
+            damping=self.tuning.damping_default,
+            gravity=(0, -self.tuning.gravity)
+        )
+        self.configure_sleeping()
+
+        # Add sprites to the physics engine
+        self.create_player_sprite()
+
+        # Reset score
+        self.player_sprite.score = 0
+
+        self.physics_engine.add_sprite_list(
+            self.moving_platforms,
+            body_type=arcade.PymunkPhysicsEngine.KINEMATIC
+        )
+        self.moving_platform_state = MovingPlatforms(
+            self.physics_engine,
+            self.moving_platforms
+        )
+
+        # Collectibles are sensors that report when the player touches them
+        self.physics_engine.space.add_collision_handler(
+            utils.get_collision_type_id(
+                self.physics_engine,
+                c.COLLISION_PLAYER
+            ),
+            utils.get_collision_type_id(
+                self.physics_engine,
+                c.COLLISION_COLLECTIBLE
+            )
+        ).begin = self.on_collectible_touched
+
+        # Ladders are sensors that count how many the player is overlapping
+        ladder_handler = self.physics_engine.space.add_collision_handler(
+            utils.get_collision_type_id(
+                self.physics_engine,
+                c.COLLISION_PLAYER
+            ),
+            utils.get_collision_type_id(
+                self.physics_engine,
+                c.COLLISION_LADDER
+            )
+        )
+        ladder_handler.begin = self.on_ladder_touched
+        ladder_handler.separate = self.on_ladder_released
+
+        # Load the chunks around the player's starting point. Sprites the
+        # streamer takes out of the world are pooled for reuse, with their
+        # bodies, so they belong to this physics engine.
+        self.sprite_pool = SpritePool()
+        self.streamer = ChunkStreamer(self)
+        self.enemy_controller = EnemyController(self)
+        self.stream_around_player()
+
+    def reset(self):
+        """
+        Put the level back to its starting state without building it again.
+        The player and moving platforms go back to where they started, and
+        every streamed sprite goes back to the pool, to be reused as the
+        chunks around the start load again.
+        :return:
+        """
+        self.streamer.reset()
+        self.moving_platform_state.reset()
+        self.reset_player_sprite()
+        self.enemy_controller.tick = 0
+
+        self.left_pressed = False
+        self.right_pressed = False
+        self.up_pressed = False
+        self.down_pressed = False
+
+        self.stream_around_player()
+
+    def apply_tuning(self, tuning: Tuning):
+        """
+        Switch the running world to new tuning values, e.g. when the tuning
+        file changes, without setting the level up again. Values read every
+        step take effect on the next one; frictions are updated on every
+        shape the world has built, in the physics space or not.
+        :param tuning:
+        :return:
+        """
+        self.tuning = tuning
+        self.player_forces = PlayerForces(tuning)
+        physics_engine = self.physics_engine
+        space = physics_engine.space
+        space.gravity = (0, -tuning.gravity)
+        space.damping = tuning.damping_default
+
+        player = self.player_sprite
+        player.ladder_damping = tuning.damping_ladders
+
+        if player.is_on_ladder:
+            player.pymunk.damping = tuning.damping_ladders
+
+        # Collision type number -> friction, for the types in use
+        collision_types = physics_engine.collision_types
+        frictions = {
+            collision_types.index(name): friction
+            for name, friction in (
+                (c.COLLISION_WALL, tuning.friction_wall),
+                (c.COLLISION_DYNAMIC_ITEM, tuning.friction_dynamic_item),
+                (c.COLLISION_ENEMY, tuning.friction_enemy),
+            )
+            if name in collision_types
+        }
+
+        shapes = list(space.shapes)
+
+        shapes.extend(self.streamer.platform_shapes.values())
+
+        for free in self.sprite_pool.free.values():
+            shapes.extend(
+                physics_object.shape
+                for _, physics_object in free
+                if physics_object is not None
+            )
+
+        for parked in self.streamer.parked.values():
+            shapes.extend(physics_object.shape for _, _, physics_object in parked)
+
+        for shape in shapes:
+            friction = frictions.get(shape.collision_type)
+
+            if friction is not None:
+                shape.friction = friction
+
+    def configure_sleeping(
+            self,
+            sleep_time: float = c.PHYSICS_SLEEP_TIME_S,
+            idle_speed: float = c.PHYSICS_IDLE_SPEED
+    ):
+        """
+        Let dynamic bodies that have come to rest, e.g. crates and enemies
+        waiting at a ledge, fall asleep. A sleeping body costs nothing to
+        step. Pymunk wakes it as soon as an awake body touches it, e.g. the
+        player, or a moving platform pushes it, and bodies touching each
+        other only fall asleep together.
+        :param sleep_time: Seconds a body has to be idle for before it falls
+        asleep, or math.inf to never sleep
+        :param idle_speed: Speed in px/s below which a body counts as idle
+        :return:
+        """
+        space = self.physics_engine.space
+        space.sleep_time_threshold = sleep_time
+        space.idle_speed_threshold = idle_speed
+
+    def count_bodies(self):
+        """
+        Count the dynamic bodies in the physics engine that are awake and
+        asleep.
+        :return: (active, sleeping)
+        """
+        physics_engine = self.physics_engine
+        active = 0
+        sleeping = 0
+
+        for sprite in physics_engine.non_static_sprite_list:
+            body = physics_engine.sprites[sprite].body
+
+            if body.body_type != pymunk.Body.DYNAMIC:
+                continue
+
+            if body.is_sleeping:
+                sleeping += 1
+            else:
+                active += 1
+
+        return active, sleeping
+
+    def awake_sprites(self):
+        """
+        Get the sprites whose bodies the next physics step can move, i.e.
+        every non-static sprite that isn't asleep.
+        :return: List of sprites
+        """
+        physics_engine = self.physics_engine
+        sprites = physics_engine.sprites
+
+        return [
+            sprite for sprite in physics_engine.non_static_sprite_list
+            if not sprites[sprite].body.is_sleeping
+        ]
+
+    def step(self, delta_time: float):
+        """
+        Advance the simulation by one fixed physics step.
+        :param delta_time: Length of the step
+        :return:
+        """
+        self.stream_around_player()
+        self.update_moving_platforms(delta_time)
+        self.update_player_sprite()
+        self.enemy_controller.update()
+        self.physics_engine.step(delta_time, resync_sprites=False)
+        self.physics_engine.resync_sprites()
+
+    def update_animations(self, delta_time: float):
+        """
+        Advance the animated tiles, e.g. spinning coins. This only changes
+        what is drawn, so it runs every frame rather than every step.
+        :param delta_time: Time since the last frame
+        :return:
+        """
+        for name in self.animated_layers:
+            self.scene[name].update_animation(delta_time)
+
+    def stream_around_player(
+            self,
+            width: float = c.SCREEN_WIDTH_PX,
+            height: float = c.SCREEN_HEIGHT_PX
+    ):
+        """
+        Load and unload level chunks to follow a viewport centered on the
+        player and kept inside the map's bottom left, like the camera. This
+        runs every step rather than every frame, so the chunks loaded never
+        depend on the frame rate.
+        :param width: Viewport width
+        :param height: Viewport height
+        :return:
+        """
+        self.streamer.update(
+            max(self.player_sprite.center_x - width / 2, 0),
+            max(self.player_sprite.center_y - height / 2, 0),
+            width,
+            height
+        )
+
+    def map_size(self):
+        """
+        Size of the map.
+        :return: (width, height) in pixels
+        """
+        level = self.level
+
+        return (
+            level['width'] * level['tile_width'] * c.SPRITE_SCALING,
+            level['height'] * level['tile_height'] * c.SPRITE_SCALING
+        )
+
+    def remaining_collectibles(self, layer_name: str) -> int:
+        """
+        Number of collectibles of one kind left in the whole level, loaded
+        or not.
+        :param layer_name: Collectible layer, e.g. LAYER_COINS
+        :return:
+        """
+        return self.streamer.remaining[layer_name]
+
+    def has_completion_goal(self) -> bool:
+        """
+        Check whether the level can be completed, i.e. has any collectibles
+        to pick up.
+        :return:
+        """
+        return self.streamer.total_collectibles > 0
+
+    def is_level_complete(self) -> bool:
+        """
+        Check whether every collectible in the level has been picked up. A
+        level without collectibles is never complete.
+        :return:
+        """
+        return (
+            self.has_completion_goal()
+            and not any(self.streamer.remaining.values())
+        )
+
+    def is_player_out_of_bounds(self) -> bool:
+        """
+        Check whether the player sprite has fallen off the map.
+        :return:
+        """
+        return self.player_sprite.center_y < c.OUT_OF_BOUNDS
+
+    def create_player_sprite(self):
+        """
+        Create the player sprite and add it to the map and physics engine.
+        :return:
+        """
+        self.player_sprite = PlayerSprite()
+
+        self.player_sprite.center_x = c.PLAYER_START_X
+        self.player_sprite.center_y = c.PLAYER_START_Y
+
+        self.player_sprite.ladder_damping = self.tuning.damping_ladders
+
+        self.scene.add_sprite(c.LAYER_PLAYER, self.player_sprite)
+
+        self.physics_engine.add_sprite(
+            self.player_sprite,
+            friction=self.tuning.friction_player,
+            mass=c.MASS_PLAYER,
+            moment=arcade.PymunkPhysicsEngine.MOMENT_INF,
+            collision_type=c.COLLISION_PLAYER,
+            max_horizontal_velocity=c.MAX_SPEED_X_PLAYER,
+            max_vertical_velocity=c.MAX_SPEED_Y_PLAYER
+        )
+        self.set_shape_category(self.player_sprite, c.SHAPE_CATEGORY_PLAYER)
+
+    def reset_player_sprite(self):
+        """
+        Put the player back at the start, at rest, with no score.
+        :return:
+        """
+        player = self.player_sprite
+        player.position = c.PLAYER_START_X, c.PLAYER_START_Y
+        player.score = 0
+        player.is_on_ground = False
+        player.ladder_contacts = 0
+
+        if player.is_on_ladder:
+            player.on_ladder_exit()
+
+        player.reset_animation()
+
+        body = self.physics_engine.get_physics_object(player).body
+        body.position = player.position
+        body.velocity = (0, 0)
+        body.force = (0, 0)
+
+    def restore_physics_object(
+            self,
+            sprite: arcade.Sprite,
+            physics_object: arcade.PymunkPhysicsObject
+    ):
+        """
+        Put a sprite back into the physics engine with the body and shape it
+        had before it was removed, instead of creating new ones.
+        :param sprite:
+        :param physics_object: The sprite's body and shape
+        :return:
+        """
+        physics_engine = self.physics_engine
+        physics_engine.sprites[sprite] = physics_object
+
+        if physics_object.body.body_type != pymunk.Body.STATIC:
+            physics_engine.non_static_sprite_list.append(sprite)
+
+        physics_engine.space.add(physics_object.body, physics_object.shape)
+        sprite.register_physics_engine(physics_engine)
+
+    def add_enemy_sprite(
+            self,
+            enemy_sprite: arcade.Sprite,
+            physics_object: Optional[arcade.PymunkPhysicsObject] = None
+    ):
+        """
+        Add an enemy sprite to the map and physics engine.
+        :param enemy_sprite:
+        :param physics_object: Body and shape to reuse, if the sprite has
+        been in the physics engine before
+        :return:
+        """
+        self.scene.add_sprite(c.LAYER_ENEMIES, enemy_sprite)
+
+        if physics_object is not None:
+            self.restore_physics_object(enemy_sprite, physics_object)
+            return
+
+        self.physics_engine.add_sprite(
+            enemy_sprite,
+            friction=self.tuning.friction_enemy,
+            mass=c.MASS_ENEMY,
+            moment=arcade.PymunkPhysicsEngine.MOMENT_INF,
+            collision_type=c.COLLISION_ENEMY
+        )
+        self.set_shape_category(enemy_sprite, c.SHAPE_CATEGORY_ENEMY)
+
+    def add_dynamic_item(
+            self,
+            item: arcade.Sprite,
+            physics_object: Optional[arcade.PymunkPhysicsObject] = None
+    ):
+        """
+        Add a dynamic item, e.g. a crate the player can push, to the map and
+        physics engine.
+        :param item:
+        :param physics_object: Body and shape to reuse, if the sprite has
+        been in the physics engine before
+        :return:
+        """
+        self.scene.add_sprite(c.LAYER_DYNAMIC_ITEMS, item)
+
+        if physics_object is not None:
+            self.restore_physics_object(item, physics_object)
+            return
+
+        self.physics_engine.add_sprite(
+            item,
+            friction=self.tuning.friction_dynamic_item,
+            collision_type=c.COLLISION_DYNAMIC_ITEM
+        )
+
+    def create_platform_shapes(self, platform_shapes):
+        """
+        Create static shapes for platform collision geometry, ready to be
+        added to the physics space.
+        :param platform_shapes: World space polygons, one per shape
+        :return: The new pymunk shapes
+        """
+        space = self.physics_engine.space
+        collision_type = utils.get_collision_type_id(
+            self.physics_engine,
+            c.COLLISION_WALL
+        )
+        shapes = []
+
+        for points in platform_shapes:
+            shape = pymunk.Poly(space.static_body, points)
+            shape.friction = self.tuning.friction_wall
+            shape.collision_type = collision_type
+            shapes.append(shape)
+
+        return shapes
+
+    def add_sensor_sprite(
+            self,
+            sprite: arcade.Sprite,
+            collision_type: str,
+            physics_object: Optional[arcade.PymunkPhysicsObject] = None
+    ):
+        """
+        Add a sprite to the physics engine as a static sensor shape, which
+        detects contacts without pushing anything.
+        :param sprite:
+        :param collision_type:
+        :param physics_object: Sensor body and shape to reuse, if the sprite
+        has been in the physics engine before
+        :return:
+        """
+        if physics_object is not None:
+            self.restore_physics_object(sprite, physics_object)
+            self.sensor_sprites[physics_object.shape] = sprite
+            return
+
+        self.physics_engine.add_sprite(
+            sprite,
+            body_type=arcade.PymunkPhysicsEngine.STATIC,
+            collision_type=collision_type
+        )
+
+        shape = self.physics_engine.get_physics_object(sprite).shape
+        shape.sensor = True
+        shape.filter = pymunk.ShapeFilter(categories=c.SHAPE_CATEGORY_SENSOR)
+        self.sensor_sprites[shape] = sprite
+
+    def set_shape_category(self, sprite: arcade.Sprite, category: int):
+        """
+        Put a sprite's shape in a shape filter category. It still collides
+        with everything, but queries can leave the category out.
+        :param sprite:
+        :param category: One of the SHAPE_CATEGORY_* bits
+        :return:
+        """
+        shape = self.physics_engine.get_physics_object(sprite).shape
+        shape.filter = pymunk.ShapeFilter(categories=category)
+
+    def remove_sensor_sprite(self, sprite: arcade.Sprite):
+        """
+        Stop tracking a sensor sprite's shape, before it's removed.
+        :param sprite:
+        :return:
+        """
+        if sprite in self.physics_engine.sprites:
+            shape = self.physics_engine.get_physics_object(sprite).shape
+            self.sensor_sprites.pop(shape, None)
+
+    def on_collectible_touched(self, arbiter, _space, _data):
+        """
+        Pick up a collectible as soon as the player touches it.
+        :param arbiter: Contact between the player and the collectible
+        :param _space:
+        :param _data:
+        :return: False, sensors don't need any collision response
+        """
+        collectible = self.sensor_sprites.pop(arbiter.shapes[1], None)
+
+        if collectible is not None:
+            points = self.streamer.collect(collectible)
+            self.player_sprite.collect(collectible, points)
+
+        return False
+
+    def on_ladder_touched(self, _arbiter, _space, _data):
+        """
+        Track the player starting to overlap a ladder.
+        :param _arbiter:
+        :param _space:
+        :param _data:
+        :return: False, sensors don't need any collision response
+        """
+        self.player_sprite.touch_ladder()
+        return False
+
+    def on_ladder_released(self, _arbiter, _space, _data):
+        """
+        Track the player no longer overlapping a ladder.
+        :param _arbiter:
+        :param _space:
+        :param _data:
+        :return:
+        """
+        self.player_sprite.release_ladder()
+
+    def update_player_sprite(self):
+        """
+        Update player sprite movement on the ground and in the air based on
+        user inputs.
+        :return:
+        """
+        tuning = self.tuning
+        forces = self.player_forces
+
+        # The player sprite checks this after every physics step, and
+        # contacts only change during a step
+        is_on_ground = self.player_sprite.is_on_ground
+        force = forces.none
+        friction = 0
+
+        if self.left_pressed and not self.right_pressed:
+            if is_on_ground or self.player_sprite.is_on_ladder:
+                force = forces.ground_left
+            else:
+                force = forces.air_left
+        elif self.right_pressed and not self.left_pressed:
+            if is_on_ground or self.player_sprite.is_on_ladder:
+                force = forces.ground_right
+            else:
+                force = forces.air_right
+
+        if self.up_pressed and not self.down_pressed:
+            if is_on_ground and not self.player_sprite.is_on_ladder:
+                self.physics_engine.apply_impulse(
+                    self.player_sprite,
+                    forces.jump
+                )
+            elif self.player_sprite.is_on_ladder:
+                friction = tuning.friction_player
+                force = forces.climb_up
+        elif self.down_pressed and not self.up_pressed:
+            if self.player_sprite.is_on_ladder:
+                friction = tuning.friction_player
+                force = forces.climb_down
+
+        if (
+            not self.up_pressed
+            and not self.down_pressed
+            and not self.right_pressed
+            and not self.left_pressed
+        ):
+            friction = tuning.friction_player
+
+        self.physics_engine.set_friction(self.player_sprite, friction)
+        self.physics_engine.apply_force(self.player_sprite, force)
+
+    def update_moving_platforms(self, delta_time: float):
+        """
+        Update the velocity for any moving platforms in the map.
+        :param delta_time:
+        :return:
+        """
+        self.moving_platform_state.update(delta_time)
@@ -0,0 +1,98 @@
+import arcade
+import pyglet
+import constants as c
+from arcade.drawing_support import get_four_byte_color
+
+
+class Hud:
+    """
+    Persistent text labels drawn together in a single batch. A label is only
+    laid out again when its text actually changes.
+    """
+    def __init__(self):
+        self.batch = pyglet.graphics.Batch()
+        self.labels = {}
+        self.counters = {}
+
+    def add_label(
+            self,
+            name: str,
+            text: str,
+            start_x: float,
+            start_y: float,
+            color: arcade.Color = arcade.csscolor.WHITE,
+            font_size: float = c.GUI_FONT_SIZE,
+            anchor_x: str = 'left'
+    ):
+        """
+        Add a label to the batch.
+        :param name: Key used to update the label later
+        :param text:
+        :param start_x:
+        :param start_y:
+        :param color:
+        :param font_size:
+        :param anchor_x:
+        :return:
+        """
+        self.labels[name] = pyglet.text.Label(
+            text,
+            x=start_x,
+            y=start_y,
+            font_name=c.GUI_FONT_NAME,
+            font_size=font_size,
+            anchor_x=anchor_x,
+            color=get_four_byte_color(color),
+            batch=self.batch
+        )
+
+    def add_counter(
+            self,
+            label: str,
+            value: int,
+            start_x: float,
+            start_y: float = c.GUI_START_Y
+    ):
+        """
+        Add a '<label>: <value>' label along the bottom of the screen.
+        :param label:
+        :param value:
+        :param start_x:
+        :param start_y:
+        :return:
+        """
+        self.counters[label] = value
+        self.add_label(label, f'{label}: {value}', start_x, start_y)
+
+    def set_text(self, name: str, text: str):
+        """
+        Update a label's text, re-laying it out only if it changed.
+        :param name:
+        :param text:
+        :return:
+        """
+        label = self.labels[name]
+
+        if label.text != text:
+            label.text = text
+
+    def set_counter(self, label: str, value: int):
+        """
+        Update a counter's value, re-laying out its text only if it changed.
+        :param label:
+        :param value:
+        :return:
+        """
+        if self.counters[label] == value:
+            return
+
+        self.counters[label] = value
+        self.labels[label].text = f'{label}: {value}'
+
+    def draw(self):
+        """
+        Draw every label in one batch.
+        :return:
+        """
+        with arcade.get_window().ctx.pyglet_rendering():
+            self.batch.draw()
@@ -0,0 +1,304 @@
+import argparse
+import hashlib
+import json
+import random
+import struct
+import sys
+import time
+import arcade
+import numpy as np
+import constants as c
+import level_cache
+from game_world import GameWorld
+
+# Recording layout, little endian:
+#   header: magic, format version, step rate, seed, map name length,
+#           map name (UTF-8), SHA-256 of the map
+#   body:   runs of (input mask, tick count)
+#   end:    a run with a count of 0, then the SHA-256 of the world state
+#           after the last tick
+MAGIC = b'PPIR'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('<4sBHIH')
+RUN = struct.Struct('<BH')
+MAX_RUN_TICKS = 0xFFFF
+
+# Input mask bits
+INPUT_LEFT = 0b0001
+INPUT_RIGHT = 0b0010
+INPUT_UP = 0b0100
+INPUT_DOWN = 0b1000
+
+
+def input_mask(world: GameWorld) -> int:
+    """
+    Pack a world's input flags into a bitmask.
+    :param world:
+    :return:
+    """
+    return (
+        (INPUT_LEFT if world.left_pressed else 0)
+        | (INPUT_RIGHT if world.right_pressed else 0)
+        | (INPUT_UP if world.up_pressed else 0)
+        | (INPUT_DOWN if world.down_pressed else 0)
+    )
+
+
+def apply_input_mask(world: GameWorld, mask: int):
+    """
+    Set a world's input flags from a bitmask.
+    :param world:
+    :param mask:
+    :return:
+    """
+    world.left_pressed = bool(mask & INPUT_LEFT)
+    world.right_pressed = bool(mask & INPUT_RIGHT)
+    world.up_pressed = bool(mask & INPUT_UP)
+    world.down_pressed = bool(mask & INPUT_DOWN)
+
+
+def seed_simulation(seed: int):
+    """
+    Seed every random number generator the simulation could use.
+    :param seed:
+    :return:
+    """
+    random.seed(seed)
+    np.random.seed(seed)
+
+
+def create_world(map_src: str, seed: int) -> GameWorld:
+    """
+    Set up a world whose simulation only depends on its inputs: seeded, and
+    with no time budget on enemy decisions.
+    :param map_src: Tiled map to load
+    :param seed:
+    :return:
+    """
+    seed_simulation(seed)
+    world = GameWorld()
+    world.setup(map_src)
+    world.enemy_controller.budget = None
+
+    return world
+
+
+def state_digest(world: GameWorld) -> bytes:
+    """
+    Hash the exact physics state of every moving body, and the score, to
+    compare two runs bit for bit.
+    :param world:
+    :return: SHA-256 digest
+    """
+    digest = hashlib.sha256()
+    physics_engine = world.physics_engine
+
+    for sprite in physics_engine.non_static_sprite_list:
+        body = physics_engine.sprites[sprite].body
+        digest.update(struct.pack(
+            '<5d',
+            *body.position,
+            *body.velocity,
+            body.angle
+        ))
+
+    digest.update(struct.pack('<q', world.player_sprite.score))
+
+    return digest.digest()
+
+
+def _map_digest(map_src: str) -> bytes:
+    """
+    Hash of a map's contents, as used by the level cache.
+    :param map_src:
+    :return:
+    """
+    map_path = str(arcade.resources.resolve_resource_path(map_src))
+
+    return bytes.fromhex(level_cache.map_digest(map_path))
+
+
+class InputRecorder:
+    """
+    Writes the input mask of every physics tick to a file, run-length
+    encoded, so the session can be replayed exactly.
+    """
+    def __init__(
+            self,
+            path: str,
+            map_src: str,
+            seed: int,
+            step_rate: int = c.PHYSICS_STEP_RATE
+    ):
+        map_name = map_src.encode()
+
+        self.file = open(path, 'wb')
+        self.file.write(HEADER.pack(
+            MAGIC,
+            FORMAT_VERSION,
+            step_rate,
+            seed,
+            len(map_name)
+        ))
+        self.file.write(map_name)
+        self.file.write(_map_digest(map_src))
+
+        self.mask = None
+        self.count = 0
+        self.ticks = 0
+
+    def record(self, mask: int):
+        """
+        Record the input mask for one tick.
+        :param mask:
+        :return:
+        """
+        if mask != self.mask or self.count == MAX_RUN_TICKS:
+            self.write_run()
+            self.mask = mask
+
+        self.count += 1
+        self.ticks += 1
+
+    def write_run(self):
+        """
+        Write out the run of ticks recorded so far.
+        :return:
+        """
+        if self.count:
+            self.file.write(RUN.pack(self.mask, self.count))
+            self.count = 0
+
+    def close(self, world: GameWorld):
+        """
+        Finish the recording with the world's final state, so replays can
+        check they ended up in exactly the same place.
+        :param world:
+        :return:
+        """
+        self.write_run()
+        self.file.write(RUN.pack(0, 0))
+        self.file.write(state_digest(world))
+        self.file.close()
+
+
+def read_recording(path: str) -> dict:
+    """
+    Read an input recording.
+    :param path:
+    :return: Dict with the step rate, seed, map, map digest, one input mask
+    per tick and the final state digest (None if the recording was not
+    closed)
+    """
+    with open(path, 'rb') as recording_file:
+        data = recording_file.read()
+
+    magic, version, step_rate, seed, name_length = HEADER.unpack_from(data)
+
+    if magic != MAGIC or version != FORMAT_VERSION:
+        raise ValueError(f'{path} is not a version {FORMAT_VERSION} input recording')
+
+    offset = HEADER.size
+    map_src = data[offset:offset + name_length].decode()
+    offset += name_length
+    map_digest = data[offset:offset + 32]
+    offset += 32
+
+    masks = bytearray()
+    final_digest = None
+
+    while offset + RUN.size <= len(data):
+        mask, count = RUN.unpack_from(data, offset)
+        offset += RUN.size
+
+        if count == 0:
+            final_digest = data[offset:offset + 32]
+            break
+
+        masks.extend(bytes((mask,)) * count)
+
+    return {
+        'step_rate': step_rate,
+        'seed': seed,
+        'map_src': map_src,
+        'map_digest': map_digest,
+        'masks': bytes(masks),
+        'final_digest': final_digest,
+    }
+
+
+def replay(path: str, loops: int = 1) -> dict:
+    """
+    Feed a recording's inputs to a fresh headless world at its fixed tick
+    rate, as fast as possible.
+    :param path: Input recording
+    :param loops: Times to play the inputs through; more than one makes a
+    soak test, and only the first loop is checked against the recording's
+    final state
+    :return: Dict of results
+    """
+    recording = read_recording(path)
+
+    if _map_digest(recording['map_src']) != recording['map_digest']:
+        raise ValueError(
+            f'{recording["map_src"]} has changed since {path} was recorded'
+        )
+
+    world = create_world(recording['map_src'], recording['seed'])
+    delta_time = 1 / recording['step_rate']
+    matches = None
+    ticks = 0
+    start = time.perf_counter()
+
+    for loop in range(loops):
+        for mask in recording['masks']:
+            apply_input_mask(world, mask)
+            world.step(delta_time)
+            ticks += 1
+
+        if loop == 0 and recording['final_digest'] is not None:
+            matches = state_digest(world) == recording['final_digest']
+
+    run_time = time.perf_counter() - start
+
+    return {
+        'recording': path,
+        'map': recording['map_src'],
+        'seed': recording['seed'],
+        'step_rate': recording['step_rate'],
+        'ticks': ticks,
+        'run_s': run_time,
+        'ticks_per_second': ticks / run_time if run_time else None,
+        'realtime_factor': (
+            ticks / recording['step_rate'] / run_time if run_time else None
+        ),
+        'matches_recording': matches,
+        'state_digest': state_digest(world).hex(),
+        'score': world.player_sprite.score,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Replay an input recording headless and check the world '
+                    'ends up exactly where the recording did.'
+    )
+    parser.add_argument('recording', help='Input recording to replay')
+    parser.add_argument(
+        '--loops',
+        type=int,
+        default=1,
+        help='Times to play the inputs through, for soak testing'
+    )
+    args = parser.parse_args()
+
+    results = replay(args.recording, args.loops)
+    json.dump(results, sys.stdout, indent=2)
+    print()
+
+    if results['matches_recording'] is False:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
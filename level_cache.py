@@ -0,0 +1,524 @@
+import arcade
+import glob
+import hashlib
+import json
+import math
+import os
+import pickle
+import pytiled_parser
+import xml.etree.ElementTree as ElementTree
+from arcade.tilemap.tilemap import (
+    _get_image_info_from_tileset,
+    _get_image_source,
+)
+from collections import defaultdict
+from pathlib import Path
+import constants as c
+from collision_geometry import merge_platform_shapes
+
+# Bump whenever the layout of a compiled level changes
+CACHE_VERSION = 6
+
+_levels = {}
+
+
+class _RecordedSprite(arcade.AnimatedTimeBasedSprite):
+    """
+    Tile sprite that remembers the arguments the tile map created it with, so
+    an identical sprite can be rebuilt later without the map.
+
+    The tile map insists on an AnimatedTimeBasedSprite for animated tiles, so
+    this is one, but it is set up like a plain Sprite so that it also takes
+    the arguments of a still tile.
+    """
+    def __init__(self, **kwargs):
+        arcade.Sprite.__init__(self, **kwargs)
+        self.cur_frame_idx = 0
+        self.frames = []
+        self.time_counter = 0.0
+        self.source_args = kwargs
+
+        # (tile id, duration in ms, texture args) of each animation frame
+        self.frame_args = []
+
+
+class _RecordingTileMap(arcade.TileMap):
+    """
+    Tile map that also records the arguments each animation frame's texture
+    was loaded with, which the frames' textures don't keep.
+    """
+    def _create_sprite_from_tile(self, tile, *args, **kwargs):
+        sprite = super(_RecordingTileMap, self)._create_sprite_from_tile(
+            tile,
+            *args,
+            **kwargs
+        )
+
+        if tile.animation:
+            map_directory = os.path.dirname(self.tiled_map.map_file)
+
+            # Frames are looked up the same way the tile map does
+            for frame in tile.animation:
+                frame_tile = self._get_tile_by_id(tile.tileset, frame.tile_id)
+
+                if frame_tile is None:
+                    continue
+
+                texture_args = {
+                    'filename': _get_image_source(frame_tile, map_directory),
+                }
+
+                if not frame_tile.image:
+                    (
+                        texture_args['image_x'],
+                        texture_args['image_y'],
+                        texture_args['image_width'],
+                        texture_args['image_height'],
+                    ) = _get_image_info_from_tileset(frame_tile)
+
+                sprite.frame_args.append(
+                    (frame.tile_id, frame.duration, texture_args)
+                )
+
+        return sprite
+
+
+def _all_layers(layers):
+    """
+    Yield every layer of a parsed map, including layers inside groups.
+    :param layers: Parsed pytiled_parser layers
+    :return:
+    """
+    for layer in layers:
+        yield layer
+
+        if isinstance(layer, pytiled_parser.LayerGroup):
+            yield from _all_layers(layer.layers)
+
+
+def map_digest(map_path: str) -> str:
+    """
+    Hash the contents of a Tiled map, and of any external tilesets it uses,
+    together with the settings that affect the compiled level.
+    :param map_path: Resolved path of the map file
+    :return: Hex digest
+    """
+    digest = hashlib.sha256()
+    digest.update(
+        f'{CACHE_VERSION}:{c.SPRITE_SCALING}:{c.CHUNK_SIZE_TILES}'.encode()
+    )
+
+    with open(map_path, 'rb') as map_file:
+        contents = map_file.read()
+
+    digest.update(contents)
+    map_directory = os.path.dirname(map_path)
+
+    for source in _tileset_sources(map_path, contents):
+        with open(os.path.join(map_directory, source), 'rb') as tileset_file:
+            digest.update(tileset_file.read())
+
+    return digest.hexdigest()
+
+
+def _tileset_sources(map_path: str, contents: bytes) -> list:
+    """
+    Find the external tilesets a map uses.
+    :param map_path: Map file; .tmx maps are XML, the rest JSON
+    :param contents: Contents of the map file
+    :return: Tileset paths, relative to the map's directory
+    """
+    if map_path.endswith('.tmx'):
+        tilesets = ElementTree.fromstring(contents).iter('tileset')
+
+        return [
+            tileset.get('source') for tileset in tilesets
+            if tileset.get('source')
+        ]
+
+    tilesets = json.loads(contents).get('tilesets', [])
+
+    return [tileset['source'] for tileset in tilesets if 'source' in tileset]
+
+
+def chunk_key(x: float, y: float, chunk_size: float):
+    """
+    Get the chunk a point falls in.
+    :param x:
+    :param y:
+    :param chunk_size: Width and height of a chunk in pixels
+    :return: (column, row) of the chunk
+    """
+    return math.floor(x / chunk_size), math.floor(y / chunk_size)
+
+
+def _overlapped_chunks(points, chunk_size: float):
+    """
+    Get the chunks a polygon's bounding box overlaps. Edges lying on a chunk
+    boundary don't count as overlapping the chunk beyond it.
+    :param points:
+    :param chunk_size: Width and height of a chunk in pixels
+    :return: List of (column, row) of the chunks
+    """
+    xs = [x for x, _ in points]
+    ys = [y for _, y in points]
+    first_column, first_row = chunk_key(min(xs), min(ys), chunk_size)
+    end_column = max(math.ceil(max(xs) / chunk_size), first_column + 1)
+    end_row = max(math.ceil(max(ys) / chunk_size), first_row + 1)
+
+    return [
+        (column, row)
+        for column in range(first_column, end_column)
+        for row in range(first_row, end_row)
+    ]
+
+
+def _collectible_points(record: dict) -> int:
+    """
+    Points a collectible sprite is worth.
+    :param record: Compiled sprite
+    :return: Its Points property, or 0 if that is missing or not a whole
+    number
+    """
+    try:
+        return int(record['properties'][c.PROP_POINTS])
+    except (KeyError, TypeError, ValueError):
+        return 0
+
+
+def compile_level(map_path: str) -> dict:
+    """
+    Load a Tiled map and reduce it to plain data: the textures and placement
+    of every sprite, layer properties, enemy spawn points and the collision
+    geometry of the platforms, with adjacent platform tiles merged. Sprites
+    and spawn points are also indexed by the fixed-size chunk they start in,
+    and platform shapes by every chunk they overlap.
+    :param map_path: Resolved path of the map file
+    :return: Compiled level
+    """
+    tiled_map = pytiled_parser.parse_map(Path(map_path))
+    tiled_layers = {
+        layer.name: layer
+        for layer in _all_layers(tiled_map.layers)
+    }
+    layer_options = {
+        name: {'custom_class': _RecordedSprite}
+        for name in tiled_layers
+    }
+    tile_map = _RecordingTileMap(
+        scaling=c.SPRITE_SCALING,
+        layer_options=layer_options,
+        tiled_map=tiled_map
+    )
+
+    textures = []
+    texture_indexes = {}
+    layers = {}
+
+    def texture_index(texture_args, hit_box):
+        # Rebuilt sprites skip the hit box calculation and reuse this one
+        texture_args = dict(texture_args, hit_box_algorithm='None')
+        texture_key = (tuple(sorted(texture_args.items())), hit_box)
+
+        if texture_key not in texture_indexes:
+            texture_indexes[texture_key] = len(textures)
+            textures.append((texture_args, hit_box))
+
+        return texture_indexes[texture_key]
+
+    for name, sprite_list in tile_map.sprite_lists.items():
+        sprites = []
+
+        for sprite in sprite_list:
+            hit_box = tuple(tuple(point) for point in sprite.get_hit_box())
+            frames = tuple(
+                (tile_id, duration, texture_index(
+                    dict(texture_args, scale=c.SPRITE_SCALING),
+                    hit_box
+                ))
+                for tile_id, duration, texture_args in sprite.frame_args
+            )
+
+            # An animated sprite starts on its first frame
+            if frames:
+                texture = frames[0][2]
+            else:
+                texture = texture_index(sprite.source_args, hit_box)
+
+            sprites.append({
+                'texture': texture,
+                'frames': frames,
+                'position': (sprite.center_x, sprite.center_y),
+                'size': (sprite.width, sprite.height),
+                'angle': sprite.angle,
+                'color': tuple(sprite.color),
+                'alpha': sprite.alpha,
+                'change': (sprite.change_x, sprite.change_y),
+                'boundaries': (
+                    sprite.boundary_left,
+                    sprite.boundary_right,
+                    sprite.boundary_bottom,
+                    sprite.boundary_top
+                ),
+                'properties': dict(sprite.properties),
+            })
+
+        layers[name] = {
+            'properties': dict(tiled_layers[name].properties or {}),
+            'sprites': sprites,
+            'animated': any(record['frames'] for record in sprites),
+        }
+
+    # Collectibles' points are parsed once here rather than on every pickup
+    for name in c.COLLECTIBLE_LAYERS:
+        if name in layers:
+            layers[name]['points'] = [
+                _collectible_points(record)
+                for record in layers[name]['sprites']
+            ]
+
+    enemy_spawns = []
+
+    for enemy in tile_map.object_lists.get(c.LAYER_ENEMIES, []):
+        cartesian = tile_map.get_cartesian(enemy.shape[0], enemy.shape[1])
+        enemy_spawns.append((
+            math.floor(c.SPRITE_SCALING * tile_map.tile_width * cartesian[0]),
+            math.floor(c.SPRITE_SCALING * tile_map.tile_height * (cartesian[1] + 0.5))
+        ))
+
+    chunk_size = c.CHUNK_SIZE_TILES * tile_map.tile_width * c.SPRITE_SCALING
+    chunks = defaultdict(lambda: {
+        'sprites': defaultdict(list),
+        'enemy_spawns': [],
+        'platform_shapes': [],
+    })
+
+    for name, layer in layers.items():
+        if name in c.RESIDENT_LAYERS:
+            continue
+
+        for index, record in enumerate(layer['sprites']):
+            key = chunk_key(*record['position'], chunk_size)
+            chunks[key]['sprites'][name].append(index)
+
+    for index, spawn in enumerate(enemy_spawns):
+        chunks[chunk_key(*spawn, chunk_size)]['enemy_spawns'].append(index)
+
+    # Platforms are merged across the whole layer, so a surface crossing from
+    # one chunk into the next has no seam in it. A merged shape can overlap
+    # several chunks; it stays in the space while any of them is loaded.
+    platform_tiles = [
+        tuple(tuple(point) for point in sprite.get_adjusted_hit_box())
+        for sprite in tile_map.sprite_lists.get(c.LAYER_PLATFORMS, [])
+    ]
+    platform_shapes = merge_platform_shapes(platform_tiles)
+
+    for index, points in enumerate(platform_shapes):
+        for key in _overlapped_chunks(points, chunk_size):
+            chunks[key]['platform_shapes'].append(index)
+
+    for chunk in chunks.values():
+        chunk['sprites'] = dict(chunk['sprites'])
+
+    return {
+        'version': CACHE_VERSION,
+        'width': tile_map.width,
+        'height': tile_map.height,
+        'tile_width': tile_map.tile_width,
+        'tile_height': tile_map.tile_height,
+        'background_color': tile_map.background_color,
+        'properties': dict(tile_map.properties or {}),
+        'textures': textures,
+        'layers': layers,
+        'enemy_spawns': enemy_spawns,
+        'chunk_size': chunk_size,
+        'chunks': dict(chunks),
+        'platform_shapes': platform_shapes,
+        'platform_shape_counts': {
+            'tiles': len(platform_tiles),
+            'merged': len(platform_shapes),
+        },
+    }
+
+
+def load_level(map_src: str = c.MAP_SRC) -> dict:
+    """
+    Get the compiled form of a Tiled map. Levels are kept in memory once
+    loaded, and on disk in LEVEL_CACHE_DIR; either copy is only used while
+    the hash of the map's contents still matches.
+    :param map_src: Tiled map, may use the :resources: prefix
+    :return: Compiled level
+    """
+    map_path = str(arcade.resources.resolve_resource_path(map_src))
+    digest = map_digest(map_path)
+
+    cached = _levels.get(map_path)
+
+    if cached is not None and cached[0] == digest:
+        return cached[1]
+
+    map_key = cache_key(map_path)
+    cache_path = os.path.join(c.LEVEL_CACHE_DIR, f'{map_key}-{digest}.pickle')
+
+    try:
+        with open(cache_path, 'rb') as cache_file:
+            level = pickle.load(cache_file)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        level = compile_level(map_path)
+        write_level_cache(cache_path, map_key, level)
+
+    _levels[map_path] = (digest, level)
+
+    return level
+
+
+def cache_key(map_path: str) -> str:
+    """
+    Name a map's cache files start with: its file name without the
+    extension, and a hash of its full path, so maps with the same name in
+    different directories or formats don't share cache files.
+    :param map_path: Resolved path of the map file
+    :return:
+    """
+    map_name = os.path.splitext(os.path.basename(map_path))[0]
+    path_hash = hashlib.sha1(os.path.abspath(map_path).encode()).hexdigest()
+
+    return f'{map_name}-{path_hash[:8]}'
+
+
+def write_level_cache(cache_path: str, map_key: str, level: dict):
+    """
+    Write a compiled level to disk, replacing older versions of the same map.
+    :param cache_path: File to write
+    :param map_key: The map's cache_key
+    :param level: Compiled level
+    :return:
+    """
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+
+    for stale_path in glob.glob(
+            os.path.join(c.LEVEL_CACHE_DIR, f'{glob.escape(map_key)}-*.pickle')
+    ):
+        # Another process compiling the same map may have got there first
+        try:
+            os.remove(stale_path)
+        except FileNotFoundError:
+            pass
+
+    # Write to a temporary file first so a partial write is never loaded,
+    # one per process so two processes never write to the same one
+    temp_path = f'{cache_path}.{os.getpid()}.tmp'
+
+    with open(temp_path, 'wb') as cache_file:
+        pickle.dump(level, cache_file, pickle.HIGHEST_PROTOCOL)
+
+    os.replace(temp_path, cache_path)
+
+
+def build_sprite(level: dict, record: dict) -> arcade.Sprite:
+    """
+    Create a sprite from its compiled record.
+    :param level: Compiled level the record belongs to
+    :param record: Compiled sprite
+    :return:
+    """
+    texture_args, hit_box = level['textures'][record['texture']]
+
+    if record['frames']:
+        sprite = arcade.AnimatedTimeBasedSprite()
+        sprite.frames = [
+            arcade.AnimationKeyframe(
+                tile_id,
+                duration,
+                _load_texture(level['textures'][index][0])
+            )
+            for tile_id, duration, index in record['frames']
+        ]
+    else:
+        sprite = arcade.Sprite(**texture_args)
+
+    sprite.hit_box = hit_box
+    apply_record(sprite, record)
+
+    return sprite
+
+
+def _load_texture(texture_args: dict) -> arcade.Texture:
+    """
+    Load the texture a sprite built with these arguments would have, from
+    arcade's texture cache if it is already there.
+    :param texture_args: Sprite arguments of a compiled texture
+    :return:
+    """
+    return arcade.load_texture(
+        texture_args['filename'],
+        texture_args.get('image_x', 0),
+        texture_args.get('image_y', 0),
+        texture_args.get('image_width', 0),
+        texture_args.get('image_height', 0),
+        hit_box_algorithm=texture_args['hit_box_algorithm'],
+    )
+
+
+def apply_record(sprite: arcade.Sprite, record: dict):
+    """
+    Give a sprite the placement and properties of a compiled record, e.g. to
+    reuse a pooled sprite with the same texture.
+    :param sprite:
+    :param record: Compiled sprite
+    :return:
+    """
+    # Animations start again from their first frame
+    if record['frames']:
+        sprite.cur_frame_idx = 0
+        sprite.time_counter = 0.0
+        sprite.texture = sprite.frames[0].texture
+
+    sprite.width, sprite.height = record['size']
+    sprite.position = record['position']
+    sprite.angle = record['angle']
+    sprite.color = record['color']
+    sprite.alpha = record['alpha']
+    sprite.change_x, sprite.change_y = record['change']
+    (
+        sprite.boundary_left,
+        sprite.boundary_right,
+        sprite.boundary_bottom,
+        sprite.boundary_top
+    ) = record['boundaries']
+    sprite.properties.clear()
+    sprite.properties.update(record['properties'])
+
+
+def build_scene(
+        level: dict,
+        layer_options: dict,
+        fill_layers=None
+) -> arcade.Scene:
+    """
+    Create a Scene holding every sprite layer of a compiled level, in the
+    map's draw order.
+    :param level: Compiled level
+    :param layer_options: Per-layer options, e.g. use_spatial_hash
+    :param fill_layers: Names of the layers to create sprites for; the other
+    layers start empty. Defaults to every layer.
+    :return:
+    """
+    scene = arcade.Scene()
+
+    for name, layer in level['layers'].items():
+        use_spatial_hash = layer_options.get(name, {}).get(
+            'use_spatial_hash',
+            False
+        )
+        scene.add_sprite_list(name, use_spatial_hash=use_spatial_hash)
+        sprite_list = scene.get_sprite_list(name)
+
+        if fill_layers is not None and name not in fill_layers:
+            continue
+
+        sprite_list.extend(
+            [build_sprite(level, record) for record in layer['sprites']]
+        )
+
+    return scene
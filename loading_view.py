@@ -0,0 +1,83 @@
+import arcade
+import constants as c
+from typing import Optional
+from asset_loader import AssetLoader
+from game_view import GameView
+from hud import Hud
+
+
+class LoadingView(arcade.View):
+    """
+    Shows a progress bar while the game's assets load in the background,
+    uploads the loaded textures a few at a time, and starts the game once
+    everything is ready.
+    """
+    def __init__(self):
+        super(LoadingView, self).__init__()
+
+        self.loader = AssetLoader()
+        self.text: Optional[Hud] = None
+
+    def on_show_view(self):
+        """
+        Start loading and lay out the loading screen.
+        :return:
+        """
+        arcade.set_background_color(arcade.csscolor.DARK_SLATE_BLUE)
+        arcade.set_viewport(0, self.window.width, 0, self.window.height)
+
+        self.text = Hud()
+        self.text.add_label(
+            'loading',
+            c.LOADING_LABEL,
+            self.window.width / 2,
+            self.window.height / 2 + c.LOADING_BAR_HEIGHT,
+            arcade.color.WHITE,
+            anchor_x='center'
+        )
+
+        self.loader.start()
+
+    def on_update(self, delta_time: float):
+        """
+        Upload what the loader has finished, and start the game when it's
+        all there.
+        :param delta_time:
+        :return:
+        """
+        loader = self.loader
+
+        if not loader.done:
+            return
+
+        if loader.error is not None:
+            raise loader.error
+
+        if loader.upload(self.window.ctx.default_atlas, c.LOADING_UPLOAD_BUDGET_S):
+            self.window.show_view(GameView())
+
+    def on_draw(self):
+        """
+        Draw the progress bar.
+        :return:
+        """
+        self.clear()
+
+        left = (self.window.width - c.LOADING_BAR_WIDTH) / 2
+        bottom = (self.window.height - c.LOADING_BAR_HEIGHT) / 2
+        arcade.draw_xywh_rectangle_outline(
+            left,
+            bottom,
+            c.LOADING_BAR_WIDTH,
+            c.LOADING_BAR_HEIGHT,
+            arcade.color.WHITE
+        )
+        arcade.draw_xywh_rectangle_filled(
+            left,
+            bottom,
+            c.LOADING_BAR_WIDTH * self.loader.progress,
+            c.LOADING_BAR_HEIGHT,
+            arcade.color.WHITE
+        )
+
+        self.text.draw()
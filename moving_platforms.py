@@ -0,0 +1,190 @@
+import arcade
+import numpy as np
+
+
+def _boundary(value) -> float:
+    """
+    Convert a sprite boundary to an array value. Unset boundaries, None or 0,
+    become NaN, which never compares as past the boundary.
+    :param value:
+    :return:
+    """
+    return float(value) if value else np.nan
+
+
+class MovingPlatforms:
+    """
+    Moving platform state held in NumPy arrays, so the boundary checks and
+    velocities for every platform are worked out in a few array operations.
+
+    The platforms' change_x and change_y are copied into the arrays once;
+    after that the arrays are the source of truth for their direction. Each
+    update works in scratch arrays made up front, so stepping the platforms
+    doesn't allocate any new arrays.
+    """
+    __slots__ = (
+        'sprites',
+        'bodies',
+        'change',
+        'low_extent',
+        'high_extent',
+        'low_boundary',
+        'high_boundary',
+        'position',
+        'velocity',
+        'start_change',
+        'start_position',
+        'zero',
+        'step',
+        'next_velocity',
+        'offset',
+        'reverse',
+        'heading',
+        'past',
+        'different',
+        'different_x',
+        'different_y',
+        'changed',
+    )
+
+    def __init__(
+            self,
+            physics_engine: arcade.PymunkPhysicsEngine,
+            platforms: arcade.SpriteList
+    ):
+        self.sprites = list(platforms)
+        self.bodies = [
+            physics_engine.get_physics_object(platform).body
+            for platform in self.sprites
+        ]
+        count = len(self.sprites)
+
+        self.change = np.zeros((count, 2))
+
+        # Distance from the center to the left/bottom and right/top edges
+        self.low_extent = np.zeros((count, 2))
+        self.high_extent = np.zeros((count, 2))
+
+        # Left/bottom and right/top boundaries, NaN where unset
+        self.low_boundary = np.full((count, 2), np.nan)
+        self.high_boundary = np.full((count, 2), np.nan)
+
+        for index, platform in enumerate(self.sprites):
+            self.change[index] = platform.change_x, platform.change_y
+            self.low_extent[index] = (
+                platform.center_x - platform.left,
+                platform.center_y - platform.bottom
+            )
+            self.high_extent[index] = (
+                platform.right - platform.center_x,
+                platform.top - platform.center_y
+            )
+            self.low_boundary[index] = (
+                _boundary(platform.boundary_left),
+                _boundary(platform.boundary_bottom)
+            )
+            self.high_boundary[index] = (
+                _boundary(platform.boundary_right),
+                _boundary(platform.boundary_top)
+            )
+
+        # Kinematic bodies only move by their velocity, so their positions
+        # are tracked here instead of being read back from pymunk
+        self.position = np.array(
+            [tuple(body.position) for body in self.bodies],
+            dtype=float
+        ).reshape(count, 2)
+
+        # Velocities last given to the bodies; NaN so the first update sets
+        # every body
+        self.velocity = np.full((count, 2), np.nan)
+
+        # Starting state, to reset the platforms to
+        self.start_change = self.change.copy()
+        self.start_position = self.position.copy()
+
+        # Scratch arrays for update(). Numbers are compared and divided as
+        # arrays too, since NumPy would otherwise make an array of them on
+        # every call.
+        self.zero = np.zeros((count, 2))
+        self.step = np.empty(())
+        self.next_velocity = np.empty((count, 2))
+        self.offset = np.empty((count, 2))
+        self.reverse = np.empty((count, 2), dtype=bool)
+        self.heading = np.empty((count, 2), dtype=bool)
+        self.past = np.empty((count, 2), dtype=bool)
+        self.different = np.empty((count, 2), dtype=bool)
+        self.different_x = self.different[:, 0]
+        self.different_y = self.different[:, 1]
+        self.changed = np.empty(count, dtype=bool)
+
+    def reset(self):
+        """
+        Move every platform back to where it started, heading the way it
+        started.
+        :return:
+        """
+        self.change[:] = self.start_change
+        self.position[:] = self.start_position
+        self.velocity.fill(np.nan)
+
+        for index, (sprite, body) in enumerate(zip(self.sprites, self.bodies)):
+            position = tuple(self.start_position[index].tolist())
+            body.position = position
+            body.velocity = (0, 0)
+            sprite.position = position
+
+    def update(self, delta_time: float):
+        """
+        Reverse any platform that has moved past one of its boundaries and
+        set the platform bodies' velocities for the next step. Only bodies
+        whose velocity changed are touched. Must be followed by exactly one
+        physics step of the same length.
+        :param delta_time: Length of the step
+        :return:
+        """
+        if not self.bodies:
+            return
+
+        change = self.change
+        position = self.position
+        offset = self.offset
+        reverse = self.reverse
+        heading = self.heading
+        past = self.past
+
+        # Heading right/up past the right/top boundary
+        np.add(position, self.high_extent, out=offset)
+        np.greater(offset, self.high_boundary, out=reverse)
+        np.greater(change, self.zero, out=heading)
+        np.logical_and(reverse, heading, out=reverse)
+
+        # Heading left/down past the left/bottom boundary
+        np.subtract(position, self.low_extent, out=offset)
+        np.less(offset, self.low_boundary, out=past)
+        np.less(change, self.zero, out=heading)
+        np.logical_and(past, heading, out=past)
+        np.logical_or(reverse, past, out=reverse)
+
+        np.negative(change, out=offset)
+        np.putmask(change, reverse, offset)
+
+        # Work the velocities out into the spare array, then swap it with
+        # the last ones
+        step = self.step
+        step.fill(delta_time)
+        velocity = self.next_velocity
+        np.divide(change, step, out=velocity)
+        np.not_equal(velocity, self.velocity, out=self.different)
+        np.logical_or(self.different_x, self.different_y, out=self.changed)
+        self.next_velocity = self.velocity
+        self.velocity = velocity
+
+        if np.count_nonzero(self.changed):
+            bodies = self.bodies
+
+            for index in np.flatnonzero(self.changed).tolist():
+                bodies[index].velocity = tuple(velocity[index].tolist())
+
+        np.multiply(velocity, step, out=offset)
+        np.add(position, offset, out=position)
@@ -7,37 +7,21 @@ class PlayerSprite(CharacterSprite):
     """
     Sprite controlled by the player
     """
-    def __init__(self, ladder_list, coin_list, gem_list, flag_list, star_list):
+    __slots__ = ('is_on_ground', 'ladder_contacts', 'score', 'ladder_damping')
+
+    def __init__(self):
         super(PlayerSprite, self).__init__(
             c.PLAYER_SPRITE_FOLDER,
             c.PLAYER_SPRITE_FILE
         )
 
-        self.jump_texture_pair = arcade.load_texture_pair(
-            f'{self.sprite_path}_jump.png'
-        )
-
-        self.fall_texture_pair = arcade.load_texture_pair(
-            f'{self.sprite_path}_fall.png'
-        )
-
-        self.climb_textures = []
-
-        for i in range(c.CLIMB_TEXTURES_TOTAL):
-            texture = arcade.load_texture(
-                f'{self.sprite_path}_climb{i}.png'
-            )
-
-            self.climb_textures.append(texture)
-
         self.is_on_ground = False
-        self.ladder_list = ladder_list
-        self.coin_list = coin_list
-        self.gem_list = gem_list
-        self.flag_list = flag_list
-        self.star_list = star_list
+        self.ladder_contacts = 0
         self.score = 0
 
+        # Damping while climbing, set from the world's tuning
+        self.ladder_damping = c.DAMPING_LADDERS
+
     def pymunk_moved(self, physics_engine, dx, dy, d_angle):
         """
         Handle movement from pymunk engine and set animation textures.
@@ -48,8 +32,6 @@ class PlayerSprite(CharacterSprite):
         :return:
         """
         self.set_sprite_direction(dx)
-        self.check_ladder_collision()
-        self.check_collectible_collision()
 
         # Check if the sprite is on the ground
         self.is_on_ground = physics_engine.is_on_ground(self)
@@ -59,95 +41,79 @@ class PlayerSprite(CharacterSprite):
         self.odometer_y += dy
 
         # Update animations
-        if self.is_on_ladder and not self.is_on_ground:
-            if self.animate_climbing():
-                return
+        self.play_animation(self.choose_animation(dx, dy))
+
+    def choose_animation(self, dx, dy) -> str:
+        """
+        Pick the animation state for a move, climbing on ladders and jumping
+        or falling in the air.
+        :param dx: The sprite's horizontal displacement
+        :param dy: The sprite's vertical displacement
+        :return: One of the ANIMATION_* states
+        """
+        if self.is_on_ladder:
+            if not self.is_on_ground:
+                return c.ANIMATION_CLIMB
 
-        if self.animate_jumping(dy):
-            return
+            # Standing at the foot of a ladder keeps the current animation
+            return self.animation_state
 
-        if self.animate_idle(dx):
-            return
+        if not self.is_on_ground:
+            if dy > c.STATIONARY_ZONE:
+                return c.ANIMATION_JUMP
+            elif dy < -c.STATIONARY_ZONE:
+                return c.ANIMATION_FALL
 
-        self.animate_walking()
+        return super(PlayerSprite, self).choose_animation(dx, dy)
 
-    def check_ladder_collision(self):
+    def touch_ladder(self):
         """
-        Check if the sprite is on a ladder and update the physics engine
-        accordingly.
+        Count a ladder the sprite has started overlapping.
         :return:
         """
-        ladders = arcade.check_for_collision_with_list(self, self.ladder_list)
-
-        if len(ladders) > 0:
-            if not self.is_on_ladder:
-                self.is_on_ladder = True
-                self.pymunk.gravity = (0, 0)
-                self.pymunk.damping = c.DAMPING_LADDERS
-                self.pymunk.max_vertical_velocity = c.MAX_SPEED_X_PLAYER
-        else:
-            if self.is_on_ladder:
-                self.is_on_ladder = False
-                self.pymunk.gravity = (0, -c.GRAVITY)
-                self.pymunk.damping = c.DAMPING_DEFAULT
-                self.pymunk.max_vertical_velocity = c.MAX_SPEED_Y_PLAYER
-
-    def check_collectible_collision(self):
+        self.ladder_contacts += 1
+
+        if self.ladder_contacts == 1:
+            self.on_ladder_enter()
+
+    def release_ladder(self):
         """
-        Checks whether the player sprite has collided with a collectible object
-        e.g. a coin, gem or flag, and increases the score accordingly as well
-        as tracking how many of each collectible are left.
+        Count a ladder the sprite has stopped overlapping.
         :return:
         """
-        collectibles = arcade.check_for_collision_with_list(self, self.coin_list)
-
-        if len(collectibles) == 0:
-            collectibles = arcade.check_for_collision_with_list(self, self.gem_list)
-
-        if len(collectibles) == 0:
-            collectibles = arcade.check_for_collision_with_list(self, self.flag_list)
-
-        if len(collectibles) == 0:
-            collectibles = arcade.check_for_collision_with_list(self, self.star_list)
+        self.ladder_contacts -= 1
 
-        if len(collectibles) > 0:
-            for sprite in collectibles:
-                points = int(sprite.properties[c.PROP_POINTS])
-                self.score += points
-                sprite.remove_from_sprite_lists()
+        if self.ladder_contacts == 0:
+            self.on_ladder_exit()
 
-    def animate_climbing(self):
+    def on_ladder_enter(self):
         """
-        Update the sprite's climbing animation.
-        :return: Boolean indicating whether to update the animation
+        Switch the sprite's physics to climbing when it gets onto a ladder.
+        :return:
         """
-        animating = False
-        if abs(self.odometer_y) > c.DISTANCE_PX_TO_CHANGE_TEXTURE:
-            self.odometer_y = 0
-            self.cur_texture_index += 1
-
-            if self.cur_texture_index >= c.CLIMB_TEXTURES_TOTAL:
-                self.cur_texture_index = 0
-
-            self.texture = self.climb_textures[self.cur_texture_index]
-            animating = True
-
-        return animating
+        self.is_on_ladder = True
+        self.pymunk.gravity = (0, 0)
+        self.pymunk.damping = self.ladder_damping
+        self.pymunk.max_vertical_velocity = c.MAX_SPEED_X_PLAYER
 
-    def animate_jumping(self, dy):
+    def on_ladder_exit(self):
         """
-        Update the sprite's jumping and falling animations.
-        :param dy: The sprite's vertical displacement
-        :return: Boolean indicating whether to update the animation
+        Restore the sprite's normal physics when it leaves the last ladder,
+        i.e. the physics engine's own gravity and damping.
+        :return:
         """
-        animating = False
-
-        if not self.is_on_ground and not self.is_on_ladder:
-            if dy > c.STATIONARY_ZONE:
-                self.texture = self.jump_texture_pair[self.face_direction]
-                animating = True
-            elif dy < -c.STATIONARY_ZONE:
-                self.texture = self.fall_texture_pair[self.face_direction]
-                animating = True
+        self.is_on_ladder = False
+        self.pymunk.gravity = None
+        self.pymunk.damping = None
+        self.pymunk.max_vertical_velocity = c.MAX_SPEED_Y_PLAYER
 
-        return animating
+    def collect(self, collectible: arcade.Sprite, points: int):
+        """
+        Pick up a collectible object e.g. a coin, gem or flag, increasing the
+        score by its points and removing it from the map.
+        :param collectible: Collectible sprite the player touched
+        :param points: Points the collectible is worth
+        :return:
+        """
+        self.score += points
+        collectible.remove_from_sprite_lists()
@@ -0,0 +1,333 @@
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+import constants as c
+import input_replay
+from benchmark import script_inputs, set_inputs
+
+# Keys a random player holds, and how likely each choice is
+RANDOM_KEY_CHOICES = (
+    (('right',), 6),
+    (('right', 'up'), 3),
+    (('left',), 2),
+    (('left', 'up'), 1),
+    (('up',), 1),
+    (('down',), 1),
+    ((), 1),
+)
+
+# Ticks a random player holds the same keys for
+RANDOM_HOLD_TICKS = (10, 60)
+
+
+def random_inputs(seed: int):
+    """
+    Endlessly yield the keys held on each tick by a random player.
+    :param seed: Makes the player repeatable
+    :return: Generator of key sets, one per tick
+    """
+    rng = random.Random(seed)
+    choices = [frozenset(keys) for keys, _ in RANDOM_KEY_CHOICES]
+    weights = [weight for _, weight in RANDOM_KEY_CHOICES]
+
+    while True:
+        keys = rng.choices(choices, weights)[0]
+
+        for _ in range(rng.randint(*RANDOM_HOLD_TICKS)):
+            yield keys
+
+
+class Playthrough:
+    """
+    One headless game: a world fed inputs from a script or a random player.
+    Falling out of the map counts a death and restarts the level, as the
+    game over screen does, until every collectible is picked up or the tick
+    limit is reached. On a level without collectibles there is nothing to
+    complete, and every game plays to the tick limit.
+    """
+    def __init__(self, map_src: str, seed: int, max_ticks: int, script=None):
+        """
+        :param map_src: Tiled map to load
+        :param seed: Seeds the simulation and the random player
+        :param max_ticks: Ticks to give up after
+        :param script: Input script to play instead of the random player
+        """
+        self.seed = seed
+        self.max_ticks = max_ticks
+        self.world = input_replay.create_world(map_src, seed)
+        self.inputs = (
+            random_inputs(seed) if script is None else script_inputs(script)
+        )
+        self.delta_time = 1 / c.PHYSICS_STEP_RATE
+
+        self.ticks = 0
+        self.deaths = 0
+        self.best_score = 0
+        self.completed_tick = None
+
+    @property
+    def finished(self) -> bool:
+        return (
+            self.completed_tick is not None
+            or self.ticks >= self.max_ticks
+        )
+
+    def step(self):
+        """
+        Play one tick.
+        :return:
+        """
+        world = self.world
+        set_inputs(world, next(self.inputs))
+        world.step(self.delta_time)
+        self.ticks += 1
+        self.best_score = max(self.best_score, world.player_sprite.score)
+
+        if world.is_level_complete():
+            self.completed_tick = self.ticks
+        elif world.is_player_out_of_bounds():
+            self.deaths += 1
+            world.reset()
+
+    def results(self) -> dict:
+        """
+        Outcome of the game so far.
+        :return:
+        """
+        if not self.world.has_completion_goal():
+            completed = None
+        else:
+            completed = self.completed_tick is not None
+
+        return {
+            'seed': self.seed,
+            'completed': completed,
+            'ticks_to_finish': self.completed_tick,
+            'ticks': self.ticks,
+            'score': self.world.player_sprite.score,
+            'best_score': self.best_score,
+            'deaths': self.deaths,
+            'state_digest': input_replay.state_digest(self.world).hex(),
+        }
+
+
+def play(map_src: str, seeds, max_ticks: int, script=None, lockstep=False):
+    """
+    Play a batch of games in this process. Runs in a worker process.
+    :param map_src: Tiled map to load
+    :param seeds: One game per seed
+    :param max_ticks: Ticks to give up each game after
+    :param script: Input script to play instead of random players
+    :param lockstep: Step every game one tick before any game takes the next,
+    rather than playing each game through in turn
+    :return: Results of each game, in seed order
+    """
+    playthroughs = [
+        Playthrough(map_src, seed, max_ticks, script)
+        for seed in seeds
+    ]
+
+    if lockstep:
+        playing = playthroughs
+
+        while playing:
+            for playthrough in playing:
+                playthrough.step()
+
+            playing = [
+                playthrough for playthrough in playing
+                if not playthrough.finished
+            ]
+    else:
+        for playthrough in playthroughs:
+            while not playthrough.finished:
+                playthrough.step()
+
+    return [playthrough.results() for playthrough in playthroughs]
+
+
+def aggregate(games) -> dict:
+    """
+    Summarise the results of many games. Games on a level without
+    collectibles have no completion goal, and are left out of the completion
+    rate.
+    :param games: Results of each game
+    :return:
+    """
+    with_goal = [game for game in games if game['completed'] is not None]
+    completed = [game for game in with_goal if game['completed']]
+    finish_ticks = [game['ticks_to_finish'] for game in completed]
+    scores = [game['best_score'] for game in games]
+    deaths = [game['deaths'] for game in games]
+
+    return {
+        'games': len(games),
+        'no_completion_goal': len(games) - len(with_goal),
+        'completed': len(completed),
+        'completion_rate': (
+            len(completed) / len(with_goal) if with_goal else None
+        ),
+        'ticks_to_finish': {
+            'min': min(finish_ticks),
+            'median': statistics.median(finish_ticks),
+            'max': max(finish_ticks),
+        } if finish_ticks else None,
+        'best_score': {
+            'min': min(scores),
+            'mean': statistics.fmean(scores),
+            'max': max(scores),
+        } if scores else None,
+        'deaths': {
+            'total': sum(deaths),
+            'mean': statistics.fmean(deaths),
+        } if deaths else None,
+        'ticks': sum(game['ticks'] for game in games),
+    }
+
+
+def run(
+        map_src: str,
+        games: int,
+        max_ticks: int,
+        jobs: int = None,
+        script=None,
+        lockstep=False,
+        first_seed: int = 0
+) -> dict:
+    """
+    Play many independent games across a process pool, each with its own
+    world and physics space.
+    :param map_src: Tiled map to load
+    :param games: Number of games
+    :param max_ticks: Ticks to give up each game after
+    :param jobs: Worker processes, one per core by default
+    :param script: Input script to play instead of random players
+    :param lockstep: Step the games in each worker in lockstep
+    :param first_seed: Seed of the first game; the rest count up from it
+    :return: Aggregated results, and the results of each game
+    """
+    jobs = jobs or os.cpu_count()
+    seeds = list(range(first_seed, first_seed + games))
+
+    # Lockstep games are stepped together, so each worker gets one batch;
+    # otherwise each game is its own task
+    if lockstep:
+        batches = [seeds[index::jobs] for index in range(jobs)]
+    else:
+        batches = [[seed] for seed in seeds]
+
+    batches = [batch for batch in batches if batch]
+    start = time.perf_counter()
+
+    if jobs == 1:
+        results = [
+            play(map_src, batch, max_ticks, script, lockstep)
+            for batch in batches
+        ]
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            results = list(executor.map(
+                play,
+                [map_src] * len(batches),
+                batches,
+                [max_ticks] * len(batches),
+                [script] * len(batches),
+                [lockstep] * len(batches)
+            ))
+
+    elapsed = time.perf_counter() - start
+    games_results = sorted(
+        (game for batch in results for game in batch),
+        key=lambda game: game['seed']
+    )
+    summary = aggregate(games_results)
+
+    return {
+        'map': map_src,
+        'jobs': jobs,
+        'lockstep': lockstep,
+        'max_ticks': max_ticks,
+        'elapsed_s': elapsed,
+        'ticks_per_second': summary['ticks'] / elapsed if elapsed else None,
+        'summary': summary,
+        'games': games_results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Play many headless games in parallel for automated '
+                    'playtesting and report the aggregated results as JSON.'
+    )
+    parser.add_argument('--map', default=c.MAP_SRC, help='Tiled map to load')
+    parser.add_argument(
+        '--games',
+        type=int,
+        default=16,
+        help='Number of games to play'
+    )
+    parser.add_argument(
+        '--ticks',
+        type=int,
+        default=c.PHYSICS_STEP_RATE * 120,
+        help='Ticks to give up each game after'
+    )
+    parser.add_argument(
+        '--jobs',
+        type=int,
+        default=os.cpu_count(),
+        help='Worker processes (default: one per core)'
+    )
+    parser.add_argument(
+        '--script',
+        help='JSON input script for every game to play, instead of random '
+             'players: a list of {"ticks": n, "keys": [...]}'
+    )
+    parser.add_argument(
+        '--lockstep',
+        action='store_true',
+        help="Step each worker's games together, one tick at a time"
+    )
+    parser.add_argument(
+        '--seed',
+        type=int,
+        default=0,
+        help='Seed of the first game'
+    )
+    parser.add_argument(
+        '--output',
+        help='File to write the results to instead of stdout'
+    )
+    args = parser.parse_args()
+
+    script = None
+
+    if args.script:
+        with open(args.script) as script_file:
+            script = json.load(script_file)
+
+    results = run(
+        args.map,
+        args.games,
+        args.ticks,
+        args.jobs,
+        script,
+        args.lockstep,
+        args.seed
+    )
+
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            json.dump(results, output_file, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == '__main__':
+    main()
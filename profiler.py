@@ -0,0 +1,268 @@
+import csv
+import json
+import time
+import numpy as np
+import constants as c
+from collections import deque
+from hud import Hud
+
+PERCENTILES = (50, 95, 99)
+
+
+class FrameProfiler:
+    """
+    Times named sections of each frame and keeps rolling percentiles of
+    them.
+
+    Sections are timed by temporarily replacing methods with timed wrappers,
+    so while the profiler is disabled there is nothing in the hot path at
+    all. Method hooks can target an instance, e.g. the physics engine's step,
+    or a class, e.g. every PlayerSprite's pymunk_moved.
+    """
+    def __init__(self):
+        self.enabled = False
+        self.hooks = []
+        self.clock = time.perf_counter
+
+        # Time and calls per section in the frame being recorded
+        self.frame_times = {}
+        self.frame_calls = {}
+        self.frame_start = None
+        self.frame_count = 0
+
+        # Rolling per-frame totals for each section, and the recorded trace
+        self.windows = {}
+        self.trace = deque(maxlen=c.PROFILER_TRACE_FRAMES)
+
+    def enable(self, hooks):
+        """
+        Start profiling.
+        :param hooks: (owner, method name, section name) for every method to
+        time. The owner can be an object or a class.
+        :return:
+        """
+        if self.enabled:
+            return
+
+        self.enabled = True
+        self.frame_times = {}
+        self.frame_calls = {}
+        self.frame_start = self.clock()
+        self.frame_count = 0
+        self.windows = {}
+        self.trace.clear()
+
+        for owner, attribute, name in hooks:
+            self.instrument(owner, attribute, name)
+
+    def disable(self):
+        """
+        Stop profiling and put back every method that was being timed.
+        :return:
+        """
+        if not self.enabled:
+            return
+
+        self.enabled = False
+
+        for owner, attribute, original in reversed(self.hooks):
+            if original is None:
+                delattr(owner, attribute)
+            else:
+                setattr(owner, attribute, original)
+
+        self.hooks = []
+
+    def instrument(self, owner, attribute: str, name: str):
+        """
+        Replace a method with a wrapper that adds its run time to a section.
+        :param owner: Object or class the method is looked up on
+        :param attribute: Method name
+        :param name: Section name
+        :return:
+        """
+        method = getattr(owner, attribute)
+        clock = self.clock
+        frame_times = self.frame_times
+        frame_calls = self.frame_calls
+        frame_times.setdefault(name, 0.0)
+        frame_calls.setdefault(name, 0)
+
+        def timed(*args, **kwargs):
+            start = clock()
+
+            try:
+                return method(*args, **kwargs)
+            finally:
+                frame_times[name] += clock() - start
+                frame_calls[name] += 1
+
+        # Remember whether the owner defined the attribute itself, so
+        # disabling can restore it exactly
+        self.hooks.append((owner, attribute, vars(owner).get(attribute)))
+        setattr(owner, attribute, timed)
+
+    def end_frame(self):
+        """
+        Close the frame being recorded: add each section's total to its
+        rolling window and to the trace, then start a new frame.
+        :return:
+        """
+        now = self.clock()
+        times = dict(self.frame_times, frame=now - self.frame_start)
+        calls = dict(self.frame_calls, frame=1)
+        self.frame_start = now
+
+        for name, duration in times.items():
+            window = self.windows.get(name)
+
+            if window is None:
+                window = deque(maxlen=c.PROFILER_WINDOW_FRAMES)
+                self.windows[name] = window
+
+            window.append(duration)
+
+        self.trace.append((self.frame_count, times, calls))
+        self.frame_count += 1
+
+        for name in self.frame_times:
+            self.frame_times[name] = 0.0
+            self.frame_calls[name] = 0
+
+    def percentiles(self) -> dict:
+        """
+        Rolling percentiles of each section's time per frame.
+        :return: Dict of section name -> {'p50': ms, 'p95': ms, 'p99': ms}
+        """
+        stats = {}
+
+        for name, window in self.windows.items():
+            values = np.percentile(np.fromiter(window, float), PERCENTILES)
+            stats[name] = {
+                f'p{percentile}': value * 1000
+                for percentile, value in zip(PERCENTILES, values.tolist())
+            }
+
+        return stats
+
+    def export(self, path: str):
+        """
+        Write the recorded trace to a file: JSON, with the percentiles, if
+        the path ends in .json, otherwise CSV with one row per section per
+        frame.
+        :param path:
+        :return:
+        """
+        if path.endswith('.json'):
+            with open(path, 'w') as trace_file:
+                json.dump(
+                    {
+                        'percentiles_ms': self.percentiles(),
+                        'frames': [
+                            {
+                                'frame': frame,
+                                'ms': {
+                                    name: duration * 1000
+                                    for name, duration in times.items()
+                                },
+                                'calls': calls,
+                            }
+                            for frame, times, calls in self.trace
+                        ],
+                    },
+                    trace_file,
+                    indent=2
+                )
+        else:
+            with open(path, 'w', newline='') as trace_file:
+                writer = csv.writer(trace_file)
+                writer.writerow(('frame', 'section', 'ms', 'calls'))
+
+                for frame, times, calls in self.trace:
+                    for name, duration in times.items():
+                        writer.writerow(
+                            (frame, name, duration * 1000, calls[name])
+                        )
+
+
+class ProfilerOverlay:
+    """
+    Lists each profiled section's rolling percentiles, in milliseconds, down
+    the top left of the screen. The text is only refreshed every few frames.
+    """
+    def __init__(self, profiler: FrameProfiler, top: float):
+        """
+        :param profiler:
+        :param top: Y coordinate of the first line
+        """
+        self.profiler = profiler
+        self.top = top
+        self.hud = Hud()
+        self.rows = []
+        self.frames_until_refresh = 0
+
+    def refresh(self):
+        """
+        Rewrite the overlay text from the profiler's current percentiles.
+        :return:
+        """
+        rows = [('section', *(f'p{percentile}' for percentile in PERCENTILES))]
+
+        for name, stats in sorted(self.profiler.percentiles().items()):
+            rows.append((name, *(f'{value:.2f}' for value in stats.values())))
+
+        for row_index, row in enumerate(rows[len(self.rows):], len(self.rows)):
+            self.add_row(row_index, row)
+
+        for row_index, row in enumerate(rows):
+            for column, text in enumerate(row):
+                self.hud.set_text(self.rows[row_index][column], text)
+
+    def add_row(self, row_index: int, row):
+        """
+        Add the labels for one row: the section name on the left, then the
+        percentiles right aligned in their columns.
+        :param row_index:
+        :param row: Text of each column
+        :return:
+        """
+        start_y = self.top - (row_index + 1) * c.PROFILER_LINE_HEIGHT
+        names = []
+
+        for column, text in enumerate(row):
+            name = f'profiler_{row_index}_{column}'
+
+            if column == 0:
+                start_x = c.PROFILER_START_X
+                anchor_x = 'left'
+            else:
+                start_x = (
+                    c.PROFILER_START_X
+                    + c.PROFILER_NAME_WIDTH
+                    + column * c.PROFILER_COLUMN_WIDTH
+                )
+                anchor_x = 'right'
+
+            self.hud.add_label(
+                name,
+                text,
+                start_x,
+                start_y,
+                font_size=c.PROFILER_FONT_SIZE,
+                anchor_x=anchor_x
+            )
+            names.append(name)
+
+        self.rows.append(names)
+
+    def draw(self):
+        """
+        Draw the overlay, refreshing its text first when it's due.
+        :return:
+        """
+        if self.frames_until_refresh <= 0:
+            self.refresh()
+            self.frames_until_refresh = c.PROFILER_OVERLAY_REFRESH_FRAMES
+
+        self.frames_until_refresh -= 1
+        self.hud.draw()
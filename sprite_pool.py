@@ -0,0 +1,56 @@
+import pymunk
+from collections import defaultdict
+
+
+class SpritePool:
+    """
+    Sprites taken out of the world, kept together with their physics bodies
+    and shapes so they can be reinitialised and put back instead of building
+    new ones.
+
+    Sprites are pooled by kind, e.g. the layer and texture of a tile, and any
+    free sprite of a kind can stand in for any other sprite of that kind.
+    """
+    def __init__(self):
+        self.free = defaultdict(list)
+
+        # Sprites handed back out of the pool, for profiling
+        self.reused = 0
+
+    def acquire(self, kind):
+        """
+        Take a free sprite of a kind out of the pool.
+        :param kind: Key the sprite was released under
+        :return: (sprite, physics object or None), or None if there is no
+        free sprite of that kind
+        """
+        free = self.free.get(kind)
+
+        if not free:
+            return None
+
+        self.reused += 1
+
+        return free.pop()
+
+    def release(self, kind, sprite, physics_object=None):
+        """
+        Return a sprite that has been removed from the world to the pool. Its
+        body, if it has one, is brought to rest.
+        :param kind: Key to pool the sprite under
+        :param sprite:
+        :param physics_object: The body and shape the sprite had in the
+        physics engine
+        :return:
+        """
+        if physics_object is not None:
+            body = physics_object.body
+
+            if body.body_type != pymunk.Body.STATIC:
+                body.velocity = (0, 0)
+                body.angular_velocity = 0
+
+        self.free[kind].append((sprite, physics_object))
+
+    def __len__(self):
+        return sum(len(free) for free in self.free.values())
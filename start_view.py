@@ -1,29 +1,32 @@
 import arcade
 import constants as c
-from game_view import GameView
+from typing import Optional
+from hud import Hud
+from loading_view import LoadingView
 
 
 class StartView(arcade.View):
     """
     Opening screen for the game that displays the title and instructions.
     """
+    def __init__(self):
+        super(StartView, self).__init__()
+
+        self.text: Optional[Hud] = None
+
     def on_show_view(self):
         """
         Set the start screen's background color and sets the viewport to match
-        the screen dimensions.
+        the screen dimensions, and lay out the title and instructions.
         :return:
         """
         arcade.set_background_color(arcade.csscolor.DARK_SLATE_BLUE)
         arcade.set_viewport(0, self.window.width, 0, self.window.height)
 
-    def on_draw(self):
-        """
-        Display the game title and instructions on the start screen.
-        :return:
-        """
-        self.clear()
+        self.text = Hud()
 
-        arcade.draw_text(
+        self.text.add_label(
+            'title',
             c.TITLE,
             self.window.width / 2,
             self.window.height / 2,
@@ -32,7 +35,8 @@ class StartView(arcade.View):
             anchor_x='center'
         )
 
-        arcade.draw_text(
+        self.text.add_label(
+            'instructions',
             c.INSTRUCTIONS,
             self.window.width / 2,
             self.window.height / 2 - 75,
@@ -41,14 +45,22 @@ class StartView(arcade.View):
             anchor_x='center'
         )
 
+    def on_draw(self):
+        """
+        Display the game title and instructions on the start screen.
+        :return:
+        """
+        self.clear()
+        self.text.draw()
+
     def on_mouse_press(self, x: int, y: int, button: int, modifiers: int):
         """
-        Start the game when the player clicks anywhere on the screen.
+        Start loading the game when the player clicks anywhere on the screen.
         :param x:
         :param y:
         :param button:
         :param modifiers:
         :return:
         """
-        game_view = GameView()
-        self.window.show_view(game_view)
+        loading_view = LoadingView()
+        self.window.show_view(loading_view)
@@ -0,0 +1,56 @@
+import tracemalloc
+import pytest
+import benchmark
+import constants as c
+from game_world import GameWorld
+
+# Ticks to run first, so chunks, pools and scratch arrays are all in place
+WARM_TICKS = 1800
+
+MEASURED_TICKS = 300
+
+# What a tick still allocates and frees again is library-side: numpy's ufunc
+# calls, the Vec2d pymunk returns for each body position read by arcade's
+# resync_sprites, and pymunk's segment queries. About 1.6 KB on the default
+# map.
+TICK_ALLOCATION_BUDGET_BYTES = 2560
+
+
+@pytest.fixture(scope='module')
+def allocations():
+    world = GameWorld()
+    world.setup(c.MAP_SRC)
+    inputs = benchmark.script_inputs(benchmark.DEFAULT_SCRIPT)
+
+    for _ in range(WARM_TICKS):
+        benchmark.set_inputs(world, next(inputs))
+        world.step(1 / c.PHYSICS_STEP_RATE)
+
+    tracemalloc.start()
+
+    try:
+        return benchmark.tick_allocations(world, inputs, MEASURED_TICKS)
+    finally:
+        tracemalloc.stop()
+
+
+def test_ticks_hold_no_game_memory(allocations):
+    assert abs(allocations['game_held_bytes']) <= 256
+
+
+def test_ticks_allocate_within_budget(allocations):
+    assert allocations['median_bytes'] <= TICK_ALLOCATION_BUDGET_BYTES
+
+
+def test_script_inputs_reuse_key_sets():
+    inputs = benchmark.script_inputs([
+        {'ticks': 2, 'keys': ['right']},
+        {'ticks': 1, 'keys': []},
+    ])
+    first_pass = [next(inputs) for _ in range(3)]
+    second_pass = [next(inputs) for _ in range(3)]
+
+    assert first_pass == [{'right'}, {'right'}, set()]
+    assert all(
+        first is second for first, second in zip(first_pass, second_pass)
+    )
@@ -0,0 +1,134 @@
+import math
+import arcade
+import pytest
+from camera_controller import CameraController
+
+VIEW_WIDTH = 800
+VIEW_HEIGHT = 600
+MAP_WIDTH = 4000
+MAP_HEIGHT = 2000
+
+
+@pytest.fixture(scope='module')
+def window():
+    window = arcade.Window(VIEW_WIDTH, VIEW_HEIGHT, visible=False)
+    yield window
+    window.close()
+
+
+@pytest.fixture
+def controller(window):
+    return CameraController(
+        arcade.Camera(VIEW_WIDTH, VIEW_HEIGHT),
+        MAP_WIDTH,
+        MAP_HEIGHT,
+        dead_zone_width=200,
+        dead_zone_height=100,
+        follow_rate=10
+    )
+
+
+def test_clamp_keeps_view_inside_map(controller):
+    assert controller.clamp(-50, -50) == (0, 0)
+    assert controller.clamp(100, 200) == (100, 200)
+    assert controller.clamp(MAP_WIDTH, MAP_HEIGHT) == (
+        MAP_WIDTH - VIEW_WIDTH,
+        MAP_HEIGHT - VIEW_HEIGHT
+    )
+
+
+def test_clamp_small_map_shows_bottom_left(window):
+    controller = CameraController(
+        arcade.Camera(VIEW_WIDTH, VIEW_HEIGHT),
+        VIEW_WIDTH / 2,
+        VIEW_HEIGHT / 2
+    )
+
+    assert controller.clamp(100, 100) == (0, 0)
+
+
+def test_snap_centers_on_point(controller):
+    version = controller.version
+    controller.snap(2000, 1000)
+
+    assert (controller.left, controller.bottom) == (1600, 700)
+    assert (controller.goal_left, controller.goal_bottom) == (1600, 700)
+    assert controller.version == version + 1
+    assert controller.dirty
+
+
+def test_update_ignores_target_inside_dead_zone(controller):
+    controller.snap(2000, 1000)
+    version = controller.version
+
+    assert not controller.update(2090, 1040, 1 / 60)
+    assert (controller.left, controller.bottom) == (1600, 700)
+    assert controller.version == version
+
+
+def test_update_eases_after_target(controller):
+    controller.snap(2000, 1000)
+    version = controller.version
+
+    # 400 px right of center is 300 px outside the dead zone
+    assert controller.update(2400, 1000, 1 / 60)
+
+    step = 1 - math.exp(-10 / 60)
+    assert controller.goal_left == 1900
+    assert controller.left == pytest.approx(1600 + 300 * step)
+    assert controller.bottom == 700
+    assert controller.version == version + 1
+
+
+def test_update_lands_on_goal(controller):
+    controller.snap(2000, 1000)
+
+    for _ in range(600):
+        if not controller.update(2400, 1000, 1 / 60):
+            break
+
+    assert controller.left == controller.goal_left == 1900
+    assert not controller.update(2400, 1000, 1 / 60)
+
+
+def test_update_is_frame_rate_independent(window):
+    def follow(frame_rate):
+        controller = CameraController(
+            arcade.Camera(VIEW_WIDTH, VIEW_HEIGHT),
+            MAP_WIDTH,
+            MAP_HEIGHT,
+            follow_rate=5
+        )
+        controller.snap(2000, 1000)
+
+        for _ in range(frame_rate // 2):
+            controller.update(3000, 1000, 1 / frame_rate)
+
+        return controller.left
+
+    assert follow(30) == pytest.approx(follow(120))
+
+
+def test_update_stays_inside_map(controller):
+    controller.snap(0, 0)
+
+    for _ in range(600):
+        controller.update(-1000, -1000, 1 / 60)
+
+    assert (controller.left, controller.bottom) == (0, 0)
+
+
+def test_instant_follow(window):
+    controller = CameraController(
+        arcade.Camera(VIEW_WIDTH, VIEW_HEIGHT),
+        MAP_WIDTH,
+        MAP_HEIGHT,
+        dead_zone_width=0,
+        dead_zone_height=0,
+        follow_rate=math.inf
+    )
+    controller.snap(2000, 1000)
+    controller.update(2500, 1200, 1 / 60)
+
+    assert (controller.left, controller.bottom) == (2100, 900)
+
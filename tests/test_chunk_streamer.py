@@ -0,0 +1,71 @@
+import constants as c
+from game_world import GameWorld
+
+
+def make_world():
+    world = GameWorld()
+    world.setup(c.MAP_SRC)
+
+    return world
+
+
+def test_only_chunks_with_content_are_loaded():
+    world = make_world()
+    streamer = world.streamer
+    world.stream_around_player()
+
+    assert streamer.loaded
+    assert set(streamer.loaded) <= set(world.level['chunks'])
+
+
+def test_empty_view_loads_nothing():
+    world = make_world()
+    streamer = world.streamer
+    _, height = world.map_size()
+
+    # Far above the map, where it has no chunks
+    streamer.update(0, height * 10, c.SCREEN_WIDTH_PX, c.SCREEN_HEIGHT_PX)
+
+    assert streamer.loaded == {}
+
+
+def test_parked_sprite_returns_over_empty_area():
+    world = make_world()
+    streamer = world.streamer
+    world.stream_around_player()
+    sprite = next(iter(streamer.active))
+    empty_key = (-100, -100)
+
+    streamer.park(sprite, empty_key)
+    assert sprite not in streamer.active
+
+    streamer.load_chunk(empty_key)
+
+    assert sprite in streamer.active
+    assert empty_key not in streamer.loaded
+
+
+def test_shared_platform_shape_stays_while_a_chunk_uses_it():
+    world = make_world()
+    streamer = world.streamer
+    space = world.physics_engine.space
+    _, height = world.map_size()
+    streamer.update(0, height * 10, c.SCREEN_WIDTH_PX, c.SCREEN_HEIGHT_PX)
+    left = set(world.level['chunks'][(0, 0)]['platform_shapes'])
+    right = set(world.level['chunks'][(1, 0)]['platform_shapes'])
+    shared = left & right
+    assert shared
+
+    streamer.load_chunk((0, 0))
+    streamer.load_chunk((1, 0))
+    streamer.unload_chunk((0, 0))
+
+    for index in shared:
+        assert streamer.platform_shapes[index] in space.shapes
+
+    streamer.unload_chunk((1, 0))
+
+    for index in shared:
+        assert streamer.platform_shapes[index] not in space.shapes
+
+    assert streamer.platform_shape_users == {}
@@ -0,0 +1,153 @@
+import constants as c
+from enemy_sprite import EnemySprite
+from game_world import GameWorld
+
+# Top of the ground along the bottom of the default map
+FLOOR_TOP = 64
+
+# Inner side of the wall along the right edge of the default map
+WALL_LEFT = 1577
+
+# Right end and top of a platform high above the ground
+LEDGE_RIGHT = 1472
+LEDGE_TOP = 576
+
+
+def make_world():
+    world = GameWorld()
+    world.setup(c.MAP_SRC)
+
+    return world
+
+
+def spawn_enemy(world, center_x, ground_top, patrol_direction=1):
+    enemy = EnemySprite()
+    enemy.patrol_direction = patrol_direction
+    enemy.center_x = center_x
+    enemy.bottom = ground_top
+    world.add_enemy_sprite(enemy)
+
+    return enemy
+
+
+def move_player(world, position):
+    world.player_sprite.position = position
+    world.physics_engine.set_position(world.player_sprite, position)
+
+
+def velocity_x(world, enemy):
+    return world.physics_engine.sprites[enemy].body.velocity.x
+
+
+def test_patrolling_enemy_keeps_walking_on_open_ground():
+    world = make_world()
+    enemy = spawn_enemy(world, 250, FLOOR_TOP)
+    move_player(world, (1300, LEDGE_TOP + 64))
+
+    world.enemy_controller.update()
+
+    assert enemy.state == c.ENEMY_STATE_PATROL
+    assert enemy.patrol_direction == 1
+    assert velocity_x(world, enemy) == c.ENEMY_PATROL_SPEED
+
+
+def test_patrolling_enemy_turns_at_wall():
+    world = make_world()
+    enemy = spawn_enemy(world, 0, FLOOR_TOP)
+    enemy.right = WALL_LEFT - 1
+    world.physics_engine.set_position(enemy, enemy.position)
+    move_player(world, (1300, LEDGE_TOP + 64))
+
+    world.enemy_controller.update()
+
+    assert enemy.state == c.ENEMY_STATE_PATROL
+    assert enemy.patrol_direction == -1
+    assert enemy.walk_direction == -1
+    assert velocity_x(world, enemy) == -c.ENEMY_PATROL_SPEED
+
+
+def test_patrolling_enemy_turns_at_ledge():
+    world = make_world()
+    enemy = spawn_enemy(world, 0, LEDGE_TOP)
+    enemy.right = LEDGE_RIGHT - 1
+    world.physics_engine.set_position(enemy, enemy.position)
+
+    world.enemy_controller.update()
+
+    assert enemy.state == c.ENEMY_STATE_PATROL
+    assert enemy.patrol_direction == -1
+    assert velocity_x(world, enemy) == -c.ENEMY_PATROL_SPEED
+
+
+def test_enemy_chases_player_in_range():
+    world = make_world()
+    enemy = spawn_enemy(world, 300, FLOOR_TOP)
+    move_player(world, (enemy.center_x - 128, enemy.center_y))
+
+    world.enemy_controller.update()
+
+    assert enemy.state == c.ENEMY_STATE_CHASE
+    assert enemy.walk_direction == -1
+    assert velocity_x(world, enemy) == -c.ENEMY_CHASE_SPEED
+
+    # The player gets away, and the enemy goes back to patrolling
+    move_player(world, (1300, LEDGE_TOP + 64))
+    world.enemy_controller.update()
+
+    assert enemy.state == c.ENEMY_STATE_PATROL
+    assert velocity_x(world, enemy) == c.ENEMY_PATROL_SPEED
+
+
+def test_offscreen_enemy_thinks_every_interval():
+    world = make_world()
+    controller = world.enemy_controller
+    spawn_enemy(world, 1300, LEDGE_TOP)
+    thought_ticks = []
+
+    for _ in range(2 * c.ENEMY_OFFSCREEN_THINK_INTERVAL + 1):
+        controller.update()
+
+        if controller.last_thought:
+            thought_ticks.append(controller.tick)
+
+    assert thought_ticks == [
+        1,
+        1 + c.ENEMY_OFFSCREEN_THINK_INTERVAL,
+        1 + 2 * c.ENEMY_OFFSCREEN_THINK_INTERVAL,
+    ]
+
+
+def test_near_enemy_thinks_every_tick():
+    world = make_world()
+    controller = world.enemy_controller
+    spawn_enemy(world, 300, FLOOR_TOP)
+
+    for _ in range(3):
+        controller.update()
+
+        assert controller.last_thought == 1
+
+
+def test_thinking_stops_when_budget_runs_out():
+    world = make_world()
+    controller = world.enemy_controller
+    enemies = [spawn_enemy(world, x, FLOOR_TOP) for x in (200, 250, 300)]
+
+    # A budget already used up still lets one enemy decide per tick
+    controller.budget = -1.0
+    controller.update()
+
+    assert controller.last_thought == 1
+
+    # Enemies that missed out go first on the next ticks
+    thinkers = set()
+
+    for _ in enemies:
+        controller.update()
+        assert controller.last_thought == 1
+        thinkers.update(
+            enemy for enemy in enemies
+            if enemy.next_think_tick == controller.tick + 1
+        )
+
+    assert thinkers == set(enemies)
@@ -0,0 +1,37 @@
+import pytest
+from fixed_timestep import FixedTimestep
+
+
+def test_steps_add_up_to_frame_time():
+    timestep = FixedTimestep(60, 5)
+    steps = sum(timestep.advance(1 / 144) for _ in range(144))
+
+    # A second of frames makes a second of steps, give or take the remainder
+    assert steps in (59, 60)
+    assert 0 <= timestep.alpha < 1
+
+
+def test_remainder_carries_over():
+    timestep = FixedTimestep(60, 5)
+
+    assert timestep.advance(1.5 / 60) == 1
+    assert timestep.alpha == pytest.approx(0.5)
+    assert timestep.advance(0.75 / 60) == 1
+    assert timestep.alpha == pytest.approx(0.25)
+
+
+def test_short_frames_run_no_steps():
+    timestep = FixedTimestep(60, 5)
+
+    assert timestep.advance(0.4 / 60) == 0
+    assert timestep.alpha == pytest.approx(0.4)
+
+
+def test_backlog_is_dropped():
+    timestep = FixedTimestep(60, 5)
+
+    # A long stall only runs max_steps, and doesn't leave the next frame
+    # behind as well
+    assert timestep.advance(1.0) == 5
+    assert 0 <= timestep.alpha < 1
+    assert timestep.advance(1 / 60) in (1, 2)
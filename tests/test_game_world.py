@@ -0,0 +1,86 @@
+import constants as c
+from game_world import GameWorld
+
+LADDERS_MAP_SRC = ':resources:tiled_maps/map_with_ladders.json'
+
+
+def make_world(map_src=LADDERS_MAP_SRC):
+    world = GameWorld()
+    world.setup(map_src)
+
+    return world
+
+
+def move_player(world, position):
+    world.physics_engine.set_position(world.player_sprite, position)
+    world.physics_engine.set_velocity(world.player_sprite, (0, 0))
+
+
+def test_touching_collectible_picks_it_up():
+    world = make_world()
+    coins = world.scene[c.LAYER_COINS]
+    coin = coins[0]
+    key = world.streamer.sprite_keys[coin]
+    points = world.level['layers'][c.LAYER_COINS]['points'][key[1]]
+    remaining = world.remaining_collectibles(c.LAYER_COINS)
+
+    move_player(world, coin.position)
+    world.step(1 / c.PHYSICS_STEP_RATE)
+
+    assert world.player_sprite.score == points
+    assert coin not in coins
+    assert key in world.streamer.collected
+    assert world.remaining_collectibles(c.LAYER_COINS) == remaining - 1
+
+
+def test_collected_sprite_is_not_rebuilt():
+    world = make_world()
+    streamer = world.streamer
+    coin = world.scene[c.LAYER_COINS][0]
+    key = streamer.sprite_keys[coin]
+    move_player(world, coin.position)
+    world.step(1 / c.PHYSICS_STEP_RATE)
+    remaining = world.remaining_collectibles(c.LAYER_COINS)
+
+    # Unload every chunk by looking far above the map, then come back
+    _, height = world.map_size()
+    streamer.update(0, height * 10, c.SCREEN_WIDTH_PX, c.SCREEN_HEIGHT_PX)
+    assert not streamer.loaded
+
+    world.stream_around_player()
+
+    assert streamer.loaded
+    assert key not in streamer.sprite_keys.values()
+    assert world.remaining_collectibles(c.LAYER_COINS) == remaining
+
+
+def test_each_collectible_is_counted_once():
+    world = make_world()
+    coin = world.scene[c.LAYER_COINS][0]
+    move_player(world, coin.position)
+
+    for _ in range(10):
+        world.step(1 / c.PHYSICS_STEP_RATE)
+        move_player(world, coin.position)
+
+    points = world.level['layers'][c.LAYER_COINS]['points']
+    assert world.player_sprite.score == sum(
+        points[index] for _, index in world.streamer.collected
+    )
+    assert world.player_sprite.score > 0
+
+
+def test_idle_bodies_fall_asleep():
+    world = make_world(c.MAP_SRC)
+
+    for _ in range(5 * c.PHYSICS_STEP_RATE):
+        world.step(1 / c.PHYSICS_STEP_RATE)
+
+    _, sleeping = world.count_bodies()
+    awake = world.awake_sprites()
+
+    assert sleeping > 0
+    assert all(
+        not world.physics_engine.sprites[sprite].body.is_sleeping
+        for sprite in awake
+    )
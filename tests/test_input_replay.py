@@ -0,0 +1,82 @@
+import constants as c
+import input_replay
+
+SEED = 7
+TICKS = 240
+
+
+def script_mask(tick):
+    # Walk right, jumping now and then
+    if tick % 60 < 4:
+        return input_replay.INPUT_RIGHT | input_replay.INPUT_UP
+
+    return input_replay.INPUT_RIGHT
+
+
+def play(world, ticks=TICKS, recorder=None):
+    for tick in range(ticks):
+        input_replay.apply_input_mask(world, script_mask(tick))
+
+        if recorder is not None:
+            recorder.record(input_replay.input_mask(world))
+
+        world.step(1 / c.PHYSICS_STEP_RATE)
+
+
+def test_input_mask_round_trip():
+    world = input_replay.create_world(c.MAP_SRC, SEED)
+
+    for mask in range(16):
+        input_replay.apply_input_mask(world, mask)
+        assert input_replay.input_mask(world) == mask
+
+
+def test_same_inputs_give_same_digest():
+    first = input_replay.create_world(c.MAP_SRC, SEED)
+    second = input_replay.create_world(c.MAP_SRC, SEED)
+    play(first)
+    play(second)
+
+    assert (
+        input_replay.state_digest(first) == input_replay.state_digest(second)
+    )
+
+
+def test_digest_changes_with_state():
+    world = input_replay.create_world(c.MAP_SRC, SEED)
+    before = input_replay.state_digest(world)
+    play(world)
+
+    assert input_replay.state_digest(world) != before
+
+
+def test_replay_matches_recording(tmp_path):
+    path = str(tmp_path / 'run.ppir')
+    world = input_replay.create_world(c.MAP_SRC, SEED)
+    recorder = input_replay.InputRecorder(path, c.MAP_SRC, SEED)
+    play(world, recorder=recorder)
+    recorder.close(world)
+
+    recording = input_replay.read_recording(path)
+    assert recording['seed'] == SEED
+    assert recording['map_src'] == c.MAP_SRC
+    assert list(recording['masks']) == [script_mask(t) for t in range(TICKS)]
+
+    results = input_replay.replay(path)
+    assert results['ticks'] == TICKS
+    assert results['matches_recording'] is True
+    assert results['state_digest'] == input_replay.state_digest(world).hex()
+
+
+def test_long_runs_are_split(tmp_path):
+    path = str(tmp_path / 'idle.ppir')
+    world = input_replay.create_world(c.MAP_SRC, SEED)
+    recorder = input_replay.InputRecorder(path, c.MAP_SRC, SEED)
+    ticks = input_replay.MAX_RUN_TICKS + 10
+
+    for _ in range(ticks):
+        recorder.record(0)
+
+    recorder.close(world)
+
+    assert input_replay.read_recording(path)['masks'] == bytes(ticks)
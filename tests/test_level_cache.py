@@ -0,0 +1,153 @@
+import os
+import arcade
+import pytest
+import constants as c
+import level_cache
+
+ANIMATED_MAP_SRC = ':resources:tiled_maps/test_map_2.json'
+
+
+def compile_map(map_src):
+    return level_cache.compile_level(
+        str(arcade.resources.resolve_resource_path(map_src))
+    )
+
+
+def animated_records(level, layer_name):
+    return [
+        record for record in level['layers'][layer_name]['sprites']
+        if record['frames']
+    ]
+
+
+def test_compile_animated_tiles():
+    level = compile_map(ANIMATED_MAP_SRC)
+
+    assert level['version'] == level_cache.CACHE_VERSION
+    assert level['layers']['Coins']['animated']
+    assert not level['layers']['Platforms']['animated']
+
+    for record in animated_records(level, 'Coins'):
+        # An animated sprite starts on its first frame
+        assert record['texture'] == record['frames'][0][2]
+
+        for _, duration, index in record['frames']:
+            texture_args, _ = level['textures'][index]
+            assert duration > 0
+            assert str(texture_args['filename']).endswith('.png')
+
+
+def test_platforms_merge_across_chunks():
+    level = compile_map(c.MAP_SRC)
+    chunk_size = level['chunk_size']
+    shapes = level['platform_shapes']
+
+    # The ground runs across the chunk boundary as one shape
+    ground = [
+        index for index, points in enumerate(shapes)
+        if min(x for x, _ in points) < chunk_size < max(x for x, _ in points)
+    ]
+    assert ground
+
+    for index in ground:
+        assert index in level['chunks'][(0, 0)]['platform_shapes']
+        assert index in level['chunks'][(1, 0)]['platform_shapes']
+
+    assert level['platform_shape_counts']['merged'] == len(shapes)
+
+
+def test_build_animated_sprite():
+    level = compile_map(ANIMATED_MAP_SRC)
+    record = animated_records(level, 'Coins')[0]
+
+    sprite = level_cache.build_sprite(level, record)
+
+    assert isinstance(sprite, arcade.AnimatedTimeBasedSprite)
+    assert len(sprite.frames) == len(record['frames'])
+    assert sprite.texture is sprite.frames[0].texture
+    assert sprite.position == record['position']
+    assert (sprite.width, sprite.height) == record['size']
+
+    # Past the first frame's duration the next frame shows, and applying
+    # the record again starts the animation over
+    sprite.update_animation(record['frames'][0][1] / 1000 + 0.01)
+    assert sprite.texture is sprite.frames[1].texture
+
+    level_cache.apply_record(sprite, record)
+    assert sprite.texture is sprite.frames[0].texture
+
+
+def test_build_still_sprite():
+    level = compile_map(c.MAP_SRC)
+    record = level['layers']['Platforms']['sprites'][0]
+
+    sprite = level_cache.build_sprite(level, record)
+
+    assert not isinstance(sprite, arcade.AnimatedTimeBasedSprite)
+    assert sprite.position == record['position']
+    assert tuple(map(tuple, sprite.get_hit_box())) == (
+        level['textures'][record['texture']][1]
+    )
+
+
+
+def test_cache_key_tells_same_named_maps_apart(tmp_path):
+    keys = {
+        level_cache.cache_key(str(tmp_path / 'a' / 'level.json')),
+        level_cache.cache_key(str(tmp_path / 'b' / 'level.json')),
+        level_cache.cache_key(str(tmp_path / 'a' / 'level.tmx')),
+    }
+
+    assert len(keys) == 3
+    assert all(key.startswith('level-') for key in keys)
+
+
+def test_write_keeps_other_maps_caches():
+    first_key = level_cache.cache_key('/maps/a/level.json')
+    second_key = level_cache.cache_key('/maps/b/level.json')
+
+    def cache_path(key, digest):
+        return os.path.join(c.LEVEL_CACHE_DIR, f'{key}-{digest}.pickle')
+
+    level_cache.write_level_cache(cache_path(first_key, 1), first_key, {})
+    level_cache.write_level_cache(cache_path(second_key, 1), second_key, {})
+
+    # A new version of the first map replaces only its own older cache
+    level_cache.write_level_cache(cache_path(first_key, 2), first_key, {})
+
+    assert sorted(os.listdir(c.LEVEL_CACHE_DIR)) == sorted([
+        os.path.basename(cache_path(first_key, 2)),
+        os.path.basename(cache_path(second_key, 1)),
+    ])
+
+
+TMX_MAP = '''<?xml version="1.0" encoding="UTF-8"?>
+<map version="1.9" orientation="orthogonal" width="1" height="1"
+     tilewidth="128" tileheight="128">
+ <tileset firstgid="1" source="tiles.tsx"/>
+</map>
+'''
+
+TMJ_MAP = '{"tilesets": [{"firstgid": 1, "source": "tiles.tsj"}]}'
+
+
+@pytest.mark.parametrize('map_name, map_contents, tileset_name', [
+    ('level.tmx', TMX_MAP, 'tiles.tsx'),
+    ('level.tmj', TMJ_MAP, 'tiles.tsj'),
+    ('level.json', TMJ_MAP, 'tiles.tsj'),
+])
+def test_digest_covers_external_tilesets(
+        tmp_path,
+        map_name,
+        map_contents,
+        tileset_name
+):
+    map_path = tmp_path / map_name
+    map_path.write_text(map_contents)
+    tileset_path = tmp_path / tileset_name
+    tileset_path.write_text('first')
+    before = level_cache.map_digest(str(map_path))
+
+    tileset_path.write_text('second')
+
+    assert level_cache.map_digest(str(map_path)) != before
@@ -0,0 +1,56 @@
+import constants as c
+import playtest
+
+LADDERS_MAP_SRC = ':resources:tiled_maps/map_with_ladders.json'
+
+
+def test_default_map_does_not_finish_at_once():
+    playthrough = playtest.Playthrough(c.MAP_SRC, 0, 120)
+
+    while not playthrough.finished:
+        playthrough.step()
+
+    results = playthrough.results()
+
+    # The default map has no collectibles, so there is nothing to complete
+    assert playthrough.ticks == 120
+    assert results['completed'] is None
+    assert results['ticks_to_finish'] is None
+
+
+def test_level_without_goal_has_no_completion_rate():
+    games = playtest.play(c.MAP_SRC, [0, 1], 60)
+    summary = playtest.aggregate(games)
+
+    assert summary['no_completion_goal'] == 2
+    assert summary['completed'] == 0
+    assert summary['completion_rate'] is None
+    assert summary['ticks_to_finish'] is None
+
+
+def test_level_with_collectibles_has_goal():
+    playthrough = playtest.Playthrough(LADDERS_MAP_SRC, 0, 60)
+
+    while not playthrough.finished:
+        playthrough.step()
+
+    summary = playtest.aggregate([playthrough.results()])
+
+    assert playthrough.world.has_completion_goal()
+    assert summary['no_completion_goal'] == 0
+    assert summary['completion_rate'] == 0
+
+
+def test_picking_up_everything_completes_level():
+    playthrough = playtest.Playthrough(LADDERS_MAP_SRC, 0, 60)
+    world = playthrough.world
+
+    # Pretend every collectible has been picked up
+    for name in world.streamer.remaining:
+        world.streamer.remaining[name] = 0
+
+    playthrough.step()
+
+    assert playthrough.finished
+    assert playthrough.results()['completed'] is True
+    assert playthrough.results()['ticks_to_finish'] == 1
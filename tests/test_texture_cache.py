@@ -0,0 +1,49 @@
+import constants as c
+import texture_cache
+from enemy_sprite import EnemySprite
+from player_sprite import PlayerSprite
+
+
+def test_sprites_share_frames():
+    first = EnemySprite()
+    second = EnemySprite()
+
+    assert first.character_textures is second.character_textures
+    assert first.frames is second.frames
+    assert first.texture is second.texture
+
+    for state, frames in first.frames.items():
+        for frame, other in zip(frames, second.frames[state]):
+            assert frame[0] is other[0]
+            assert frame[1] is other[1]
+
+
+def test_players_share_frames():
+    first = PlayerSprite()
+    second = PlayerSprite()
+
+    assert first.frames is second.frames
+    assert first.texture is second.texture
+
+
+def test_characters_get_their_own_frames():
+    enemy = EnemySprite()
+    player = PlayerSprite()
+
+    assert enemy.character_textures is not player.character_textures
+    assert enemy.texture is not player.texture
+
+
+def test_cache_is_keyed_by_character():
+    textures = texture_cache.get_character_textures(
+        c.ENEMY_SPRITE_FOLDER,
+        c.ENEMY_SPRITE_FILE
+    )
+
+    assert textures is texture_cache.get_character_textures(
+        c.ENEMY_SPRITE_FOLDER,
+        c.ENEMY_SPRITE_FILE
+    )
+    assert len(textures.all_textures()) == len(
+        {id(texture) for texture in textures.all_textures()}
+    )
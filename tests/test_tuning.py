@@ -0,0 +1,137 @@
+import json
+import os
+import pytest
+import constants as c
+import tuning
+from tuning import Tuning, TuningWatcher, load_tuning
+
+LEVEL = 'pymunk_test_map'
+
+
+def write(path, text):
+    path.write_text(text)
+
+    return str(path)
+
+
+def test_missing_file_gives_defaults(tmp_path):
+    loaded = load_tuning(str(tmp_path / 'missing.toml'))
+
+    assert not loaded.changed(Tuning())
+    assert loaded.gravity == c.GRAVITY
+
+
+def test_toml_level_values_override_global(tmp_path):
+    path = write(tmp_path / 'tuning.toml', f"""
+gravity = 900
+enemy_health = 5
+
+[levels.{LEVEL}]
+gravity = 1200
+
+[levels.other_map]
+enemy_health = 9
+""")
+    loaded = load_tuning(path, c.MAP_SRC)
+
+    assert loaded.gravity == 1200.0
+    assert loaded.enemy_health == 5
+    assert loaded.changed(Tuning()) == {'gravity', 'enemy_health'}
+
+
+def test_json_file(tmp_path):
+    path = write(tmp_path / 'tuning.json', json.dumps({
+        'friction_wall': 0.5,
+        'levels': {LEVEL: {'enemy_health': 4.0}},
+    }))
+    loaded = load_tuning(path, c.MAP_SRC)
+
+    assert loaded.friction_wall == 0.5
+
+    # Whole numbers are converted to the value's type
+    assert loaded.enemy_health == 4
+    assert type(loaded.enemy_health) is int
+    assert type(load_tuning(
+        write(tmp_path / 'int.json', '{"gravity": 900}')
+    ).gravity) is float
+
+
+@pytest.mark.parametrize('text, message', [
+    ('[1, 2]', 'expected a table of tuning values'),
+    ('{"levels": 3}', 'levels should be a table of levels'),
+    (f'{{"levels": {{"{LEVEL}": 3}}}}', f'levels.{LEVEL} should be a table'),
+    ('{"gravty": 900}', "unknown tuning value 'gravty'"),
+    ('{"gravity": "high"}', 'gravity should be a number'),
+    ('{"gravity": true}', 'gravity should be a number'),
+    ('{"enemy_health": 2.5}', 'enemy_health should be a whole number'),
+    (
+        f'{{"levels": {{"{LEVEL}": {{"speed": 1}}}}}}',
+        rf"\[levels.{LEVEL}\]: unknown tuning value 'speed'"
+    ),
+])
+def test_load_errors(tmp_path, text, message):
+    path = write(tmp_path / 'tuning.json', text)
+
+    with pytest.raises(ValueError, match=message):
+        load_tuning(path, c.MAP_SRC)
+
+
+def test_invalid_toml(tmp_path):
+    path = write(tmp_path / 'tuning.toml', 'gravity = ')
+
+    with pytest.raises(ValueError):
+        load_tuning(path, c.MAP_SRC)
+
+
+def test_check_values_converts_types():
+    assert tuning._check_values(
+        {'gravity': 3, 'enemy_health': 3.0},
+        'test'
+    ) == {'gravity': 3.0, 'enemy_health': 3}
+
+
+def test_level_name():
+    assert tuning.level_name(c.MAP_SRC) == LEVEL
+
+
+def test_watcher_reloads_changed_file(tmp_path):
+    path = write(tmp_path / 'tuning.toml', 'gravity = 900')
+    watcher = TuningWatcher(path, c.MAP_SRC, interval=0.5)
+
+    assert watcher.load().gravity == 900.0
+
+    # Nothing happens until the interval has passed, or if the file is the
+    # same
+    assert watcher.poll(0.1) is None
+    assert watcher.poll(0.5) is None
+
+    write(tmp_path / 'tuning.toml', 'gravity = 1200.0')
+    stamp = os.stat(path)
+    os.utime(path, ns=(stamp.st_atime_ns, stamp.st_mtime_ns + 10 ** 9))
+
+    assert watcher.poll(0.1) is None
+    assert watcher.poll(0.5).gravity == 1200.0
+    assert watcher.poll(0.5) is None
+
+
+def test_watcher_picks_up_new_file(tmp_path):
+    path = str(tmp_path / 'tuning.toml')
+    watcher = TuningWatcher(path, c.MAP_SRC, interval=0)
+
+    assert not watcher.load().changed(Tuning())
+    assert watcher.poll(0) is None
+
+    write(tmp_path / 'tuning.toml', 'enemy_health = 7')
+
+    assert watcher.poll(0).enemy_health == 7
+
+
+def test_toml_without_parser(tmp_path, monkeypatch):
+    monkeypatch.setattr(tuning, 'tomllib', None)
+    toml_path = write(tmp_path / 'tuning.toml', 'gravity = 900')
+    json_path = write(tmp_path / 'tuning.json', '{"gravity": 900}')
+
+    with pytest.raises(ValueError, match='use a .json tuning file'):
+        load_tuning(toml_path, c.MAP_SRC)
+
+    assert load_tuning(json_path, c.MAP_SRC).gravity == 900.0
@@ -0,0 +1,35 @@
+import arcade
+import constants as c
+import validate_levels
+
+
+def map_path(name):
+    return str(arcade.resources.resolve_resource_path(
+        f':resources:tiled_maps/{name}'
+    ))
+
+
+def test_map_with_animated_tiles_is_valid():
+    result = validate_levels.validate_map(map_path('map_with_ladders.json'))
+
+    assert result['ok'], result['errors']
+    assert result['stats']['animated_tiles'] > 0
+
+
+def test_animated_map_missing_layers_compiles():
+    result = validate_levels.validate_map(map_path('test_map_2.json'))
+
+    # Only the missing layer is reported, not a failure to load
+    assert result['errors'] == [
+        f'missing layer {c.LAYER_MOVING_PLATFORMS!r}'
+    ]
+    assert result['stats']['animated_tiles'] > 0
+
+
+def test_default_map_is_valid():
+    result = validate_levels.validate_map(
+        str(arcade.resources.resolve_resource_path(c.MAP_SRC))
+    )
+
+    assert result['ok'], result['errors']
+    assert result['warnings'] == []
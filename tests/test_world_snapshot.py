@@ -0,0 +1,75 @@
+import pytest
+import constants as c
+import input_replay
+import world_snapshot
+
+LADDERS_MAP_SRC = ':resources:tiled_maps/map_with_ladders.json'
+
+
+def play(world, ticks, offset=0):
+    for tick in range(offset, offset + ticks):
+        mask = input_replay.INPUT_RIGHT
+
+        if tick % 40 < 3:
+            mask |= input_replay.INPUT_UP
+
+        input_replay.apply_input_mask(world, mask)
+        world.step(1 / c.PHYSICS_STEP_RATE)
+
+
+def world_summary(world):
+    streamer = world.streamer
+
+    return (
+        world.player_sprite.score,
+        dict(streamer.remaining),
+        set(streamer.loaded),
+        set(streamer.collected),
+        len(world.physics_engine.sprites),
+        len(world.physics_engine.space.shapes),
+        len(streamer.active),
+    )
+
+
+@pytest.mark.parametrize('map_src', [c.MAP_SRC, LADDERS_MAP_SRC])
+def test_restore_puts_world_back(map_src):
+    world = input_replay.create_world(map_src, 1)
+    play(world, 300)
+    snapshot = world_snapshot.take_snapshot(world)
+    digest = input_replay.state_digest(world)
+    summary = world_summary(world)
+
+    play(world, 300, 300)
+    assert input_replay.state_digest(world) != digest
+
+    world_snapshot.restore_snapshot(world, snapshot)
+
+    assert input_replay.state_digest(world) == digest
+    assert world_summary(world) == summary
+
+
+def test_run_after_restore_stays_close():
+    world = input_replay.create_world(c.MAP_SRC, 1)
+    play(world, 300)
+    snapshot = world_snapshot.take_snapshot(world)
+
+    play(world, 200, 300)
+    first = world.player_sprite.position
+    first_score = world.player_sprite.score
+
+    # Contacts aren't part of a snapshot, so the run that follows is close
+    # to, not bit for bit the same as, the first one
+    world_snapshot.restore_snapshot(world, snapshot)
+    play(world, 200, 300)
+
+    assert world.player_sprite.score == first_score
+    assert world.player_sprite.position.get_distance(first) < 0.01
+
+
+def test_restore_rejects_other_map():
+    world = input_replay.create_world(c.MAP_SRC, 1)
+    snapshot = world_snapshot.take_snapshot(world)
+    other = input_replay.create_world(LADDERS_MAP_SRC, 1)
+
+    with pytest.raises(ValueError, match='Snapshot is of'):
+        world_snapshot.restore_snapshot(other, snapshot)
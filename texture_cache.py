@@ -0,0 +1,90 @@
+import arcade
+import constants as c
+
+
+class CharacterTextures:
+    """
+    Every animation frame for one character, decoded once and shared by all
+    sprites of that character.
+    """
+    def __init__(self, name_folder, name_file):
+        self.sprite_path = f'{c.CHARACTER_SPRITE_PATH}{name_folder}/{name_file}'
+
+        self.idle_pair = arcade.load_texture_pair(
+            f'{self.sprite_path}_idle.png'
+        )
+
+        self.walk_pairs = tuple(
+            arcade.load_texture_pair(f'{self.sprite_path}_walk{i}.png')
+            for i in range(c.WALK_TEXTURES_TOTAL)
+        )
+
+        self.jump_pair = arcade.load_texture_pair(
+            f'{self.sprite_path}_jump.png'
+        )
+
+        self.fall_pair = arcade.load_texture_pair(
+            f'{self.sprite_path}_fall.png'
+        )
+
+        self.climb = tuple(
+            arcade.load_texture(f'{self.sprite_path}_climb{i}.png')
+            for i in range(c.CLIMB_TEXTURES_TOTAL)
+        )
+
+        # Frame table for each animation state. Every frame is a (right
+        # facing, left facing) pair; climbing looks the same both ways.
+        self.frames = {
+            c.ANIMATION_IDLE: (self.idle_pair,),
+            c.ANIMATION_WALK: self.walk_pairs,
+            c.ANIMATION_JUMP: (self.jump_pair,),
+            c.ANIMATION_FALL: (self.fall_pair,),
+            c.ANIMATION_CLIMB: tuple((frame, frame) for frame in self.climb),
+        }
+
+    def all_textures(self):
+        """
+        Every texture in the set, e.g. for packing into a texture atlas.
+        :return: List of textures
+        """
+        textures = [*self.idle_pair, *self.jump_pair, *self.fall_pair]
+
+        for pair in self.walk_pairs:
+            textures.extend(pair)
+
+        textures.extend(self.climb)
+
+        return textures
+
+
+_character_textures = {}
+
+
+def get_character_textures(name_folder, name_file):
+    """
+    Get the shared texture set for a character, loading it on first use.
+    :param name_folder: Character folder in CHARACTER_SPRITE_PATH
+    :param name_file: File name prefix of the character's frames
+    :return: CharacterTextures shared by every sprite of this character
+    """
+    key = (name_folder, name_file)
+    textures = _character_textures.get(key)
+
+    if textures is None:
+        textures = CharacterTextures(name_folder, name_file)
+        _character_textures[key] = textures
+
+    return textures
+
+
+def pack_character_textures(atlas: arcade.TextureAtlas):
+    """
+    Upload every cached character frame into a texture atlas so that
+    animation changes never have to allocate atlas space mid-game.
+    :param atlas: Atlas shared by the game's sprite lists
+    :return:
+    """
+    for textures in _character_textures.values():
+        for texture in textures.all_textures():
+            if not atlas.has_texture(texture):
+                atlas.add(texture)
@@ -0,0 +1,219 @@
+import json
+import os
+from pathlib import Path
+from typing import Optional
+import constants as c
+
+try:
+    import tomllib
+except ModuleNotFoundError:  # Python before 3.11
+    try:
+        import tomli as tomllib
+    except ModuleNotFoundError:
+        tomllib = None
+
+# Every tunable value: name -> (type, default)
+FIELDS = {
+    'gravity': (float, c.GRAVITY),
+    'damping_default': (float, c.DAMPING_DEFAULT),
+    'damping_ladders': (float, c.DAMPING_LADDERS),
+    'friction_player': (float, c.FRICTION_PLAYER),
+    'friction_wall': (float, c.FRICTION_WALL),
+    'friction_dynamic_item': (float, c.FRICTION_DYNAMIC_ITEM),
+    'friction_enemy': (float, c.FRICTION_ENEMY),
+    'move_force_ground_player': (float, c.MOVE_FORCE_GROUND_PLAYER),
+    'move_force_air_player': (float, c.MOVE_FORCE_AIR_PLAYER),
+    'jump_impulse_player': (float, c.JUMP_IMPULSE_PLAYER),
+    'enemy_health': (int, c.ENEMY_HEALTH),
+    'enemy_patrol_speed': (float, c.ENEMY_PATROL_SPEED),
+    'enemy_chase_speed': (float, c.ENEMY_CHASE_SPEED),
+    'score_start_x': (float, c.SCORE_START_X),
+    'gui_start_y': (float, c.GUI_START_Y),
+    'gui_counter_spacing': (float, c.GUI_COUNTER_SPACING),
+}
+
+
+class Tuning:
+    """
+    Physics and gameplay tuning values: the defaults from constants, with
+    whatever a tuning file sets on top. Values are checked and converted to
+    their type once, when the tuning is loaded, and read straight off its
+    slots after that. A changed file makes a new Tuning rather than
+    changing this one.
+    """
+    __slots__ = tuple(FIELDS)
+
+    def __init__(self, **values):
+        """
+        :param values: Values to use instead of the defaults, already checked
+        """
+        for name, (_, default) in FIELDS.items():
+            setattr(self, name, values.get(name, default))
+
+    def changed(self, other: 'Tuning'):
+        """
+        Names of the values that differ from another tuning.
+        :param other:
+        :return: Set of field names
+        """
+        return {
+            name for name in FIELDS
+            if getattr(self, name) != getattr(other, name)
+        }
+
+
+def level_name(map_src: str) -> str:
+    """
+    Name a level's overrides are listed under in a tuning file: its map's
+    file name without the extension.
+    :param map_src: Tiled map
+    :return:
+    """
+    return Path(map_src).stem
+
+
+def _check_values(values: dict, where: str) -> dict:
+    """
+    Check that a table of tuning values only holds known values of the
+    right type, and convert them to that type.
+    :param values: Value name -> value, as read from the file
+    :param where: Where the table is, for error messages
+    :return: Converted values
+    """
+    checked = {}
+
+    for name, value in values.items():
+        if name not in FIELDS:
+            raise ValueError(f'{where}: unknown tuning value {name!r}')
+
+        value_type, _ = FIELDS[name]
+
+        # bool is an int, but never a sensible force or speed
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise ValueError(
+                f'{where}: {name} should be a number, not {value!r}'
+            )
+
+        if value_type is int and value != int(value):
+            raise ValueError(
+                f'{where}: {name} should be a whole number, not {value!r}'
+            )
+
+        checked[name] = value_type(value)
+
+    return checked
+
+
+def load_tuning(path: str, map_src: str = c.MAP_SRC) -> Tuning:
+    """
+    Load tuning values for a level from a TOML or JSON file. Values at the
+    top of the file apply to every level, and a level's own values, in a
+    table under levels.<level name>, override them.
+
+    A missing file leaves every value at its default. TOML files need
+    Python 3.11 or later, or the tomli package.
+    :param path: .toml or .json file
+    :param map_src: Tiled map of the level being played
+    :return:
+    """
+    if not os.path.exists(path):
+        return Tuning()
+
+    if path.endswith('.json'):
+        with open(path) as tuning_file:
+            data = json.load(tuning_file)
+    elif tomllib is None:
+        raise ValueError(
+            f'{path}: reading TOML needs Python 3.11 or the tomli package; '
+            f'use a .json tuning file instead'
+        )
+    else:
+        with open(path, 'rb') as tuning_file:
+            data = tomllib.load(tuning_file)
+
+    if not isinstance(data, dict):
+        raise ValueError(f'{path}: expected a table of tuning values')
+
+    levels = data.pop('levels', {})
+    name = level_name(map_src)
+
+    if not isinstance(levels, dict):
+        raise ValueError(f'{path}: levels should be a table of levels')
+
+    level_values = levels.get(name, {})
+
+    if not isinstance(level_values, dict):
+        raise ValueError(f'{path}: levels.{name} should be a table')
+
+    values = _check_values(data, path)
+    values.update(_check_values(
+        level_values,
+        f'{path} [levels.{name}]'
+    ))
+
+    return Tuning(**values)
+
+
+class TuningWatcher:
+    """
+    Watches a tuning file while the game runs, loading it again whenever it
+    changes. The file is checked every TUNING_POLL_INTERVAL_S, so an
+    unchanged file costs one stat call per interval.
+    """
+    def __init__(
+            self,
+            path: str,
+            map_src: str = c.MAP_SRC,
+            interval: float = c.TUNING_POLL_INTERVAL_S
+    ):
+        """
+        :param path: .toml or .json tuning file; it doesn't have to exist yet
+        :param map_src: Tiled map of the level being played
+        :param interval: Seconds between checks
+        """
+        self.path = path
+        self.map_src = map_src
+        self.interval = interval
+        self.elapsed = 0.0
+        self.stamp = None
+
+    def file_stamp(self):
+        """
+        Get what changes about the file when it is saved.
+        :return: (modification time, size), or None if there is no file
+        """
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+
+        return stat.st_mtime_ns, stat.st_size
+
+    def load(self) -> Tuning:
+        """
+        Load the file as it is now.
+        :return:
+        """
+        self.stamp = self.file_stamp()
+
+        return load_tuning(self.path, self.map_src)
+
+    def poll(self, delta_time: float) -> Optional[Tuning]:
+        """
+        Load the file again if it has changed since it was last loaded. A
+        file that fails to load isn't tried again until it changes again.
+        :param delta_time: Time since the last poll
+        :return: The new tuning, or None if the file hasn't changed
+        """
+        self.elapsed += delta_time
+
+        if self.elapsed < self.interval:
+            return None
+
+        self.elapsed = 0.0
+        stamp = self.file_stamp()
+
+        if stamp == self.stamp:
+            return None
+
+        return self.load()
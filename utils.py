@@ -1,58 +1,18 @@
 import arcade
-import constants as c
 
 
-def check_boundary_y(sprite: arcade.Sprite):
+def get_collision_type_id(
+        physics_engine: arcade.PymunkPhysicsEngine,
+        collision_type: str
+) -> int:
     """
-    Reverses a moving sprite's vertical velocity if it has reached its top or
-    bottom boundary.
-    :param sprite: Moving sprite
-    :return:
+    Get the pymunk collision type number the physics engine uses for a named
+    collision type, registering the name if it is new.
+    :param physics_engine:
+    :param collision_type: Collision type name, e.g. COLLISION_PLAYER
+    :return: pymunk collision type number
     """
-    if(
-        sprite.boundary_top
-        and sprite.change_y > 0
-        and sprite.top > sprite.boundary_top
-    ) or (
-        sprite.boundary_bottom
-        and sprite.change_y < 0
-        and sprite.bottom < sprite.boundary_bottom
-    ):
-        sprite.change_y *= -1
+    if collision_type not in physics_engine.collision_types:
+        physics_engine.collision_types.append(collision_type)
 
-
-def check_boundary_x(sprite: arcade.Sprite):
-    """
-    Reverses a moving sprite's horizontal velocity if it has reached its left
-    or right boundary.
-    :param sprite: Moving sprite
-    :return:
-    """
-    if (
-        sprite.boundary_right
-        and sprite.change_x > 0
-        and sprite.right > sprite.boundary_right
-    ) or (
-        sprite.boundary_left
-        and sprite.change_x < 0
-        and sprite.left < sprite.boundary_left
-    ):
-        sprite.change_x *= -1
-
-
-def write_gui_text(label: str, value: int, start_x: int):
-    """
-    Display information in the GUI
-    :param label:
-    :param value:
-    :param start_x:
-    :return:
-    """
-    gui_text = f'{label}: {value}'
-    arcade.draw_text(
-        gui_text,
-        start_x,
-        c.GUI_START_Y,
-        arcade.csscolor.WHITE,
-        c.GUI_FONT_SIZE
-    )
+    return physics_engine.collision_types.index(collision_type)
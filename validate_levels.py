@@ -0,0 +1,233 @@
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+import constants as c
+import level_cache
+
+# Layers the game can't run without
+REQUIRED_LAYERS = (c.LAYER_PLATFORMS, c.LAYER_MOVING_PLATFORMS)
+
+# Every layer the game knows what to do with
+KNOWN_LAYERS = frozenset((
+    c.LAYER_PLATFORMS,
+    c.LAYER_MOVING_PLATFORMS,
+    c.LAYER_DYNAMIC_ITEMS,
+    c.LAYER_LADDERS,
+    *c.COLLECTIBLE_LAYERS,
+))
+
+# Map file extensions the Tiled loader understands
+MAP_PATTERNS = ('*.json', '*.tmx', '*.tmj')
+
+
+def check_level(level: dict):
+    """
+    Check a compiled level for content the game would trip over at runtime.
+    :param level: Compiled level
+    :return: (errors, warnings), lists of messages
+    """
+    errors = []
+    warnings = []
+    layers = level['layers']
+
+    for name in REQUIRED_LAYERS:
+        if name not in layers:
+            errors.append(f'missing layer {name!r}')
+
+    for name in layers:
+        if name not in KNOWN_LAYERS:
+            warnings.append(f'unknown layer {name!r} is drawn but ignored')
+
+    # The player scores collectibles by their Points property
+    for name in c.COLLECTIBLE_LAYERS:
+        for record in layers.get(name, {}).get('sprites', []):
+            points = record['properties'].get(c.PROP_POINTS)
+            position = tuple(round(value) for value in record['position'])
+
+            if points is None:
+                errors.append(
+                    f'{name} tile at {position} has no {c.PROP_POINTS!r} '
+                    f'property'
+                )
+                continue
+
+            try:
+                int(points)
+            except (TypeError, ValueError):
+                errors.append(
+                    f'{name} tile at {position} has a non-integer '
+                    f'{c.PROP_POINTS!r} property: {points!r}'
+                )
+
+    map_width = level['width'] * level['tile_width'] * c.SPRITE_SCALING
+    map_height = level['height'] * level['tile_height'] * c.SPRITE_SCALING
+
+    for x, y in level['enemy_spawns']:
+        if not (0 <= x <= map_width and 0 <= y <= map_height):
+            errors.append(f'enemy at {(x, y)} is outside the map')
+
+    return errors, warnings
+
+
+def level_stats(level: dict) -> dict:
+    """
+    Summarise a compiled level's contents.
+    :param level: Compiled level
+    :return:
+    """
+    layers = level['layers']
+    collectibles = {}
+
+    for name in c.COLLECTIBLE_LAYERS:
+        layer = layers.get(name, {})
+        collectibles[name] = {
+            'count': len(layer.get('sprites', [])),
+            'points': sum(layer.get('points', [])),
+        }
+
+    return {
+        'size_tiles': (level['width'], level['height']),
+        'tiles': {
+            name: len(layer['sprites'])
+            for name, layer in layers.items()
+        },
+        'collectibles': collectibles,
+        'animated_tiles': sum(
+            bool(record['frames'])
+            for layer in layers.values()
+            for record in layer['sprites']
+        ),
+        'enemies': len(level['enemy_spawns']),
+        'platform_shapes': level['platform_shape_counts'],
+        'chunks': len(level['chunks']),
+        'textures': len(level['textures']),
+    }
+
+
+def validate_map(map_path: str) -> dict:
+    """
+    Compile one map into the level cache and check it. Runs in a worker
+    process.
+    :param map_path:
+    :return: Dict with the map, its errors and warnings, and its stats if it
+    compiled
+    """
+    start = time.perf_counter()
+
+    try:
+        level = level_cache.load_level(map_path)
+    except Exception as error:  # Any failure here is a broken map
+        return {
+            'map': map_path,
+            'ok': False,
+            'errors': [f'failed to load: {type(error).__name__}: {error}'],
+            'warnings': [],
+            'stats': None,
+            'load_s': time.perf_counter() - start,
+        }
+
+    errors, warnings = check_level(level)
+
+    return {
+        'map': map_path,
+        'ok': not errors,
+        'errors': errors,
+        'warnings': warnings,
+        'stats': level_stats(level),
+        'load_s': time.perf_counter() - start,
+    }
+
+
+def find_maps(paths) -> list:
+    """
+    Expand directories into the Tiled maps directly inside them.
+    :param paths: Map files and directories
+    :return: Sorted list of map paths
+    """
+    maps = set()
+
+    for path in paths:
+        if os.path.isdir(path):
+            for pattern in MAP_PATTERNS:
+                maps.update(glob.glob(os.path.join(path, pattern)))
+        else:
+            maps.add(path)
+
+    return sorted(maps)
+
+
+def validate_maps(map_paths, jobs: int = None) -> list:
+    """
+    Validate maps in parallel, one process per core by default.
+    :param map_paths:
+    :param jobs: Number of worker processes
+    :return: One result per map, in the order given
+    """
+    if jobs == 1:
+        return [validate_map(map_path) for map_path in map_paths]
+
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        return list(executor.map(validate_map, map_paths))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Compile Tiled maps into the level cache in parallel and '
+                    'check them for content the game would crash on.'
+    )
+    parser.add_argument(
+        'paths',
+        nargs='+',
+        help='Map files, or directories of maps'
+    )
+    parser.add_argument(
+        '--jobs',
+        type=int,
+        default=os.cpu_count(),
+        help='Worker processes (default: one per core)'
+    )
+    parser.add_argument(
+        '--output',
+        help='File to write per-level results and stats to, as JSON'
+    )
+    args = parser.parse_args()
+
+    map_paths = find_maps(args.paths)
+    start = time.perf_counter()
+    results = validate_maps(map_paths, args.jobs)
+    elapsed = time.perf_counter() - start
+
+    for result in results:
+        status = 'ok' if result['ok'] else 'FAILED'
+        print(f'{status:<7}{result["map"]}')
+
+        for error in result['errors']:
+            print(f'    error: {error}')
+
+        for warning in result['warnings']:
+            print(f'    warning: {warning}')
+
+    failed = sum(not result['ok'] for result in results)
+    print(
+        f'{len(results)} maps checked in {elapsed:.2f}s, '
+        f'{failed} failed'
+    )
+
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            json.dump(
+                {'elapsed_s': elapsed, 'levels': results},
+                output_file,
+                indent=2
+            )
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
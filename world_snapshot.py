@@ -0,0 +1,263 @@
+import math
+import pickle
+import numpy as np
+from character_sprite import CharacterSprite
+from enemy_sprite import EnemySprite
+from game_world import GameWorld
+
+# Bump whenever the layout of a snapshot changes
+SNAPSHOT_VERSION = 1
+
+
+def _body_state(body) -> tuple:
+    """
+    Get the state of a physics body that changes as it moves.
+    :param body:
+    :return: (x, y, velocity x, velocity y, angle, angular velocity)
+    """
+    return (
+        *body.position,
+        *body.velocity,
+        body.angle,
+        body.angular_velocity
+    )
+
+
+def _set_body_state(body, sprite, state):
+    """
+    Put a physics body, and the sprite drawn for it, back in a saved state.
+    :param body:
+    :param sprite:
+    :param state: (x, y, velocity x, velocity y, angle, angular velocity)
+    :return:
+    """
+    x, y, velocity_x, velocity_y, angle, angular_velocity = state
+    body.position = x, y
+    body.velocity = velocity_x, velocity_y
+    body.angle = angle
+    body.angular_velocity = angular_velocity
+    sprite.position = body.position
+    sprite.angle = math.degrees(angle)
+
+
+def _animation_state(sprite: CharacterSprite) -> tuple:
+    """
+    Get where a character is in its animations.
+    :param sprite:
+    :return:
+    """
+    return (
+        sprite.animation_state,
+        sprite.cur_texture_index,
+        sprite.face_direction,
+        sprite.odometer_x,
+        sprite.odometer_y
+    )
+
+
+def _set_animation_state(sprite: CharacterSprite, state):
+    """
+    Put a character back at a saved point in its animations, showing the
+    matching texture.
+    :param sprite:
+    :param state:
+    :return:
+    """
+    (
+        sprite.animation_state,
+        sprite.cur_texture_index,
+        sprite.face_direction,
+        sprite.odometer_x,
+        sprite.odometer_y
+    ) = state
+    sprite.show_frame()
+
+
+def take_snapshot(world: GameWorld) -> bytes:
+    """
+    Capture everything about a world that changes as it runs: every moving
+    body, the moving platforms' directions, the player's score and
+    animation, each enemy's AI state, which chunks are loaded and which
+    collectibles have been picked up. The level itself is not included.
+    :param world:
+    :return: Snapshot, for restore_snapshot
+    """
+    physics_engine = world.physics_engine
+    streamer = world.streamer
+    player = world.player_sprite
+    platforms = world.moving_platform_state
+
+    # Dynamic sprites in the world, in the physics engine's order, then the
+    # parked ones: (origin, chunk key if parked, sprite, body)
+    dynamic = [
+        (
+            streamer.origins[sprite],
+            None,
+            sprite,
+            physics_engine.sprites[sprite].body
+        )
+        for sprite in physics_engine.non_static_sprite_list
+        if sprite in streamer.origins
+    ]
+
+    for key, parked in streamer.parked.items():
+        for _, sprite, physics_object in parked:
+            dynamic.append(
+                (streamer.origins[sprite], key, sprite, physics_object.body)
+            )
+
+    bodies = np.array(
+        [_body_state(physics_engine.sprites[player].body)]
+        + [_body_state(body) for _, _, _, body in dynamic],
+        dtype=float
+    )
+
+    # AI and animation state of each enemy, None for other sprites
+    characters = [
+        (
+            sprite.health,
+            sprite.state,
+            sprite.patrol_direction,
+            sprite.walk_direction,
+            sprite.next_think_tick,
+            _animation_state(sprite)
+        )
+        if isinstance(sprite, EnemySprite) else None
+        for _, _, sprite, _ in dynamic
+    ]
+
+    state = {
+        'version': SNAPSHOT_VERSION,
+        'map_src': world.map_src,
+        'tick': world.enemy_controller.tick,
+        'inputs': (
+            world.left_pressed,
+            world.right_pressed,
+            world.up_pressed,
+            world.down_pressed
+        ),
+        'player': (
+            player.score,
+            player.is_on_ground,
+            _animation_state(player)
+        ),
+        'bodies': bodies,
+        'dynamic': [(origin, key) for origin, key, _, _ in dynamic],
+        'characters': characters,
+        'platforms': (
+            platforms.change.copy(),
+            platforms.position.copy(),
+            platforms.velocity.copy(),
+            np.array(
+                [_body_state(body) for body in platforms.bodies],
+                dtype=float
+            )
+        ),
+        'streamer': (
+            tuple(streamer.loaded),
+            tuple(streamer.visited),
+            tuple(streamer.collected),
+            dict(streamer.remaining),
+            streamer.view_range
+        ),
+    }
+
+    return pickle.dumps(state, pickle.HIGHEST_PROTOCOL)
+
+
+def restore_snapshot(world: GameWorld, snapshot: bytes):
+    """
+    Put a world back in the state it was in when a snapshot was taken,
+    without loading the level again. Streamed sprites are rebuilt from the
+    world's sprite pool.
+
+    Contacts the physics engine was tracking are not part of a snapshot, so
+    ladder and collectible sensors the player overlaps are touched again on
+    the next step, and the run that follows is close to, but not bit for bit
+    the same as, the one that followed the snapshot.
+    :param world: World on the same level the snapshot was taken of
+    :param snapshot: From take_snapshot
+    :return:
+    """
+    state = pickle.loads(snapshot)
+
+    if state['version'] != SNAPSHOT_VERSION:
+        raise ValueError(f'Not a version {SNAPSHOT_VERSION} world snapshot')
+
+    if state['map_src'] != world.map_src:
+        raise ValueError(
+            f'Snapshot is of {state["map_src"]}, not {world.map_src}'
+        )
+
+    physics_engine = world.physics_engine
+    streamer = world.streamer
+    player = world.player_sprite
+    platforms = world.moving_platform_state
+    bodies = state['bodies'].tolist()
+
+    # Take every streamed sprite out, then load the snapshot's chunks as
+    # already visited, so they don't spawn their dynamic sprites again
+    streamer.reset()
+    loaded, visited, collected, remaining, view_range = state['streamer']
+    streamer.visited.update(visited)
+    streamer.collected.update(collected)
+    streamer.remaining = dict(remaining)
+
+    for key in loaded:
+        streamer.load_chunk(key)
+
+    streamer.view_range = view_range
+
+    for (origin, parked_key), character, body_state in zip(
+            state['dynamic'],
+            state['characters'],
+            bodies[1:]
+    ):
+        sprite = streamer.spawn_origin(origin)
+        body = physics_engine.sprites[sprite].body
+        _set_body_state(body, sprite, body_state)
+
+        if character is not None:
+            (
+                sprite.health,
+                sprite.state,
+                sprite.patrol_direction,
+                sprite.walk_direction,
+                sprite.next_think_tick,
+                animation
+            ) = character
+            _set_animation_state(sprite, animation)
+
+        if parked_key is not None:
+            streamer.park(sprite, parked_key)
+
+    # The ladders were all just taken out and put back; the player will
+    # touch any it overlaps again on the next step
+    player.score, player.is_on_ground, animation = state['player']
+    player.ladder_contacts = 0
+
+    if player.is_on_ladder:
+        player.on_ladder_exit()
+
+    _set_animation_state(player, animation)
+    _set_body_state(physics_engine.sprites[player].body, player, bodies[0])
+
+    change, position, velocity, platform_bodies = state['platforms']
+    platforms.change[:] = change
+    platforms.position[:] = position
+    platforms.velocity[:] = velocity
+
+    for body, sprite, body_state in zip(
+            platforms.bodies,
+            platforms.sprites,
+            platform_bodies.tolist()
+    ):
+        _set_body_state(body, sprite, body_state)
+
+    world.enemy_controller.tick = state['tick']
+    (
+        world.left_pressed,
+        world.right_pressed,
+        world.up_pressed,
+        world.down_pressed
+    ) = state['inputs']